@@ -0,0 +1,210 @@
+import argparse
+import json
+import math
+
+import db_commands
+from nflpick import ADJUSTMENT_VALUES, calculate_adjusted_spread, spread_probabilities
+
+# Candidate magnitudes for fitting: additive adjustments from -3 to +3 points in quarter
+# points, the division multiplier from 0.50x to 1.20x.
+ADDITIVE_GRID = tuple(x / 4 for x in range(-12, 13))
+MULTIPLIER_GRID = tuple(x / 20 for x in range(10, 25))
+
+# Adjustments that fired in fewer settled games than this keep their current value.
+MIN_SAMPLES = 5
+FIT_ROUNDS = 3
+
+# Value of each adjustment that leaves the spread unchanged.
+NEUTRAL = {adjustment_type: 0.0 for adjustment_type in ADJUSTMENT_VALUES}
+NEUTRAL['division'] = 1.0
+
+
+def load_tracked_games(cur):
+    """
+    Settled, untied games that have recorded adjustments, read in one joined pass.
+    Each game has favorite, underdog, spread (as entered), fav_won and its adjustments as
+    (adjustment_type, spread_before, spread_after, was_correct) in the order applied.
+    """
+    cur.execute("""
+        SELECT p.id, p.favorite, p.underdog, p.spread, p.winner,
+               a.adjustment_type, a.original_spread, a.adjusted_spread, a.was_correct
+        FROM adjustment_tracking a
+        JOIN picks p ON p.id = a.pick_id
+        WHERE p.winner IS NOT NULL AND p.winner != 'TIE'
+        ORDER BY p.id, a.id
+    """)
+    games = {}
+    for row in cur.fetchall():
+        game = games.get(row['id'])
+        if game is None:
+            game = games[row['id']] = {'favorite': row['favorite'], 'underdog': row['underdog'],
+                                       'spread': row['spread'], 'fav_won': row['winner'] == row['favorite'],
+                                       'adjustments': []}
+        game['adjustments'].append((row['adjustment_type'], row['original_spread'],
+                                    row['adjusted_spread'], row['was_correct']))
+    return list(games.values())
+
+
+def game_conditions(game):
+    """Rebuilds calculate_adjusted_spread's inputs from the adjustments a game recorded."""
+    types = {adjustment_type for adjustment_type, _, _, _ in game['adjustments']}
+    return {
+        'home_team': 'underdog' if types & {'home_underdog', 'prime_time_home_underdog'} else 'favorite',
+        'prime_time': bool(types & {'prime_time_home_favorite', 'prime_time_home_underdog'}),
+        'rest_advantage': ('favorite' if 'rest_favorite' in types
+                           else 'underdog' if 'rest_underdog' in types else 'neither'),
+        'fav_streak': 'momentum_favorite' in types,
+        'dog_streak': 'momentum_underdog' in types,
+    }
+
+
+def favorite_probability(game, values):
+    adjusted_spread, _ = calculate_adjusted_spread(game['favorite'], game['underdog'], game['spread'],
+                                                   values=values, **game['conditions'])
+    return spread_probabilities(adjusted_spread)[0]
+
+
+def log_loss(prob, fav_won):
+    return -math.log(max(prob if fav_won else 1 - prob, 1e-9))
+
+
+def brier(prob, fav_won):
+    return (prob - fav_won) ** 2
+
+
+def analyze_adjustments(games, values=None):
+    """
+    Per adjustment type: how often it fired, its hit rate (moved the line toward the winner)
+    and its calibration lift, i.e. how much Brier score and log loss improve with it applied
+    versus the same games with only that adjustment neutralized. Positive lift = it helps.
+    Also reports the same lift for all adjustments together versus the raw spread.
+    """
+    values = dict(values or ADJUSTMENT_VALUES)
+    stats = {}
+    overall = {'games': len(games), 'brier_lift': 0.0, 'log_loss_lift': 0.0}
+    for game in games:
+        game.setdefault('conditions', game_conditions(game))
+        fav_won = game['fav_won']
+        prob = favorite_probability(game, values)
+        raw_prob = spread_probabilities(game['spread'])[0]
+        overall['brier_lift'] += brier(raw_prob, fav_won) - brier(prob, fav_won)
+        overall['log_loss_lift'] += log_loss(raw_prob, fav_won) - log_loss(prob, fav_won)
+
+        for adjustment_type, _, _, was_correct in game['adjustments']:
+            s = stats.setdefault(adjustment_type, {'fired': 0, 'moved': 0, 'hits': 0,
+                                                   'brier_lift': 0.0, 'log_loss_lift': 0.0})
+            s['fired'] += 1
+            if was_correct is not None:
+                s['moved'] += 1
+                s['hits'] += was_correct
+            without = favorite_probability(game, dict(values, **{adjustment_type: NEUTRAL[adjustment_type]}))
+            s['brier_lift'] += brier(without, fav_won) - brier(prob, fav_won)
+            s['log_loss_lift'] += log_loss(without, fav_won) - log_loss(prob, fav_won)
+
+    results = []
+    for adjustment_type, s in sorted(stats.items()):
+        results.append({
+            'adjustment': adjustment_type,
+            'value': values.get(adjustment_type),
+            'fired': s['fired'],
+            'hit_rate': s['hits'] / s['moved'] if s['moved'] else None,
+            'brier_lift': s['brier_lift'] / s['fired'],
+            'log_loss_lift': s['log_loss_lift'] / s['fired'],
+        })
+    if games:
+        overall['brier_lift'] /= len(games)
+        overall['log_loss_lift'] /= len(games)
+    return results, overall
+
+
+def fit_adjustment_values(games, values=None, rounds=FIT_ROUNDS, min_samples=MIN_SAMPLES):
+    """
+    Fits adjustment magnitudes by coordinate-wise grid search on total log loss.
+    Each pass re-fits one adjustment at a time over only the games where it fired, holding
+    the rest fixed; ties keep the value closest to the current one.
+    Returns (fitted values, log loss before, log loss after, samples per adjustment).
+    """
+    fitted = dict(values or ADJUSTMENT_VALUES)
+    by_type = {}
+    for game in games:
+        game.setdefault('conditions', game_conditions(game))
+        for adjustment_type, _, _, _ in game['adjustments']:
+            by_type.setdefault(adjustment_type, []).append(game)
+
+    def total_loss(subset, trial):
+        return sum(log_loss(favorite_probability(game, trial), game['fav_won']) for game in subset)
+
+    before = total_loss(games, fitted)
+    for _ in range(rounds):
+        changed = False
+        for adjustment_type, subset in sorted(by_type.items()):
+            if len(subset) < min_samples or adjustment_type not in fitted:
+                continue
+            current = fitted[adjustment_type]
+            grid = MULTIPLIER_GRID if adjustment_type == 'division' else ADDITIVE_GRID
+            best = min(grid, key=lambda v: (total_loss(subset, dict(fitted, **{adjustment_type: v})), abs(v - current)))
+            if best != current:
+                fitted[adjustment_type] = best
+                changed = True
+        if not changed:
+            break
+    return fitted, before, total_loss(games, fitted), {t: len(gs) for t, gs in by_type.items()}
+
+
+def print_analysis(results, overall):
+    print("\n===== ADJUSTMENT EFFICACY =====")
+    if not results:
+        print("No settled games with recorded adjustments yet.")
+        return
+    print("{:<26} {:<8} {:<7} {:<10} {:<12} {:<12}".format(
+        "Adjustment", "Value", "Fired", "Hit Rate", "Brier Lift", "LogLoss Lift"))
+    print("-" * 78)
+    for r in results:
+        hit_rate = f"{r['hit_rate'] * 100:.1f}%" if r['hit_rate'] is not None else "N/A"
+        print("{:<26} {:<8} {:<7} {:<10} {:<12} {:<12}".format(
+            r['adjustment'], f"{r['value']:g}", r['fired'], hit_rate,
+            f"{r['brier_lift']:+.4f}", f"{r['log_loss_lift']:+.4f}"))
+    print(f"\nAll adjustments vs. raw spread over {overall['games']} games: "
+          f"Brier lift {overall['brier_lift']:+.4f}, log loss lift {overall['log_loss_lift']:+.4f}")
+    print("(Lift is per game fired; positive means the adjustment improved the probabilities.)")
+
+
+def print_fit(fitted, before, after, samples):
+    print("\n===== FITTED MAGNITUDES =====")
+    print("{:<26} {:<10} {:<10} {:<8}".format("Adjustment", "Current", "Fitted", "Games"))
+    print("-" * 56)
+    for adjustment_type, value in ADJUSTMENT_VALUES.items():
+        n = samples.get(adjustment_type, 0)
+        note = "" if n >= MIN_SAMPLES else "  (too few games, kept)"
+        print("{:<26} {:<10} {:<10} {:<8}{}".format(adjustment_type, f"{value:g}", f"{fitted[adjustment_type]:g}", n, note))
+    print(f"\nTotal log loss: {before:.3f} -> {after:.3f}")
+    print("Use with calculate_adjusted_spread(..., values=<fitted>) or copy into ADJUSTMENT_VALUES.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure and fit the spread adjustments from settled games.")
+    parser.add_argument("--db", default="picks.db", help="database to analyze (default: picks.db)")
+    parser.add_argument("--fit", action="store_true", help="also fit adjustment magnitudes by grid search")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    conn, cur = db_commands.connect_db(args.db)
+    games = load_tracked_games(cur)
+    conn.close()
+
+    results, overall = analyze_adjustments(games)
+    output = {'adjustments': results, 'overall': overall}
+    if args.fit:
+        fitted, before, after, samples = fit_adjustment_values(games)
+        output['fit'] = {'values': fitted, 'log_loss_before': before, 'log_loss_after': after, 'samples': samples}
+
+    if args.json:
+        print(json.dumps(output, indent=2))
+        return
+    print_analysis(results, overall)
+    if args.fit:
+        print_fit(fitted, before, after, samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+
+import db_commands
+
+# NFL season of a pick, the same rule as performance_stats (Jan/Feb belong to the previous
+# season); picks without a date fall back to their year.
+SEASON_SQL = """
+    CASE
+        WHEN date IS NULL THEN year
+        WHEN strftime('%m', date) >= '09' THEN CAST(strftime('%Y', date) AS INTEGER)
+        ELSE CAST(strftime('%Y', date) AS INTEGER) - 1
+    END
+"""
+
+# Tables moved with a season, keyed by (year, week) on the season's weeks, and the tables
+# that hang off them by foreign key. Pools and entrants are settings and stay live.
+WEEK_TABLES = ('picks', 'generated_slates', 'run_manifests', 'weekly_scores', 'non_winners', 'line_snapshots')
+CHILD_TABLES = {'adjustment_tracking': ('pick_id', 'picks'), 'slate_picks': ('slate_id', 'generated_slates')}
+
+# Stamped afresh by the archive's own triggers, so neither copied nor compared.
+SKIP_COLUMNS = {'change_seq'}
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def archive_path(directory, season):
+    return os.path.join(directory, db_commands.ARCHIVE_FILE.format(season=season))
+
+
+def season_summary(cur):
+    """Per season in the live database: picks, unsettled picks and weeks. Newest first."""
+    cur.execute(f"""
+        SELECT {SEASON_SQL} AS season, COUNT(*) AS picks,
+               SUM(CASE WHEN winner IS NULL THEN 1 ELSE 0 END) AS unsettled,
+               COUNT(DISTINCT year * 100 + week) AS weeks
+        FROM picks
+        GROUP BY season
+        ORDER BY season DESC
+    """)
+    return [dict(row) for row in cur.fetchall()]
+
+
+def completed_seasons(cur):
+    """Seasons that can be archived: fully settled and older than the newest season."""
+    seasons = season_summary(cur)
+    return [s['season'] for s in seasons[1:] if s['unsettled'] == 0]
+
+
+def _conditions():
+    week_filter = "(year, week) IN (SELECT year, week FROM temp.archive_weeks)"
+    conditions = {table: week_filter for table in WEEK_TABLES}
+    for table, (key, parent) in CHILD_TABLES.items():
+        conditions[table] = f"{key} IN (SELECT id FROM main.{parent} WHERE {week_filter})"
+    return conditions
+
+
+def _columns(cur, schema, table):
+    return [row['name'] for row in cur.execute(f"PRAGMA {schema}.table_info({table})").fetchall()
+            if row['name'] not in SKIP_COLUMNS]
+
+
+def _create_archive(path):
+    """Creates (or migrates) the archive file with connect_db's schema."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        conn, _ = db_commands.connect_db(path)
+    conn.close()
+
+
+def move_season(conn, cur, season, directory, force=False):
+    """
+    Moves one season's weeks out of the live database into its archive file in a single
+    transaction: INSERT ... SELECT into the attached archive, verify that every moved row is
+    there column for column, then DELETE from the live tables. Nothing is read into Python;
+    on any mismatch the transaction is rolled back and the live database is unchanged.
+    Returns {table: rows moved}.
+    """
+    summary = {s['season']: s for s in season_summary(cur)}
+    if season not in summary:
+        raise ArchiveError(f"No picks for the {season} season in the live database.")
+    if not force:
+        if season == max(summary):
+            raise ArchiveError(f"{season} is the current season; it stays in the live database.")
+        if summary[season]['unsettled']:
+            raise ArchiveError(f"{season} has {summary[season]['unsettled']} unsettled picks; settle them first.")
+
+    path = archive_path(directory, season)
+    _create_archive(path)
+    conn.commit()
+    cur.execute("ATTACH DATABASE ? AS archive", (path,))
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            cur.execute("CREATE TEMP TABLE archive_weeks (year INTEGER, week INTEGER, PRIMARY KEY (year, week))")
+            cur.execute(f"INSERT INTO temp.archive_weeks SELECT DISTINCT year, week FROM main.picks "
+                        f"WHERE {SEASON_SQL} = ? AND week IS NOT NULL AND year IS NOT NULL", (season,))
+            conditions = _conditions()
+            moved = {}
+            for table, condition in conditions.items():
+                live = _columns(cur, 'main', table)
+                missing = set(live) - set(_columns(cur, 'archive', table))
+                if missing:
+                    raise ArchiveError(f"archive.{table} lacks columns {sorted(missing)}")
+                cols = ", ".join(live)
+                # OR REPLACE: re-running after an interrupted move (WAL commits each file on
+                # its own) overwrites the rows already copied instead of failing on their ids.
+                cur.execute(f"INSERT OR REPLACE INTO archive.{table} ({cols}) "
+                            f"SELECT {cols} FROM main.{table} WHERE {condition}")
+                moved[table] = cur.execute(f"SELECT COUNT(*) FROM main.{table} WHERE {condition}").fetchone()[0]
+                absent = cur.execute(f"SELECT COUNT(*) FROM (SELECT {cols} FROM main.{table} WHERE {condition} "
+                                     f"EXCEPT SELECT {cols} FROM archive.{table})").fetchone()[0]
+                if absent:
+                    raise ArchiveError(f"{absent} rows of {table} did not copy intact")
+
+            # Children first: their conditions look up the parents still in main.
+            for table in list(CHILD_TABLES) + list(WEEK_TABLES):
+                cur.execute(f"DELETE FROM main.{table} WHERE {conditions[table]}")
+                if cur.rowcount != moved[table]:
+                    raise ArchiveError(f"deleted {cur.rowcount} rows of {table}, expected {moved[table]}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    finally:
+        cur.execute("DROP TABLE IF EXISTS temp.archive_weeks")
+        cur.execute("DETACH DATABASE archive")
+    return moved
+
+
+def verify_season(cur, season, directory):
+    """
+    Checks an archived season: the file passes integrity_check, and the live database no
+    longer holds any of its picks. Returns {'ok', 'integrity', 'live_picks', 'archived': {table: rows}}.
+    """
+    path = archive_path(directory, season)
+    if not os.path.exists(path):
+        raise ArchiveError(f"No archive for the {season} season at {path}.")
+    cur.execute("ATTACH DATABASE ? AS archive", (path,))
+    try:
+        integrity = [row[0] for row in cur.execute("PRAGMA archive.integrity_check").fetchall()]
+        live = cur.execute(f"SELECT COUNT(*) FROM main.picks WHERE {SEASON_SQL} = ?", (season,)).fetchone()[0]
+        archived = {table: cur.execute(f"SELECT COUNT(*) FROM archive.{table}").fetchone()[0]
+                    for table in WEEK_TABLES + tuple(CHILD_TABLES)}
+    finally:
+        cur.execute("DETACH DATABASE archive")
+    return {'ok': integrity == ['ok'] and live == 0, 'integrity': integrity,
+            'live_picks': live, 'archived': archived}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move completed seasons out of the live database.")
+    parser.add_argument("--db", default="picks.db", help="live database (default: picks.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("seasons", help="list live seasons and archived files")
+    p = sub.add_parser("move", help="archive a season, or every completed season")
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument("--season", type=int, help="NFL season (the year it kicked off)")
+    group.add_argument("--completed", action="store_true", help="every settled season before the current one")
+    p.add_argument("--force", action="store_true", help="allow the current or an unsettled season")
+    p = sub.add_parser("verify", help="check an archived season")
+    p.add_argument("--season", type=int, required=True)
+    args = parser.parse_args()
+    # Always the database's own archive directory: that is where attach_archives looks.
+    directory = db_commands.archive_dir(args.db)
+
+    conn, cur = db_commands.connect_db(args.db)
+    try:
+        if args.command == "seasons":
+            output = {'live': season_summary(cur),
+                      'archived': sorted(f for f in os.listdir(directory) if f.endswith(".db"))
+                      if os.path.isdir(directory) else []}
+        elif args.command == "move":
+            seasons = completed_seasons(cur) if args.completed else [args.season]
+            output = {season: move_season(conn, cur, season, directory, args.force) for season in seasons}
+        else:
+            output = verify_season(cur, args.season, directory)
+    except ArchiveError as e:
+        print(f"Archive failed: {e}")
+        return
+    finally:
+        conn.close()
+    print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
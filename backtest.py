@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import db_commands
+import snapshot
+from nflpick import derive_seed, generate_slates_ga, game_probabilities
+
+CACHE_DIR = ".backtest_cache"
+
+DEFAULT_CONFIG = {
+    'num_slates': 5,
+    'population_size': 500,
+    'generations': 300,
+    'mutation_rate': 0.07,
+    'underdog_bonus': 0.45,
+    'seed': 0,
+}
+
+
+def nfl_season(date, year):
+    """Maps a pick's entry date to its NFL season (Jan/Feb games belong to the previous season)."""
+    if date:
+        season = int(date[:4])
+        return season if date[5:7] >= '09' else season - 1
+    return year
+
+
+def load_settled_weeks(cur, source='picks'):
+    """
+    Returns every fully settled week in 'source' (picks, or all_picks with archives), oldest first.
+    A week is settled once every game in it has a recorded winner.
+    Games are listed in entry order, the same set handle_advanced_ga feeds the GA.
+    """
+    cur.execute(f"""
+        SELECT date, week, year, favorite, underdog, adjusted_spread as spread, winner
+        FROM {source}
+        WHERE week IS NOT NULL AND year IS NOT NULL
+        ORDER BY year, week, id
+    """)
+    weeks = {}
+    for row in cur.fetchall():
+        key = (row['year'], row['week'])
+        if key not in weeks:
+            weeks[key] = {'year': row['year'], 'week': row['week'],
+                          'season': nfl_season(row['date'], row['year']), 'games': []}
+        weeks[key]['games'].append({
+            'favorite': row['favorite'],
+            'underdog': row['underdog'],
+            'spread': row['spread'],
+            'winner': row['winner']
+        })
+
+    return [wk for wk in weeks.values() if all(g['winner'] is not None for g in wk['games'])]
+
+
+def week_cache_key(games, config):
+    """Hashes the optimizer inputs (games without results, plus GA settings and seed) for caching."""
+    return db_commands.input_hash(games, config)
+
+
+def optimize_week(games, config):
+    """
+    Process pool worker: runs the GA for one week and returns JSON-friendly slates.
+    The week's random stream is derived from config['seed'] and the week's inputs, so the
+    result is the same whichever worker runs it and in whatever order.
+    """
+    ga_games = [{'favorite': g['favorite'], 'underdog': g['underdog'], 'spread': g['spread']} for g in games]
+    config = dict(config)
+    seed = config.pop('seed', None)
+    rng = derive_seed(seed, week_cache_key(games, config)) if seed is not None else None
+    return generate_slates_ga(ga_games, rng=rng, **config)
+
+
+def read_cache(cache_dir, key):
+    path = os.path.join(cache_dir, f"{key}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_cache(cache_dir, key, slates):
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = os.path.join(cache_dir, f"{key}.json.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(slates, f)
+    os.replace(tmp_path, os.path.join(cache_dir, f"{key}.json"))
+
+
+def optimize_weeks(weeks, config, workers=None, cache_dir=CACHE_DIR):
+    """
+    Runs the optimizer for every week, reusing cached outputs where the inputs match.
+    Cache misses are spread across a process pool. Returns slates in the order of 'weeks'.
+    """
+    keys = [week_cache_key(wk['games'], config) for wk in weeks]
+    results = [read_cache(cache_dir, key) if cache_dir else None for key in keys]
+    missing = [i for i, slates in enumerate(results) if slates is None]
+
+    if missing:
+        if len(missing) == 1 or workers == 1:
+            computed = [optimize_week(weeks[i]['games'], config) for i in missing]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                computed = list(pool.map(optimize_week,
+                                         [weeks[i]['games'] for i in missing],
+                                         [config] * len(missing)))
+        for i, slates in zip(missing, computed):
+            results[i] = slates
+            if cache_dir:
+                write_cache(cache_dir, keys[i], slates)
+
+    return results
+
+
+def score_slate(picks, games):
+    """Counts how many picks in a slate match the recorded winners (ties count as misses)."""
+    return sum(1 for pick, game in zip(picks, games) if pick == game['winner'])
+
+
+def opponent_hit_probs(games, favorite_rate):
+    """
+    Chance that a typical opponent got each settled game right, assuming opponents
+    take the model favorite (by adjusted spread) with probability 'favorite_rate'.
+    """
+    hit_probs = []
+    for game, probs in zip(games, game_probabilities(games)):
+        fav_side = 'favorite' if probs['favorite']['prob'] >= probs['underdog']['prob'] else 'underdog'
+        dog_side = 'underdog' if fav_side == 'favorite' else 'favorite'
+        if game['winner'] == probs[fav_side]['team']:
+            hit_probs.append(favorite_rate)
+        elif game['winner'] == probs[dog_side]['team']:
+            hit_probs.append(1 - favorite_rate)
+        else:
+            hit_probs.append(0.0)
+    return hit_probs
+
+
+def pool_win_share(our_correct, opponent_dist, pool_size):
+    """
+    Expected share of first place for an entry with 'our_correct' hits against
+    pool_size - 1 independent opponents whose hit counts follow 'opponent_dist'.
+    Ties for first split the prize evenly.
+    """
+    opponents = pool_size - 1
+    if opponents <= 0:
+        return 1.0
+    below = sum(opponent_dist[:our_correct])
+    tied = opponent_dist[our_correct] if our_correct < len(opponent_dist) else 0.0
+    if tied <= 0:
+        return below ** opponents
+    # sum_j C(M, j) tied^j below^(M-j) / (j + 1), in closed form
+    return ((below + tied) ** (opponents + 1) - below ** (opponents + 1)) / ((opponents + 1) * tied)
+
+
+def score_week(week, slates):
+    """Scores a week's slates against its results. The top slate is the one the GA ranked first."""
+    num_games = len(week['games'])
+    correct = [score_slate(slate['picks'], week['games']) for slate in slates]
+    return {
+        'season': week['season'],
+        'year': week['year'],
+        'week': week['week'],
+        'games': num_games,
+        'slates': len(slates),
+        'top_correct': correct[0] if correct else 0,
+        'top_hit_rate': correct[0] / num_games if correct else 0.0,
+        'mean_hit_rate': sum(correct) / (len(correct) * num_games) if correct else 0.0,
+        'best_correct': max(correct) if correct else 0,
+        'perfect': bool(correct) and max(correct) == num_games
+    }
+
+
+def summarize_seasons(week_results):
+    """Rolls per-week results up into per-season hit rates."""
+    seasons = {}
+    for res in week_results:
+        s = seasons.setdefault(res['season'], {'season': res['season'], 'weeks': 0, 'games': 0,
+                                               'top_correct': 0, 'mean_hits': 0.0, 'perfect_weeks': 0})
+        s['weeks'] += 1
+        s['games'] += res['games']
+        s['top_correct'] += res['top_correct']
+        s['mean_hits'] += res['mean_hit_rate'] * res['games']
+        s['perfect_weeks'] += 1 if res['perfect'] else 0
+
+    summary = []
+    for season in sorted(seasons):
+        s = seasons[season]
+        summary.append({
+            'season': season,
+            'weeks': s['weeks'],
+            'games': s['games'],
+            'top_hit_rate': s['top_correct'] / s['games'],
+            'mean_hit_rate': s['mean_hits'] / s['games'],
+            'perfect_weeks': s['perfect_weeks']
+        })
+    return summary
+
+
+def run_backtest(cur, config=None, workers=None, cache_dir=CACHE_DIR, source='picks', weeks=None):
+    """
+    Replays the GA over every settled week ('weeks' if given, e.g. snapshot.settled_weeks,
+    else load_settled_weeks from 'source'). Returns (per-week results, per-season summary).
+    """
+    config = dict(DEFAULT_CONFIG, **(config or {}))
+    if weeks is None:
+        weeks = load_settled_weeks(cur, source)
+    if not weeks:
+        return [], []
+
+    all_slates = optimize_weeks(weeks, config, workers=workers, cache_dir=cache_dir)
+    week_results = [score_week(wk, slates) for wk, slates in zip(weeks, all_slates)]
+    return week_results, summarize_seasons(week_results)
+
+
+def print_backtest(week_results, season_summary):
+    """Prints the per-week and per-season backtest tables."""
+    if not week_results:
+        print("No settled weeks found to backtest.")
+        return
+
+    print("\n===== BACKTEST: PER WEEK =====")
+    print("{:<8} {:<6} {:<6} {:<6} {:<12} {:<12} {:<8}".format(
+        "Season", "Year", "Week", "Games", "Top Slate", "Mean Slate", "Perfect"))
+    print("-" * 64)
+    for res in week_results:
+        print("{:<8} {:<6} {:<6} {:<6} {:<12} {:<12} {:<8}".format(
+            res['season'], res['year'], res['week'], res['games'],
+            f"{res['top_correct']}/{res['games']} ({res['top_hit_rate'] * 100:.0f}%)",
+            f"{res['mean_hit_rate'] * 100:.1f}%",
+            "Yes" if res['perfect'] else "No"))
+
+    print("\n===== BACKTEST: PER SEASON =====")
+    for s in season_summary:
+        print(f"{s['season']} Season: {s['weeks']} weeks, {s['games']} games | "
+              f"Top slate {s['top_hit_rate'] * 100:.1f}% | Mean slate {s['mean_hit_rate'] * 100:.1f}% | "
+              f"Perfect weeks: {s['perfect_weeks']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the GA against recorded results in picks.db.")
+    parser.add_argument("--db", default="picks.db", help="database to backtest (default: picks.db)")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="per-week optimizer cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and do not write the cache")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--num-slates", type=int, default=DEFAULT_CONFIG['num_slates'])
+    parser.add_argument("--population-size", type=int, default=DEFAULT_CONFIG['population_size'])
+    parser.add_argument("--generations", type=int, default=DEFAULT_CONFIG['generations'])
+    parser.add_argument("--mutation-rate", type=float, default=DEFAULT_CONFIG['mutation_rate'])
+    parser.add_argument("--underdog-bonus", type=float, default=DEFAULT_CONFIG['underdog_bonus'])
+    parser.add_argument("--seed", type=int, default=DEFAULT_CONFIG['seed'], help="base seed for the per-week streams")
+    parser.add_argument("--snapshot", default=None, metavar="DIR",
+                        help="read settled weeks from this columnar snapshot (live seasons only; see snapshot.py)")
+    args = parser.parse_args()
+
+    config = {
+        'num_slates': args.num_slates,
+        'population_size': args.population_size,
+        'generations': args.generations,
+        'mutation_rate': args.mutation_rate,
+        'underdog_bonus': args.underdog_bonus,
+        'seed': args.seed,
+    }
+
+    conn, cur = db_commands.connect_db(args.db)
+    source, weeks = 'picks', None
+    if args.snapshot:
+        with snapshot.open_snapshot(cur, args.snapshot) as snap:
+            weeks = snapshot.settled_weeks(snap)
+    else:
+        source = db_commands.attach_archives(cur, db_commands.archive_dir(args.db))
+    week_results, season_summary = run_backtest(
+        cur, config, workers=args.workers, cache_dir=None if args.no_cache else args.cache_dir,
+        source=source, weeks=weeks)
+    conn.close()
+
+    if args.json:
+        print(json.dumps({'weeks': week_results, 'seasons': season_summary}, indent=2))
+    else:
+        print_backtest(week_results, season_summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+import argparse
+import contextlib
+import csv
+import json
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+import db_commands
+from nflpick import calculate_adjusted_spread, lookup_team, new_seed, normalize_input
+from optimizers import ENGINES, default_engine, generate_pool_slates, run_optimizer
+
+
+class CLIError(Exception):
+    """A problem with the command's input; reported as JSON on stderr with exit code 1."""
+
+
+def emit(payload):
+    """Writes one machine-readable JSON document to stdout."""
+    json.dump(payload, sys.stdout, indent=2, default=str)
+    sys.stdout.write("\n")
+
+
+def _run_games(cur, week, year, at=None):
+    if at:
+        from lines import snapshot_games
+        return snapshot_games(cur, week, year, at)
+    return db_commands.week_games(cur, week, year)
+
+
+def cmd_generate(conn, cur, args):
+    games = _run_games(cur, args.week, args.year, args.at)
+    if not games:
+        raise CLIError(f"No games entered for Week {args.week}, {args.year}.")
+
+    if args.entries > 1 and not (args.pool_size and args.pool_size > 1):
+        raise CLIError("--entries needs --pool-size greater than 1")
+    seed = args.seed if args.seed is not None else new_seed()
+    params = {'engine': args.engine or default_engine(len(games)), 'pool_size': args.pool_size,
+              'num_slates': args.num_slates, 'entries': args.entries}
+    start = time.perf_counter()
+    method, slates = run_optimizer(games, rng=seed, **params)
+    duration_ms = (time.perf_counter() - start) * 1000
+
+    manifest_id = db_commands.save_run_manifest(cur, args.week, args.year, 'generate', method, seed,
+                                                dict(params, at=args.at), games, duration_ms)
+    db_commands.clear_generated_slates(cur, args.week, args.year)
+    db_commands.save_generated_slates(cur, args.week, args.year, method, games, slates, manifest_id=manifest_id)
+    conn.commit()
+    return {'week': args.week, 'year': args.year, 'method': method, 'manifest_id': manifest_id, 'seed': seed,
+            'slates': db_commands.fetch_generated_slates(cur, args.week, args.year)}
+
+
+def cmd_replay(conn, cur, args):
+    """
+    Reruns a recorded optimizer run with its seed and settings and checks the slates come out
+    bit-identical (same masks and fitness) to the ones it saved, if they are still saved.
+    """
+    manifest = db_commands.fetch_run_manifest(cur, args.manifest)
+    if manifest is None:
+        raise CLIError(f"No run manifest with id {args.manifest}.")
+    params = dict(manifest['params'])
+    games = _run_games(cur, manifest['week'], manifest['year'], params.pop('at', None))
+    if db_commands.input_hash(games, manifest['params']) != manifest['input_hash']:
+        raise CLIError(f"Week {manifest['week']}, {manifest['year']}'s games changed since run {args.manifest}; "
+                       f"it cannot be replayed.")
+
+    start = time.perf_counter()
+    if manifest['command'] == 'generate-pools':
+        results = generate_pool_slates(games, params['pools'], params['num_slates'], rng=manifest['seed'])
+        replayed = [(pool_id, slate) for pool_id, (_, slates) in results.items() for slate in slates]
+    else:
+        _, slates = run_optimizer(games, rng=manifest['seed'], **params)
+        replayed = [(None, slate) for slate in slates]
+    duration_ms = (time.perf_counter() - start) * 1000
+
+    replayed_rows = sorted((pool_id or 0, slate['mask'], slate['fitness']) for pool_id, slate in replayed)
+    stored_rows = sorted((row['pool_id'] or 0, row['pick_mask'], row['fitness']) for row in manifest['slates'])
+    del manifest['slates']
+    return {'manifest': manifest, 'duration_ms': duration_ms, 'replayed_slates': len(replayed_rows),
+            'stored_slates': len(stored_rows),
+            'identical': replayed_rows == stored_rows if stored_rows else None}
+
+
+def _pools_by_name(cur, names):
+    pools = db_commands.fetch_pools(cur, names)
+    missing = set(names or ()) - {pool['name'] for pool in pools}
+    if missing:
+        raise CLIError(f"Unknown pool(s): {', '.join(sorted(missing))}")
+    return pools
+
+
+def cmd_view_slates(conn, cur, args):
+    pool_id = _pools_by_name(cur, [args.pool])[0]['id'] if args.pool else None
+    return {'week': args.week, 'year': args.year, 'pool': args.pool,
+            'slates': db_commands.fetch_generated_slates(cur, args.week, args.year, args.limit, pool_id=pool_id)}
+
+
+def cmd_pool_add(conn, cur, args):
+    entrants = [name.strip() for name in args.entrants.split(',') if name.strip()] if args.entrants else None
+    pool_id = db_commands.add_pool(cur, args.name, args.size, args.bonus, args.entries, entrants)
+    conn.commit()
+    return {'pool': next(pool for pool in db_commands.fetch_pools(cur) if pool['id'] == pool_id)}
+
+
+def cmd_pools(conn, cur, args):
+    return {'pools': db_commands.fetch_pools(cur)}
+
+
+def cmd_generate_pools(conn, cur, args):
+    """Generates and saves slates for every pool (or --pools) from one batched run over the week's games."""
+    games = db_commands.week_games(cur, args.week, args.year)
+    if not games:
+        raise CLIError(f"No games entered for Week {args.week}, {args.year}.")
+    pools = _pools_by_name(cur, args.pools.split(',') if args.pools else None)
+    if not pools:
+        raise CLIError("No pools defined; add one with pool-add.")
+
+    seed = args.seed if args.seed is not None else new_seed()
+    start = time.perf_counter()
+    results = generate_pool_slates(games, pools, args.num_slates, rng=seed)
+    duration_ms = (time.perf_counter() - start) * 1000
+
+    manifest_id = db_commands.save_run_manifest(cur, args.week, args.year, 'generate-pools', None, seed,
+                                                {'pools': pools, 'num_slates': args.num_slates}, games, duration_ms)
+    output = []
+    for pool in pools:
+        method, slates = results[pool['id']]
+        db_commands.clear_generated_slates(cur, args.week, args.year, pool_id=pool['id'])
+        db_commands.save_generated_slates(cur, args.week, args.year, method, games, slates, pool_id=pool['id'],
+                                          manifest_id=manifest_id)
+        output.append({'pool': pool['name'], 'method': method,
+                       'slates': db_commands.fetch_generated_slates(cur, args.week, args.year, pool_id=pool['id'])})
+    conn.commit()
+    return {'week': args.week, 'year': args.year, 'manifest_id': manifest_id, 'seed': seed, 'pools': output}
+
+
+def cmd_frontier(conn, cur, args):
+    """The week's risk frontier, or with --underdogs the saved slate for that risk level."""
+    if not db_commands.week_games(cur, args.week, args.year):
+        raise CLIError(f"No games entered for Week {args.week}, {args.year}.")
+    result = db_commands.load_frontier(cur, args.week, args.year, args.underdogs, args.refresh)
+    conn.commit()
+    if args.underdogs is None:
+        return {'week': args.week, 'year': args.year, 'frontier': result}
+    if result is None:
+        raise CLIError("--underdogs must be between 0 and the number of games")
+    return {'week': args.week, 'year': args.year, 'slate': result}
+
+
+def cmd_stats(conn, cur, args):
+    source = db_commands.attach_archives(cur, db_commands.archive_dir(args.db))
+    return {'stats': db_commands.performance_stats(cur, source)}
+
+
+def cmd_backup(conn, cur, args):
+    dest_name = args.dest or f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{args.db.replace('/', '_')}"
+    dest = sqlite3.connect(dest_name)
+    try:
+        # Online backup API: consistent copy without closing the source connection.
+        conn.backup(dest)
+    finally:
+        dest.close()
+    return {'backup': dest_name}
+
+
+def _flag(value, choices=('yes', 'no')):
+    value = normalize_input(str(value or '').strip()) or None
+    if value is not None and value not in choices:
+        raise ValueError(value)
+    return value
+
+
+def cmd_maintain(conn, cur, args):
+    return {'maintenance': db_commands.maintain_database(conn, cur, full_vacuum=args.full)}
+
+
+def cmd_import(conn, cur, args):
+    """Imports games from a CSV with week,favorite,underdog,spread and optional condition columns."""
+    imported = []
+    skipped = []
+    teams_by_week = {}
+    with open(args.file, newline='') as f:
+        for line_num, row in enumerate(csv.DictReader(f), 2):
+            try:
+                week = int(row['week'])
+                year = int(row.get('year') or args.year)
+                favorite = lookup_team(row['favorite'])
+                underdog = lookup_team(row['underdog'])
+                spread = float(row['spread'])
+                home_team = _flag(row.get('home'), ('favorite', 'underdog')) or 'favorite'
+                prime_time = _flag(row.get('prime_time')) == 'yes'
+                rest_advantage = _flag(row.get('rest'), ('favorite', 'underdog', 'neither', 'no')) or 'neither'
+                fav_streak = _flag(row.get('fav_streak')) == 'yes'
+                dog_streak = _flag(row.get('dog_streak')) == 'yes'
+            except (KeyError, TypeError, ValueError) as e:
+                skipped.append({'line': line_num, 'reason': f"invalid value: {e}"})
+                continue
+            if not favorite or not underdog or favorite == underdog or spread < 0:
+                skipped.append({'line': line_num, 'reason': "invalid teams or spread"})
+                continue
+
+            key = (week, year)
+            if key not in teams_by_week:
+                cur.execute("SELECT favorite, underdog FROM picks WHERE week = ? AND year = ?", key)
+                teams_by_week[key] = {team for r in cur.fetchall() for team in (r['favorite'], r['underdog'])}
+            if favorite in teams_by_week[key] or underdog in teams_by_week[key]:
+                skipped.append({'line': line_num, 'reason': "team already picked this week"})
+                continue
+
+            adjusted_spread, fired = calculate_adjusted_spread(
+                favorite, underdog, spread, home_team=home_team, prime_time=prime_time,
+                rest_advantage='neither' if rest_advantage == 'no' else rest_advantage,
+                fav_streak=fav_streak, dog_streak=dog_streak)
+            game_id = db_commands.add_game(cur, week, year, favorite, underdog, spread, adjusted_spread,
+                                           adjustments=fired)
+            teams_by_week[key].update((favorite, underdog))
+            imported.append({'id': game_id, 'week': week, 'year': year, 'favorite': favorite,
+                             'underdog': underdog, 'adjusted_spread': adjusted_spread})
+    conn.commit()
+    return {'imported': imported, 'skipped': skipped}
+
+
+def cmd_settle(conn, cur, args):
+    """Records results from --id/--winner or a CSV with id,winner columns."""
+    if args.file:
+        with open(args.file, newline='') as f:
+            results = [(row['id'], row['winner']) for row in csv.DictReader(f)]
+    elif args.id is not None and args.winner:
+        results = [(args.id, args.winner)]
+    else:
+        raise CLIError("settle needs --id and --winner, or --file")
+
+    settled = []
+    errors = []
+    for pick_id, winner_input in results:
+        row = cur.execute("SELECT favorite, underdog FROM picks WHERE id = ?", (int(pick_id),)).fetchone()
+        if row is None:
+            errors.append({'id': int(pick_id), 'reason': "no such game"})
+            continue
+        winner = 'TIE' if winner_input.strip().upper() == 'TIE' else lookup_team(winner_input)
+        if winner != 'TIE' and winner not in (row['favorite'], row['underdog']):
+            errors.append({'id': int(pick_id), 'reason': f"'{winner_input}' did not play in this game"})
+            continue
+        correct = db_commands.settle_game(cur, int(pick_id), winner)
+        settled.append({'id': int(pick_id), 'winner': winner, 'correct': correct})
+    conn.commit()
+    return {'settled': settled, 'errors': errors}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Non-interactive NFL pick'em commands (JSON output).")
+    parser.add_argument("--db", default="picks.db", help="database to use (default: picks.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    current_year = datetime.now().year
+
+    p = sub.add_parser("generate", help="generate and save optimized slates for a week")
+    p.add_argument("--week", type=int, required=True)
+    p.add_argument("--year", type=int, default=current_year)
+    p.add_argument("--num-slates", type=int, default=5)
+    p.add_argument("--pool-size", type=int, default=0, help="optimize pool-win chance for this many entrants")
+    p.add_argument("--at", default=None, help="optimize against the line snapshot as of this ISO timestamp")
+    p.add_argument("--engine", choices=sorted(ENGINES), default=None,
+                   help="optimizer engine (default: chosen by week size); with --entries it finds the candidates")
+    p.add_argument("--entries", type=int, default=1,
+                   help="choose this many entries jointly to maximize the chance one finishes first")
+    p.add_argument("--seed", type=int, default=None, help="random seed (default: a fresh one, recorded in the manifest)")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("replay", help="rerun a recorded run from its manifest and check the slates match")
+    p.add_argument("--manifest", type=int, required=True, help="run_manifests id (printed by generate)")
+    p.set_defaults(func=cmd_replay)
+
+    p = sub.add_parser("view-slates", help="print saved slates for a week")
+    p.add_argument("--week", type=int, required=True)
+    p.add_argument("--year", type=int, default=current_year)
+    p.add_argument("--limit", type=int, default=None)
+    p.add_argument("--pool", default=None, help="show this pool's slates (default: the single-pool slates)")
+    p.set_defaults(func=cmd_view_slates)
+
+    p = sub.add_parser("pool-add", help="add a pool (or update its settings) with its entrants")
+    p.add_argument("--name", required=True)
+    p.add_argument("--size", type=int, required=True, help="number of entrants in the pool")
+    p.add_argument("--bonus", type=float, default=0.45, help="underdog_bonus for this pool")
+    p.add_argument("--entries", type=int, default=1, help="entries you submit in this pool")
+    p.add_argument("--entrants", default=None, help="comma-separated entrant names (default: '<name> #1'..)")
+    p.set_defaults(func=cmd_pool_add)
+
+    p = sub.add_parser("pools", help="list pools and their entrants")
+    p.set_defaults(func=cmd_pools)
+
+    p = sub.add_parser("generate-pools", help="generate and save slates for every pool in one batched run")
+    p.add_argument("--week", type=int, required=True)
+    p.add_argument("--year", type=int, default=current_year)
+    p.add_argument("--num-slates", type=int, default=5)
+    p.add_argument("--pools", default=None, help="comma-separated pool names (default: all)")
+    p.add_argument("--seed", type=int, default=None, help="random seed (default: a fresh one, recorded in the manifest)")
+    p.set_defaults(func=cmd_generate_pools)
+
+    p = sub.add_parser("frontier", help="best slate for every underdog count (saved per week)")
+    p.add_argument("--week", type=int, required=True)
+    p.add_argument("--year", type=int, default=current_year)
+    p.add_argument("--underdogs", type=int, default=None, help="only the slate with this many underdogs")
+    p.add_argument("--refresh", action="store_true", help="recompute even if a frontier is saved")
+    p.set_defaults(func=cmd_frontier)
+
+    p = sub.add_parser("stats", help="performance analysis")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("backup", help="online backup of the database")
+    p.add_argument("--dest", default=None, help="backup file (default: backup_<timestamp>_<db>)")
+    p.set_defaults(func=cmd_backup)
+
+    p = sub.add_parser("maintain", help="dedupe week rows, ANALYZE, vacuum and integrity-check the database")
+    p.add_argument("--full", action="store_true", help="full VACUUM even when incremental auto-vacuum is on")
+    p.set_defaults(func=cmd_maintain)
+
+    p = sub.add_parser("import", help="import games from a CSV file")
+    p.add_argument("--file", required=True,
+                   help="CSV columns: week,[year],favorite,underdog,spread,[home],[prime_time],[rest],[fav_streak],[dog_streak]")
+    p.add_argument("--year", type=int, default=current_year, help="year for rows without one")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("settle", help="record game results")
+    p.add_argument("--id", type=int, default=None)
+    p.add_argument("--winner", default=None, help="winning team, or TIE")
+    p.add_argument("--file", default=None, help="CSV with id,winner columns")
+    p.set_defaults(func=cmd_settle)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Schema migration messages go to stderr so stdout stays one JSON document.
+    with contextlib.redirect_stdout(sys.stderr):
+        conn, cur = db_commands.connect_db(args.db)
+    try:
+        emit(args.func(conn, cur, args))
+    except (CLIError, OSError, KeyError, ValueError) as e:
+        json.dump({'error': str(e), 'command': args.command}, sys.stderr)
+        sys.stderr.write("\n")
+        return 1
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
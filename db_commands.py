@@ -1,11 +1,42 @@
+import glob
+import hashlib
+import json
+import os
 import sqlite3
+import sys
 from datetime import datetime
 
+import profiling
+from nflpick import mask_picks, risk_frontier, slate_mask
+
+# Bump whenever connect_db's schema or migrations change. Databases already stamped with
+# this version (PRAGMA user_version) skip the table checks and migrations on connect.
+SCHEMA_VERSION = 9
+
+# generated_slates.method of a week's risk frontier (best slate per underdog count).
+FRONTIER_METHOD = 'FRONTIER'
+# generated_slates.method prefix of the week's confidence-points entry (CONFIDENCE, CONFIDENCE-POOL).
+CONFIDENCE_METHOD = 'CONFIDENCE'
+
+# Completed seasons moved out of the live database by archive.py, one file per season, kept
+# in archive/<database name>/ next to the database so each database only sees its own.
+ARCHIVE_DIR = "archive"
+ARCHIVE_FILE = "picks_{season}.db"
+# SQLite allows 10 attached databases by default; attach_archives keeps two of them free
+# (one for its own overflow copying, one for callers such as archive.py).
+MAX_ATTACHED_ARCHIVES = 8
+
+# The pick fields shared by the live and archived 'picks' tables (see attach_archives).
+PICK_COLUMNS = "id, date, week, year, favorite, underdog, spread, adjusted_spread, pick, winner, correct"
+
 def connect_db(db_name="picks.db"):
     """Connect to the database, ensure schema is up-to-date, and return connection and cursor."""
     conn = sqlite3.connect(db_name)
     conn.row_factory = sqlite3.Row 
-    cur = conn.cursor()
+    cur = conn.cursor(profiling.ProfiledCursor) if profiling.ENABLED else conn.cursor()
+
+    if cur.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+        return conn, cur
 
 
     cur.execute("""
@@ -20,7 +51,8 @@ def connect_db(db_name="picks.db"):
                 adjusted_spread REAL,
                 pick TEXT,
                 winner TEXT,
-                correct INTEGER
+                correct INTEGER,
+                change_seq INTEGER
                 )
                 """)
     
@@ -29,7 +61,9 @@ def connect_db(db_name="picks.db"):
                 id INTEGER PRIMARY KEY,
                 week INTEGER,
                 year INTEGER,
-                score INTEGER
+                score INTEGER,
+                over_under REAL,
+                actual INTEGER
                 )
                 """)
     cur.execute("""
@@ -60,6 +94,16 @@ def connect_db(db_name="picks.db"):
         print("Column added and backfilled.")
 
 
+    cur.execute("PRAGMA table_info(weekly_scores)")
+    score_columns = [row['name'] for row in cur.fetchall()]
+
+    if 'over_under' not in score_columns:
+        print("Adding 'over_under' and 'actual' columns to 'weekly_scores'...")
+        cur.execute("ALTER TABLE weekly_scores ADD COLUMN over_under REAL")
+        cur.execute("ALTER TABLE weekly_scores ADD COLUMN actual INTEGER")
+        conn.commit()
+        print("Columns added.")
+
     cur.execute("""
                 UPDATE picks 
                 SET year = CAST(strftime('%Y', date) AS INTEGER) 
@@ -78,6 +122,8 @@ def connect_db(db_name="picks.db"):
                 FOREIGN KEY (pick_id) REFERENCES picks (id)
                 )
                 """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_adjustment_tracking_pick ON adjustment_tracking (pick_id)")
+
 
     cur.execute("""
                 CREATE TABLE IF NOT EXISTS generated_slates (
@@ -88,10 +134,94 @@ def connect_db(db_name="picks.db"):
                 fitness REAL,
                 overall_prob REAL,
                 underdog_count INTEGER,
+                expected_correct REAL,
+                correct_dist TEXT,
+                tail_probs TEXT,
+                pick_mask INTEGER,
+                game_count INTEGER,
+                pool_id INTEGER,
+                entrant_id INTEGER,
+                manifest_id INTEGER,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
                 """)
+
+    cur.execute("PRAGMA table_info(generated_slates)")
+    slate_columns = [row['name'] for row in cur.fetchall()]
+
+    if 'expected_correct' not in slate_columns:
+        print("Adding score distribution columns to 'generated_slates'...")
+        cur.execute("ALTER TABLE generated_slates ADD COLUMN expected_correct REAL")
+        cur.execute("ALTER TABLE generated_slates ADD COLUMN correct_dist TEXT")
+        cur.execute("ALTER TABLE generated_slates ADD COLUMN tail_probs TEXT")
+        conn.commit()
+        print("Columns added.")
+
+    if 'pick_mask' not in slate_columns:
+        print("Adding compact slate columns to 'generated_slates'...")
+        cur.execute("ALTER TABLE generated_slates ADD COLUMN pick_mask INTEGER")
+        cur.execute("ALTER TABLE generated_slates ADD COLUMN game_count INTEGER")
+        conn.commit()
+        print("Columns added.")
     
+    if 'pool_id' not in slate_columns:
+        print("Adding pool columns to 'generated_slates'...")
+        cur.execute("ALTER TABLE generated_slates ADD COLUMN pool_id INTEGER")
+        cur.execute("ALTER TABLE generated_slates ADD COLUMN entrant_id INTEGER")
+        conn.commit()
+        print("Columns added.")
+
+    if 'manifest_id' not in slate_columns:
+        print("Adding 'manifest_id' column to 'generated_slates'...")
+        cur.execute("ALTER TABLE generated_slates ADD COLUMN manifest_id INTEGER")
+        conn.commit()
+        print("Column added.")
+
+    # One row per optimizer run: everything needed to replay it (see cli.py replay).
+    cur.execute("""
+                CREATE TABLE IF NOT EXISTS run_manifests (
+                id INTEGER PRIMARY KEY,
+                week INTEGER,
+                year INTEGER,
+                command TEXT,
+                method TEXT,
+                seed INTEGER,
+                params TEXT,
+                input_hash TEXT,
+                duration_ms REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """)
+
+    # Serves the week listings (per pool) and the frontier's lookup by underdog count.
+    cur.execute("DROP INDEX IF EXISTS idx_generated_slates_week")
+    cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_generated_slates_pool
+                ON generated_slates (year, week, pool_id, method, underdog_count)
+                """)
+
+    # Pools share the week's games; each keeps its own settings and entrants, and its slates
+    # carry its pool_id (NULL for the default single-pool slates).
+    cur.execute("""
+                CREATE TABLE IF NOT EXISTS pools (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL,
+                pool_size INTEGER,
+                underdog_bonus REAL DEFAULT 0.45,
+                entries INTEGER DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """)
+    cur.execute("""
+                CREATE TABLE IF NOT EXISTS entrants (
+                id INTEGER PRIMARY KEY,
+                pool_id INTEGER NOT NULL,
+                name TEXT,
+                UNIQUE (pool_id, name),
+                FOREIGN KEY (pool_id) REFERENCES pools (id) ON DELETE CASCADE
+                )
+                """)
+
     cur.execute("""
                 CREATE TABLE IF NOT EXISTS slate_picks (
                 id INTEGER PRIMARY KEY,
@@ -101,13 +231,375 @@ def connect_db(db_name="picks.db"):
                 favorite TEXT,
                 underdog TEXT,
                 spread REAL,
+                confidence INTEGER,
                 FOREIGN KEY (slate_id) REFERENCES generated_slates (id) ON DELETE CASCADE
                 )
                 """)
-    
+
+    cur.execute("PRAGMA table_info(slate_picks)")
+    slate_pick_columns = [row['name'] for row in cur.fetchall()]
+
+    if 'confidence' not in slate_pick_columns:
+        print("Adding 'confidence' column to 'slate_picks'...")
+        cur.execute("ALTER TABLE slate_picks ADD COLUMN confidence INTEGER")
+        conn.commit()
+        print("Column added.")
+
+    # Line history: one row per observed line, so movement is kept instead of overwritten.
+    cur.execute("""
+                CREATE TABLE IF NOT EXISTS line_snapshots (
+                id INTEGER PRIMARY KEY,
+                year INTEGER,
+                week INTEGER,
+                favorite TEXT,
+                underdog TEXT,
+                captured_at TEXT,
+                spread REAL,
+                source TEXT
+                )
+                """)
+    # Serves both "latest line per game" and "line at time T" (game prefix, then time);
+    # unique so re-ingesting the same odds file adds nothing.
+    cur.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_line_snapshots_game_time
+                ON line_snapshots (year, week, favorite, underdog, captured_at, source)
+                """)
+
+    # Change watermark for the columnar snapshot (snapshot.py): every insert or update of a
+    # pick stamps it with the next sequence number; deletes only record that one happened,
+    # which tells the snapshot to rebuild instead of refreshing incrementally.
+    if 'change_seq' not in columns:
+        print("Adding 'change_seq' column to the database...")
+        cur.execute("ALTER TABLE picks ADD COLUMN change_seq INTEGER")
+        conn.commit()
+        print("Column added.")
+    cur.execute("""
+                CREATE TABLE IF NOT EXISTS change_log (
+                name TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL DEFAULT 0,
+                last_delete INTEGER NOT NULL DEFAULT 0
+                )
+                """)
+    cur.execute("INSERT OR IGNORE INTO change_log (name) VALUES ('picks')")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_picks_change_seq ON picks (change_seq)")
+    stamp = """
+                UPDATE change_log SET seq = seq + 1 WHERE name = 'picks';
+                UPDATE picks SET change_seq = (SELECT seq FROM change_log WHERE name = 'picks')
+                WHERE id = NEW.id;
+    """
+    cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS picks_change_insert AFTER INSERT ON picks
+                BEGIN {stamp} END
+                """)
+    cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS picks_change_update
+                AFTER UPDATE OF date, week, year, favorite, underdog, spread, adjusted_spread,
+                                pick, winner, correct ON picks
+                BEGIN {stamp} END
+                """)
+    cur.execute("""
+                CREATE TRIGGER IF NOT EXISTS picks_change_delete AFTER DELETE ON picks
+                BEGIN
+                UPDATE change_log SET seq = seq + 1, last_delete = seq + 1 WHERE name = 'picks';
+                END
+                """)
+
+    # One weekly_scores / non_winners row per week, so nfl_main's writes are upserts on
+    # (year, week); duplicates left by the old INSERT OR REPLACE go first.
+    removed = dedupe_week_tables(cur)
+    for table, count in removed.items():
+        if count:
+            print(f"Removed {count} duplicate rows from '{table}'.")
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_weekly_scores_week ON weekly_scores (year, week)")
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_non_winners_week ON non_winners (year, week)")
+
+    cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     conn.commit()
     return conn, cur
 
+# Week-keyed tables, with the columns an older duplicate row may hold that the newest lacks
+# (a tiebreaker result recorded before the prediction was re-entered).
+WEEK_KEYED_TABLES = {'weekly_scores': ('actual',), 'non_winners': ()}
+
+def dedupe_week_tables(cur):
+    """
+    Removes duplicate weekly_scores and non_winners rows per (year, week), keeping the newest
+    (highest id) after carrying over any value it lacks from the older rows.
+    Returns {table: rows removed}.
+    """
+    removed = {}
+    for table, carried in WEEK_KEYED_TABLES.items():
+        newest = f"SELECT MAX(id) FROM {table} WHERE year IS NOT NULL AND week IS NOT NULL GROUP BY year, week"
+        for column in carried:
+            cur.execute(f"""
+                UPDATE {table} SET {column} = (
+                    SELECT d.{column} FROM {table} d
+                    WHERE d.year = {table}.year AND d.week = {table}.week AND d.{column} IS NOT NULL
+                    ORDER BY d.id DESC LIMIT 1)
+                WHERE {column} IS NULL AND id IN ({newest})
+            """)
+        cur.execute(f"DELETE FROM {table} WHERE year IS NOT NULL AND week IS NOT NULL AND id NOT IN ({newest})")
+        removed[table] = cur.rowcount
+    return removed
+
+def add_game(cur, week, year, favorite, underdog, spread, adjusted_spread, pick=None, adjustments=None):
+    """
+    Inserts one game into 'picks' (dated today) and returns its id. The caller commits.
+    'adjustments' is the fired list from calculate_adjusted_spread; each entry is recorded
+    in 'adjustment_tracking' so its efficacy can be measured once the game is settled.
+    """
+    cur.execute("""
+        INSERT INTO picks (date, week, year, favorite, underdog, spread, adjusted_spread, pick)
+        VALUES (date('now', 'localtime'), ?, ?, ?, ?, ?, ?, ?)
+    """, (week, year, favorite, underdog, spread, adjusted_spread, pick))
+    pick_id = cur.lastrowid
+    if adjustments:
+        cur.executemany("""
+            INSERT INTO adjustment_tracking (pick_id, adjustment_type, original_spread, adjusted_spread)
+            VALUES (?, ?, ?, ?)
+        """, [(pick_id, adjustment_type, before, after) for adjustment_type, before, after in adjustments])
+    return pick_id
+
+def settle_game(cur, pick_id, winner):
+    """
+    Records a game's result ('TIE' for a tie) and whether the pick was correct.
+    Also backfills each tracked adjustment's was_correct: 1 if it moved the line toward
+    the actual winner, 0 if away, NULL for ties or adjustments that did not move the line.
+    Returns the correct flag, or None if no game has that id. The caller commits.
+    """
+    row = cur.execute("SELECT pick, favorite FROM picks WHERE id = ?", (pick_id,)).fetchone()
+    if row is None:
+        return None
+    correct = 1 if winner != 'TIE' and winner == row['pick'] else 0
+    cur.execute("UPDATE picks SET winner = ?, correct = ? WHERE id = ?", (winner, correct, pick_id))
+    cur.execute("""
+        UPDATE adjustment_tracking
+        SET was_correct = CASE
+            WHEN ? = 'TIE' OR adjusted_spread = original_spread THEN NULL
+            WHEN (adjusted_spread > original_spread) = (? = ?) THEN 1
+            ELSE 0 END
+        WHERE pick_id = ?
+    """, (winner, winner, row['favorite'], pick_id))
+    return correct
+
+def week_games(cur, week, year):
+    """The week's games in entry order, shaped for the optimizers (spread = adjusted spread)."""
+    cur.execute("SELECT favorite, underdog, adjusted_spread as spread FROM picks WHERE week = ? AND year = ? ORDER BY id", (week, year))
+    return [dict(row) for row in cur.fetchall()]
+
+def _method_filter(frontier=False, confidence=False):
+    """SQL condition on generated_slates.method, with its parameters: the risk frontier, the
+    confidence entry, or by default the optimizer slates (neither of those)."""
+    if frontier:
+        return "method = ?", (FRONTIER_METHOD,)
+    if confidence:
+        return "method LIKE ?", (CONFIDENCE_METHOD + '%',)
+    return "method != ? AND method NOT LIKE ?", (FRONTIER_METHOD, CONFIDENCE_METHOD + '%')
+
+def clear_generated_slates(cur, week, year, frontier=False, pool_id=None, confidence=False):
+    """
+    Deletes the week's optimizer slates for one pool (the default slates if pool_id is None),
+    or with frontier=True its risk frontier, or with confidence=True its confidence entry,
+    and their picks. Returns the number of slates removed.
+    """
+    method_condition, method_params = _method_filter(frontier, confidence)
+    condition = "pool_id IS ? AND " + method_condition
+    params = (year, week, pool_id) + method_params
+    cur.execute(f"""
+        DELETE FROM slate_picks 
+        WHERE slate_id IN (SELECT id FROM generated_slates WHERE year = ? AND week = ? AND {condition})
+    """, params)
+    return cur.execute(f"DELETE FROM generated_slates WHERE year = ? AND week = ? AND {condition}", params).rowcount
+
+def input_hash(games, params):
+    """SHA-256 of an optimizer run's inputs: the games (teams and spread, in order) and its settings."""
+    payload = {
+        'games': [[g['favorite'], g['underdog'], g['spread']] for g in games],
+        'config': params
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def save_run_manifest(cur, week, year, command, method, seed, params, games, duration_ms):
+    """Records one optimizer run (seed, settings, input hash, duration). Returns its id. The caller commits."""
+    cur.execute("""
+        INSERT INTO run_manifests (week, year, command, method, seed, params, input_hash, duration_ms)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (week, year, command, method, seed, json.dumps(params, sort_keys=True), input_hash(games, params), duration_ms))
+    return cur.lastrowid
+
+def fetch_run_manifest(cur, manifest_id):
+    """
+    A run manifest as a dict with decoded 'params', plus the slates it saved as 'slates'
+    ({'pool_id', 'pick_mask', 'fitness'} in save order). None if there is no such run.
+    """
+    row = cur.execute("SELECT * FROM run_manifests WHERE id = ?", (manifest_id,)).fetchone()
+    if row is None:
+        return None
+    manifest = dict(row)
+    manifest['params'] = json.loads(manifest['params'])
+    manifest['slates'] = [dict(r) for r in cur.execute(
+        "SELECT pool_id, pick_mask, fitness FROM generated_slates WHERE manifest_id = ? ORDER BY id",
+        (manifest_id,)).fetchall()]
+    return manifest
+
+def save_generated_slates(cur, week, year, method, games, slates, compact=True, pool_id=None, manifest_id=None):
+    """
+    Saves optimizer slates to the database. The caller commits.
+    Each slate stores its bitmask over 'games' (the week's games in entry order) in
+    'pick_mask'; with compact=False one slate_picks row per game is written as well, carrying
+    slate['confidence'] (points per game, in game order) if set.
+    Slates belong to 'pool_id' (None for the default slates) and to slate['entrant_id'] if set,
+    and link to the run manifest that produced them.
+    """
+    slate_ids = []
+    picks_rows = []
+    for slate in slates:
+        mask = slate['mask'] if 'mask' in slate else slate_mask(games, slate['picks'])
+        cur.execute("""
+            INSERT INTO generated_slates (week, year, method, fitness, overall_prob, underdog_count,
+                                          expected_correct, correct_dist, tail_probs, pick_mask, game_count,
+                                          pool_id, entrant_id, manifest_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (week, year, method, slate['fitness'], slate['overall_prob'], slate['underdog_count'],
+              slate.get('expected_correct'),
+              json.dumps(slate['correct_dist']) if 'correct_dist' in slate else None,
+              json.dumps(slate['tail_probs']) if 'tail_probs' in slate else None,
+              mask, len(games), pool_id, slate.get('entrant_id'), manifest_id))
+        slate_id = cur.lastrowid
+        slate_ids.append(slate_id)
+
+        if not compact:
+            confidence = slate.get('confidence') or [None] * len(games)
+            picks_rows.extend((slate_id, i + 1, pick, game['favorite'], game['underdog'], game['spread'], rank)
+                              for i, (pick, game, rank) in enumerate(zip(mask_picks(games, mask), games, confidence)))
+
+    if picks_rows:
+        cur.executemany("""
+            INSERT INTO slate_picks (slate_id, pick_order, team_pick, favorite, underdog, spread, confidence)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, picks_rows)
+    return slate_ids
+
+def save_frontier(cur, week, year, games, underdog_bonus=0.45):
+    """Recomputes and stores the week's risk frontier (risk_frontier) as one group. The caller commits."""
+    clear_generated_slates(cur, week, year, frontier=True)
+    return save_generated_slates(cur, week, year, FRONTIER_METHOD, games, risk_frontier(games, underdog_bonus))
+
+def add_pool(cur, name, pool_size, underdog_bonus=0.45, entries=1, entrant_names=None):
+    """
+    Adds a pool and its entrants ('entrant_names', or '<name> #1'.. for each entry), or updates
+    an existing pool's settings. Returns the pool id. The caller commits.
+    """
+    entrant_names = list(entrant_names or [f"{name} #{i}" for i in range(1, entries + 1)])
+    cur.execute("""
+        INSERT INTO pools (name, pool_size, underdog_bonus, entries) VALUES (?, ?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET pool_size = excluded.pool_size,
+            underdog_bonus = excluded.underdog_bonus, entries = excluded.entries
+    """, (name, pool_size, underdog_bonus, len(entrant_names)))
+    pool_id = cur.execute("SELECT id FROM pools WHERE name = ?", (name,)).fetchone()['id']
+    cur.executemany("INSERT OR IGNORE INTO entrants (pool_id, name) VALUES (?, ?)",
+                    [(pool_id, entrant) for entrant in entrant_names])
+    return pool_id
+
+def fetch_pools(cur, names=None):
+    """Pools as dicts (by name), each with its 'entrants' as [{'id', 'name'}] in entry order."""
+    pools = {}
+    for row in cur.execute("""
+        SELECT p.*, e.id AS entrant_id, e.name AS entrant_name
+        FROM pools p LEFT JOIN entrants e ON e.pool_id = p.id
+        ORDER BY p.name, e.id
+    """).fetchall():
+        if names and row['name'] not in names:
+            continue
+        pool = pools.get(row['id'])
+        if pool is None:
+            pool = pools[row['id']] = {key: row[key] for key in ('id', 'name', 'pool_size', 'underdog_bonus', 'entries')}
+            pool['entrants'] = []
+        if row['entrant_id'] is not None:
+            pool['entrants'].append({'id': row['entrant_id'], 'name': row['entrant_name']})
+    return list(pools.values())
+
+def delete_compact_slates(cur, week, year):
+    """
+    Removes the week's bitmask slates. Their bits index the week's games in entry order,
+    so they are dropped whenever one of those games is deleted.
+    """
+    cur.execute("""
+        DELETE FROM slate_picks
+        WHERE slate_id IN (SELECT id FROM generated_slates WHERE week = ? AND year = ? AND pick_mask IS NOT NULL)
+    """, (week, year))
+    return cur.execute("DELETE FROM generated_slates WHERE week = ? AND year = ? AND pick_mask IS NOT NULL",
+                       (week, year)).rowcount
+
+def fetch_generated_slates(cur, week, year, limit=None, frontier=False, pool_id=None):
+    """
+    Saved slates for a week as plain dicts (best fitness first), each with its ordered 'picks'.
+    Bitmask slates are expanded against the week's games; others read their slate_picks rows.
+    With frontier=True, the week's risk frontier instead, fewest underdogs first. The confidence
+    entry (scored in points, not fitness) is never listed. 'pool_id' selects one pool's slates (None for the default slates).
+    """
+    method_condition, method_params = _method_filter(frontier)
+    query = (f"SELECT * FROM generated_slates WHERE year = ? AND week = ? AND pool_id IS ? AND {method_condition}"
+             + (" ORDER BY underdog_count" if frontier else " ORDER BY fitness DESC, id"))
+    params = (year, week, pool_id) + method_params
+    if limit:
+        query += " LIMIT ?"
+        params += (limit,)
+    return _expand_slates(cur, week, year, cur.execute(query, params).fetchall())
+
+def fetch_frontier_slate(cur, week, year, underdog_count):
+    """The saved frontier slate with exactly 'underdog_count' underdogs, or None."""
+    rows = cur.execute("""
+        SELECT * FROM generated_slates
+        WHERE year = ? AND week = ? AND pool_id IS NULL AND method = ? AND underdog_count = ?
+    """, (year, week, FRONTIER_METHOD, underdog_count)).fetchall()
+    slates = _expand_slates(cur, week, year, rows)
+    return slates[0] if slates else None
+
+def load_frontier(cur, week, year, underdog_count=None, refresh=False):
+    """
+    The week's saved risk frontier, or just its slate with 'underdog_count' underdogs
+    (None if out of range). The frontier is computed and saved first when it is missing,
+    was built for a different number of games, or refresh=True. The caller commits.
+    """
+    games = week_games(cur, week, year)
+    if underdog_count is not None and not 0 <= underdog_count <= len(games):
+        return None
+    if underdog_count is None:
+        saved = fetch_generated_slates(cur, week, year, frontier=True)
+        stale = len(saved) != len(games) + 1
+    else:
+        saved = fetch_frontier_slate(cur, week, year, underdog_count)
+        stale = saved is None or saved['game_count'] != len(games)
+    if not (refresh or stale) or not games:
+        return saved
+    save_frontier(cur, week, year, games)
+    if underdog_count is None:
+        return fetch_generated_slates(cur, week, year, frontier=True)
+    return fetch_frontier_slate(cur, week, year, underdog_count)
+
+def _expand_slates(cur, week, year, rows):
+    games = None
+    slates = []
+    for row in rows:
+        slate = dict(row)
+        for column in ('correct_dist', 'tail_probs'):
+            if slate.get(column) is not None:
+                slate[column] = json.loads(slate[column])
+        if slate.get('pick_mask') is not None:
+            if games is None:
+                games = week_games(cur, week, year)
+            slate_games = games[:slate['game_count']]
+            slate['picks'] = [{'slate_id': row['id'], 'pick_order': i + 1, 'team_pick': pick,
+                               'favorite': game['favorite'], 'underdog': game['underdog'],
+                               'spread': game['spread'], 'confidence': None}
+                              for i, (pick, game) in enumerate(zip(mask_picks(slate_games, slate['pick_mask']), slate_games))]
+        else:
+            slate['picks'] = [dict(pick) for pick in cur.execute(
+                "SELECT * FROM slate_picks WHERE slate_id = ? ORDER BY pick_order", (row['id'],)).fetchall()]
+        slates.append(slate)
+    return slates
+
 def view_picks(conn, cur, filters=None):
     """View picks with optional filters"""
     
@@ -203,10 +695,7 @@ def update_pick(conn, cur, pick_id):
             return
         
         winner = pick['favorite'] if new_winner == "favorite" else pick['underdog']
-        cur.execute("UPDATE picks SET winner = ? WHERE id = ?", (winner, pick_id))
-        
-        correct = 1 if winner == pick['pick'] else 0
-        cur.execute("UPDATE picks SET correct = ? WHERE id = ?", (correct, pick_id))
+        settle_game(cur, pick_id, winner)
     
     elif choice == "7":
         print("Update cancelled.")
@@ -241,8 +730,10 @@ def delete_pick(conn, cur, pick_id):
     
     if confirm == 'y':
         cur.execute("DELETE FROM picks WHERE id = ?", (pick_id,))
+        cur.execute("DELETE FROM adjustment_tracking WHERE pick_id = ?", (pick_id,))
         cur.execute("DELETE FROM slate_picks WHERE favorite = ? AND underdog = ? AND slate_id IN (SELECT id FROM generated_slates WHERE week = ? AND year = ?)", 
                     (pick['favorite'], pick['underdog'], pick['week'], pick['year']))
+        delete_compact_slates(cur, pick['week'], pick['year'])
         conn.commit()
         print("Pick deleted successfully from 'picks' and any associated 'slate_picks'.")
     else:
@@ -265,85 +756,114 @@ def backup_database(conn, db_name="picks.db"):
     
     return connect_db(db_name)
 
-def analyze_performance(cur):
-    """Analyze pick performance by NFL season (not calendar year)"""
-    cur.execute("SELECT COUNT(*), SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) FROM picks WHERE correct IS NOT NULL")
+def archive_dir(db_name="picks.db"):
+    path = os.path.abspath(db_name)
+    return os.path.join(os.path.dirname(path), ARCHIVE_DIR, os.path.splitext(os.path.basename(path))[0])
+
+def attach_archives(cur, directory=ARCHIVE_DIR):
+    """
+    Makes every archived season in 'directory' queryable next to the live picks through the
+    temporary view all_picks. Returns the table to query: 'all_picks', or 'picks' when
+    nothing is archived. Must be called outside a transaction.
+    The newest seasons stay ATTACHed (as season_<year>); past SQLite's limit on attached
+    databases, the older seasons' picks are copied into temp.archived_picks one file at a
+    time instead, leaving attach slots free for the caller.
+    """
+    attached = {row['name'] for row in cur.execute("PRAGMA database_list").fetchall()}
+    paths = {}
+    for path in glob.glob(os.path.join(directory, ARCHIVE_FILE.format(season='*'))):
+        season = os.path.basename(path)[len("picks_"):-len(".db")]
+        if season.isdigit():
+            paths[int(season)] = path
+    if not paths:
+        return 'picks'
+
+    selects = [f"SELECT {PICK_COLUMNS} FROM main.picks"]
+    seasons = sorted(paths, reverse=True)
+    for season in seasons[:MAX_ATTACHED_ARCHIVES]:
+        schema = f"season_{season}"
+        if schema not in attached:
+            cur.execute(f"ATTACH DATABASE ? AS {schema}", (paths[season],))
+        selects.append(f"SELECT {PICK_COLUMNS} FROM {schema}.picks")
+
+    cur.execute("DROP VIEW IF EXISTS temp.all_picks")
+    cur.execute("DROP TABLE IF EXISTS temp.archived_picks")
+    if len(seasons) > MAX_ATTACHED_ARCHIVES:
+        cur.execute(f"CREATE TEMP TABLE archived_picks AS SELECT {PICK_COLUMNS} FROM main.picks WHERE 0")
+        for season in seasons[MAX_ATTACHED_ARCHIVES:]:
+            cur.execute("ATTACH DATABASE ? AS archive_overflow", (paths[season],))
+            try:
+                cur.execute(f"INSERT INTO temp.archived_picks SELECT {PICK_COLUMNS} FROM archive_overflow.picks")
+                cur.connection.commit()
+            finally:
+                cur.execute("DETACH DATABASE archive_overflow")
+        selects.append(f"SELECT {PICK_COLUMNS} FROM temp.archived_picks")
+    cur.execute("CREATE TEMP VIEW all_picks AS " + " UNION ALL ".join(selects))
+    return 'all_picks'
+
+def _record(wins, total):
+    wins = wins if wins is not None else 0
+    return {'wins': wins, 'losses': total - wins, 'total': total,
+            'pct': (wins / total) * 100 if total > 0 else 0}
+
+def performance_stats(cur, source='picks'):
+    """
+    Pick performance as plain data: overall, by spread range, NFL season (not calendar year),
+    week and pick type. Returns None if there are no completed picks.
+    'source' is the table or view to read, e.g. attach_archives' all_picks.
+    """
+    cur.execute(f"SELECT COUNT(*), SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) FROM {source} WHERE correct IS NOT NULL")
     result = cur.fetchone()
-    total = result[0]
-    wins = result[1] if result[1] is not None else 0
-    
-    if total == 0:
-        print("No completed picks found")
-        return
-    
-    win_pct = (wins / total) * 100 if total > 0 else 0
-    
-    print("\n===== PERFORMANCE ANALYSIS =====")
-    print(f"Overall record: {wins}-{total-wins} ({win_pct:.1f}%)")
-    
-    print("\nPerformance by spread range (based on raw spread):")
+    if result[0] == 0:
+        return None
+
+    stats = {'overall': _record(result[1], result[0]), 'spread_ranges': [],
+             'seasons': [], 'weeks': [], 'pick_types': []}
+
     spread_ranges = [(0, 3.5), (3.5, 6.5), (6.5, 9.5), (9.5, 100)]
     
     for low, high in spread_ranges:
-        cur.execute("""
+        cur.execute(f"""
             SELECT COUNT(*), SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END)
-            FROM picks
+            FROM {source}
             WHERE spread >= ? AND spread < ? AND correct IS NOT NULL
         """, (low, high))
         
         range_result = cur.fetchone()
-        range_total = range_result[0]
-        range_wins = range_result[1] if range_result[1] is not None else 0
-
-        if range_total > 0:
-            range_pct = (range_wins / range_total) * 100
-            print(f"Spread {low}-{high}: {range_wins}-{range_total-range_wins} ({range_pct:.1f}%)")
+        if range_result[0] > 0:
+            stats['spread_ranges'].append(dict(_record(range_result[1], range_result[0]), low=low, high=high))
     
-    print("\nPerformance by NFL season:")
-    cur.execute("""
+    cur.execute(f"""
         SELECT 
             CASE 
                 WHEN strftime('%m', date) >= '09'
-                THEN strftime('%Y', date)
-                ELSE (strftime('%Y', date) - 1)
+                THEN CAST(strftime('%Y', date) AS INTEGER)
+                ELSE CAST(strftime('%Y', date) AS INTEGER) - 1
             END as season,
             COUNT(*), 
             SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END)
-        FROM picks
+        FROM {source}
         WHERE correct IS NOT NULL AND date IS NOT NULL
         GROUP BY season
         ORDER BY season DESC
     """)
-    
     for row in cur.fetchall():
-        season = row['season']
-        season_total = row[1]
-        season_wins = row[2] if row[2] is not None else 0
-        
-        season_pct = (season_wins / season_total) * 100
-        print(f"{season} Season: {season_wins}-{season_total-season_wins} ({season_pct:.1f}%)")
+        stats['seasons'].append(dict(_record(row[2], row[1]), season=row['season']))
     
-    print("\nPerformance by week:")
-    cur.execute("""
+    cur.execute(f"""
         SELECT 
             week,
             COUNT(*), 
             SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END)
-        FROM picks
+        FROM {source}
         WHERE correct IS NOT NULL
         GROUP BY week
         ORDER BY week
     """)
-    
     for row in cur.fetchall():
-        week = row['week']
-        week_total = row[1]
-        week_wins = row[2] if row[2] is not None else 0
-        week_pct = (week_wins / week_total) * 100
-        print(f"Week {week}: {week_wins}-{week_total-week_wins} ({week_pct:.1f}%)")
+        stats['weeks'].append(dict(_record(row[2], row[1]), week=row['week']))
     
-    print("\nPerformance by pick type:")
-    cur.execute("""
+    cur.execute(f"""
         SELECT 
             CASE 
                 WHEN pick = favorite THEN 'Favorite'
@@ -352,19 +872,119 @@ def analyze_performance(cur):
             END as pick_type,
             COUNT(*), 
             SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END)
-        FROM picks
+        FROM {source}
         WHERE correct IS NOT NULL AND pick IS NOT NULL
         GROUP BY pick_type
         ORDER BY pick_type
     """)
-    
     for row in cur.fetchall():
-        pick_type = row['pick_type']
-        type_total = row[1]
-        type_wins = row[2] if row[2] is not None else 0
-        
-        type_pct = (type_wins / type_total) * 100
-        print(f"{pick_type}: {type_wins}-{type_total-type_wins} ({type_pct:.1f}%)")
+        stats['pick_types'].append(dict(_record(row[2], row[1]), pick_type=row['pick_type']))
+
+    return stats
+
+def analyze_performance(cur, source='picks'):
+    """Analyze pick performance by NFL season (not calendar year)"""
+    stats = performance_stats(cur, source)
+    
+    if stats is None:
+        print("No completed picks found")
+        return
+    
+    overall = stats['overall']
+    print("\n===== PERFORMANCE ANALYSIS =====")
+    print(f"Overall record: {overall['wins']}-{overall['losses']} ({overall['pct']:.1f}%)")
+    
+    print("\nPerformance by spread range (based on raw spread):")
+    for r in stats['spread_ranges']:
+        print(f"Spread {r['low']}-{r['high']}: {r['wins']}-{r['losses']} ({r['pct']:.1f}%)")
+    
+    print("\nPerformance by NFL season:")
+    for r in stats['seasons']:
+        print(f"{r['season']} Season: {r['wins']}-{r['losses']} ({r['pct']:.1f}%)")
+    
+    print("\nPerformance by week:")
+    for r in stats['weeks']:
+        print(f"Week {r['week']}: {r['wins']}-{r['losses']} ({r['pct']:.1f}%)")
+    
+    print("\nPerformance by pick type:")
+    for r in stats['pick_types']:
+        print(f"{r['pick_type']}: {r['wins']}-{r['losses']} ({r['pct']:.1f}%)")
+
+def record_tiebreaker_result(conn, cur):
+    """Record the actual total points for a week's tiebreaker game (feeds the tiebreaker history)."""
+    cur.execute("SELECT id, week, year, score, over_under, actual FROM weekly_scores ORDER BY year DESC, week DESC")
+    rows = cur.fetchall()
+
+    if not rows:
+        print("No tiebreaker predictions found.")
+        return
+
+    print("\n{:<5} {:<6} {:<6} {:<10} {:<10} {:<10}".format("ID", "Week", "Year", "O/U", "Predicted", "Actual"))
+    print("-" * 50)
+    for row in rows:
+        ou_str = f"{row['over_under']:.1f}" if row['over_under'] is not None else "N/A"
+        actual_str = str(row['actual']) if row['actual'] is not None else "N/A"
+        print("{:<5} {:<6} {:<6} {:<10} {:<10} {:<10}".format(
+            row['id'], row['week'], row['year'], ou_str, row['score'], actual_str))
+
+    score_id = input("\nEnter the ID to record a result for: ")
+    if not score_id.isdigit():
+        print("ID must be a number")
+        return
+    actual = input("Enter the actual total points scored: ")
+    if not actual.isdigit():
+        print("Total must be a whole number")
+        return
+
+    cur.execute("UPDATE weekly_scores SET actual = ? WHERE id = ?", (int(actual), int(score_id)))
+    conn.commit()
+    print("Tiebreaker result recorded" if cur.rowcount else f"No tiebreaker found with ID {score_id}")
+
+def _file_bytes(cur):
+    return cur.execute("PRAGMA page_count").fetchone()[0] * cur.execute("PRAGMA page_size").fetchone()[0]
+
+def maintain_database(conn, cur, full_vacuum=False):
+    """
+    Housekeeping for a long-lived database: removes duplicate week rows and slate picks whose
+    slate is gone, refreshes the query planner's statistics (ANALYZE, PRAGMA optimize),
+    switches the file to incremental auto-vacuum (a one-time full VACUUM) or else releases
+    the free pages incrementally, and runs integrity_check. Returns a report dict.
+    """
+    report = {'size_before': _file_bytes(cur),
+              'free_pages_before': cur.execute("PRAGMA freelist_count").fetchone()[0],
+              'duplicates_removed': dedupe_week_tables(cur)}
+    cur.execute("DELETE FROM slate_picks WHERE slate_id NOT IN (SELECT id FROM generated_slates)")
+    report['orphaned_slate_picks'] = cur.rowcount
+    conn.commit()
+
+    cur.execute("ANALYZE")
+    cur.execute("PRAGMA optimize")
+    conn.commit()
+
+    # auto_vacuum: 0 none, 1 full, 2 incremental. Changing it only takes effect through VACUUM.
+    if full_vacuum or cur.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        cur.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cur.execute("VACUUM")
+        report['vacuum'] = 'full'
+    else:
+        cur.execute("PRAGMA incremental_vacuum").fetchall()
+        report['vacuum'] = 'incremental'
+
+    report['size_after'] = _file_bytes(cur)
+    report['reclaimed_bytes'] = report['size_before'] - report['size_after']
+    report['integrity'] = [row[0] for row in cur.execute("PRAGMA integrity_check").fetchall()]
+    return report
+
+def print_maintenance(report):
+    print("\n===== DATABASE MAINTENANCE =====")
+    for table, count in report['duplicates_removed'].items():
+        print(f"Duplicate rows removed from {table}: {count}")
+    print(f"Orphaned slate picks removed: {report['orphaned_slate_picks']}")
+    print(f"Vacuum: {report['vacuum']} ({report['free_pages_before']} free pages before)")
+    print(f"Size: {report['size_before'] / 1024:.1f} KB -> {report['size_after'] / 1024:.1f} KB "
+          f"({report['reclaimed_bytes'] / 1024:.1f} KB reclaimed)")
+    integrity = report['integrity']
+    print("Integrity check: ok" if integrity == ['ok'] else "Integrity check FAILED:\n  " + "\n  ".join(integrity))
 
 def clean_database(conn, cur):
     """View and clean up problematic database entries"""
@@ -406,6 +1026,7 @@ def clean_database(conn, cur):
         confirm = input("Are you sure you want to delete ALL picks? This cannot be undone. (y/n): ")
         if confirm.lower() == 'y':
             cur.execute("DELETE FROM picks")
+            cur.execute("DELETE FROM adjustment_tracking")
             cur.execute("DELETE FROM generated_slates") 
             cur.execute("DELETE FROM slate_picks") 
             conn.commit()
@@ -419,18 +1040,20 @@ def clean_database(conn, cur):
                 pick = cur.fetchone()
                 if pick:
                     cur.execute("DELETE FROM picks WHERE id = ?", (pick_id,))
+                    cur.execute("DELETE FROM adjustment_tracking WHERE pick_id = ?", (pick_id,))
                     cur.execute("""
                         DELETE FROM slate_picks 
                         WHERE favorite = ? AND underdog = ? 
                         AND slate_id IN (SELECT id FROM generated_slates WHERE week = ? AND year = ?)
                         """, (pick['favorite'], pick['underdog'], pick['week'], pick['year']))
+                    delete_compact_slates(cur, pick['week'], pick['year'])
                 
             conn.commit()
             print(f"Deleted {len(ids_to_delete)} entries from 'picks' and cleaned associated 'slate_picks'.")
             
             cur.execute("""
                 DELETE FROM generated_slates 
-                WHERE id NOT IN (SELECT DISTINCT slate_id FROM slate_picks)
+                WHERE pick_mask IS NULL AND id NOT IN (SELECT DISTINCT slate_id FROM slate_picks)
             """)
             conn.commit()
             print("Cleaned up any slates that are now empty.")
@@ -451,9 +1074,11 @@ def main():
         print("4. Backup database")
         print("5. Analyze performance")
         print("6. Clean database")
-        print("7. Exit")
+        print("7. Record tiebreaker result")
+        print("8. Maintenance (dedupe, analyze, vacuum, integrity check)")
+        print("9. Exit")
         
-        choice = input("\nEnter your choice (1-7): ")
+        choice = input("\nEnter your choice (1-9): ")
         
         if choice == "1":
             filters = {}
@@ -493,12 +1118,18 @@ def main():
             conn, cur = backup_database(conn, db_name)
         
         elif choice == "5":
-            analyze_performance(cur)
+            analyze_performance(cur, attach_archives(cur, archive_dir(db_name)))
         
         elif choice == "6":
             clean_database(conn, cur)
         
         elif choice == "7":
+            record_tiebreaker_result(conn, cur)
+        
+        elif choice == "8":
+            print_maintenance(maintain_database(conn, cur))
+        
+        elif choice == "9":
             print("Exiting...")
             break
         
@@ -508,4 +1139,6 @@ def main():
     conn.close()
 
 if __name__ == "__main__":
+    if "--profile" in sys.argv:
+        profiling.enable()
     main()
\ No newline at end of file
@@ -0,0 +1,234 @@
+import argparse
+import csv
+import json
+import os
+from datetime import datetime, timezone
+
+import db_commands
+from nflpick import lookup_team
+from optimizers import ENGINES, run_optimizer
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_timestamp(value):
+    """Normalizes an ISO-8601 timestamp to 'YYYY-MM-DD HH:MM:SS' (UTC if it carries an offset)."""
+    moment = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.strftime(TIME_FORMAT)
+
+
+def read_snapshot_rows(path, source=None, year=None, stats=None):
+    """
+    Streams line_snapshots rows from an odds CSV with columns
+    week, [year], favorite, underdog, spread, captured_at, [source].
+    Rows with unknown teams or unparseable values are counted in stats['skipped'].
+    """
+    source = source or os.path.basename(path)
+    teams = {}
+    stats = stats if stats is not None else {}
+    stats.setdefault('rows', 0)
+    stats.setdefault('skipped', 0)
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            stats['rows'] += 1
+            try:
+                names = []
+                for column in ('favorite', 'underdog'):
+                    raw = row[column].strip()
+                    if raw not in teams:
+                        teams[raw] = lookup_team(raw)
+                    names.append(teams[raw])
+                record = (int(row.get('year') or year), int(row['week']), names[0], names[1],
+                          parse_timestamp(row['captured_at']), float(row['spread']),
+                          row.get('source') or source)
+            except (KeyError, TypeError, ValueError, AttributeError):
+                stats['skipped'] += 1
+                continue
+            if not names[0] or not names[1] or names[0] == names[1]:
+                stats['skipped'] += 1
+                continue
+            yield record
+
+
+def ingest_files(conn, cur, paths, source=None, year=None):
+    """
+    Bulk-loads odds files into line_snapshots in a single transaction. Each file is fed to
+    executemany as a generator, so rows stream from disk without being held in memory.
+    Returns {path: {'rows', 'skipped', 'inserted'}}; duplicates of stored snapshots are ignored.
+    """
+    year = year or datetime.now().year
+    results = {}
+    try:
+        for path in paths:
+            stats = {}
+            before = conn.total_changes
+            cur.executemany("""
+                INSERT OR IGNORE INTO line_snapshots (year, week, favorite, underdog, captured_at, spread, source)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, read_snapshot_rows(path, source, year, stats))
+            stats['inserted'] = conn.total_changes - before
+            results[path] = stats
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return results
+
+
+def week_lines(cur, week, year, at=None, opening=False):
+    """
+    The latest line per game for a week (the newest at or before 'at' if given), or the
+    opening line with opening=True. Returns {frozenset of both teams: row}, where row has
+    favorite, underdog, spread, captured_at and source as recorded.
+    """
+    # SQLite returns the other columns from the row holding the MAX/MIN, so one indexed
+    # GROUP BY pass finds every game's line.
+    query = f"""
+        SELECT favorite, underdog, spread, {'MIN' if opening else 'MAX'}(captured_at) AS captured_at, source
+        FROM line_snapshots WHERE year = ? AND week = ?
+    """
+    params = [year, week]
+    if at:
+        query += " AND captured_at <= ?"
+        params.append(parse_timestamp(at))
+    query += " GROUP BY favorite, underdog"
+
+    lines = {}
+    for row in cur.execute(query, params).fetchall():
+        key = frozenset((row['favorite'], row['underdog']))
+        # A line that crossed zero is recorded with the teams swapped; keep the right end.
+        current = lines.get(key)
+        if current is None or (row['captured_at'] < current['captured_at'] if opening
+                               else row['captured_at'] > current['captured_at']):
+            lines[key] = dict(row)
+    return lines
+
+
+def line_history(cur, week, year, favorite, underdog):
+    """Every snapshot for one game, oldest first, with the spread oriented to 'favorite'."""
+    cur.execute("""
+        SELECT captured_at, source, CASE WHEN favorite = ? THEN spread ELSE -spread END AS spread
+        FROM line_snapshots
+        WHERE year = ? AND week = ? AND ((favorite = ? AND underdog = ?) OR (favorite = ? AND underdog = ?))
+        ORDER BY captured_at
+    """, (favorite, year, week, favorite, underdog, underdog, favorite))
+    return [dict(row) for row in cur.fetchall()]
+
+
+def _oriented(line, favorite):
+    return line['spread'] if line['favorite'] == favorite else -line['spread']
+
+
+def snapshot_games(cur, week, year, at=None):
+    """
+    The week's games shaped for the optimizers, re-based on the line at 'at' (latest if None).
+    Entered adjustments are kept: adjusted spread = snapshot line + (adjusted - entered spread).
+    Games without a snapshot keep their entered values. Each game also carries 'line' and
+    'captured_at' (None when no snapshot was used).
+    """
+    lines = week_lines(cur, week, year, at)
+    cur.execute("""
+        SELECT favorite, underdog, spread, adjusted_spread FROM picks
+        WHERE week = ? AND year = ? ORDER BY id
+    """, (week, year))
+    games = []
+    for row in cur.fetchall():
+        line = lines.get(frozenset((row['favorite'], row['underdog'])))
+        game = {'favorite': row['favorite'], 'underdog': row['underdog'], 'spread': row['adjusted_spread'],
+                'line': None, 'captured_at': None}
+        if line is not None:
+            game['line'] = _oriented(line, row['favorite'])
+            game['spread'] = row['adjusted_spread'] + game['line'] - row['spread']
+            game['captured_at'] = line['captured_at']
+        games.append(game)
+    return games
+
+
+def print_lines(cur, week, year, at=None):
+    """Entered spread vs. opening and latest (or as-of) line for each of the week's games."""
+    opening = week_lines(cur, week, year, opening=True)
+    games = snapshot_games(cur, week, year, at)
+    entered = {(row['favorite'], row['underdog']): row['spread'] for row in cur.execute(
+        "SELECT favorite, underdog, spread FROM picks WHERE week = ? AND year = ?", (week, year)).fetchall()}
+    if not games:
+        print(f"No games entered for Week {week}, {year}.")
+        return
+
+    label = "As of" if at else "Latest"
+    print(f"\n--- Lines for Week {week}, {year} ---")
+    print("{:<22} {:<22} {:<8} {:<8} {:<8} {:<6} {:<20}".format(
+        "Favorite", "Underdog", "Entered", "Open", label, "Move", "Captured"))
+    print("-" * 100)
+    for game in games:
+        open_line = opening.get(frozenset((game['favorite'], game['underdog'])))
+        open_spread = _oriented(open_line, game['favorite']) if open_line else None
+        move = game['line'] - open_spread if game['line'] is not None and open_spread is not None else None
+        print("{:<22} {:<22} {:<8} {:<8} {:<8} {:<6} {:<20}".format(
+            game['favorite'], game['underdog'], entered[(game['favorite'], game['underdog'])],
+            "-" if open_spread is None else open_spread,
+            "-" if game['line'] is None else game['line'],
+            "-" if move is None else f"{move:+g}",
+            game['captured_at'] or "-"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Line-movement history: ingest odds files and optimize against any snapshot.")
+    parser.add_argument("--db", default="picks.db", help="database to use (default: picks.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="bulk-load odds CSV files")
+    p.add_argument("files", nargs="+",
+                   help="CSV columns: week,[year],favorite,underdog,spread,captured_at,[source]")
+    p.add_argument("--source", default=None, help="source label (default: file name)")
+    p.add_argument("--year", type=int, default=None, help="year for rows without one")
+
+    p = sub.add_parser("show", help="entered vs. opening vs. latest line for a week")
+    p.add_argument("--week", type=int, required=True)
+    p.add_argument("--year", type=int, default=datetime.now().year)
+    p.add_argument("--at", default=None, help="show the line as of this ISO timestamp")
+
+    p = sub.add_parser("optimize", help="run an optimizer against a line snapshot (not saved)")
+    p.add_argument("--week", type=int, required=True)
+    p.add_argument("--year", type=int, default=datetime.now().year)
+    p.add_argument("--at", default=None, help="use the lines as of this ISO timestamp (default: latest)")
+    p.add_argument("--num-slates", type=int, default=5)
+    p.add_argument("--engine", choices=sorted(ENGINES), default=None,
+                   help="optimizer engine (default: chosen by week size)")
+    p.add_argument("--json", action="store_true", help="print slates as JSON")
+    args = parser.parse_args()
+
+    conn, cur = db_commands.connect_db(args.db)
+    try:
+        if args.command == "ingest":
+            start = datetime.now()
+            results = ingest_files(conn, cur, args.files, args.source, args.year)
+            elapsed = (datetime.now() - start).total_seconds()
+            for path, stats in results.items():
+                print(f"{path}: {stats['inserted']} inserted, {stats['rows'] - stats['skipped'] - stats['inserted']} "
+                      f"already stored, {stats['skipped']} skipped")
+            print(f"Ingested in {elapsed:.2f}s.")
+        elif args.command == "show":
+            print_lines(cur, args.week, args.year, args.at)
+        else:
+            games = snapshot_games(cur, args.week, args.year, args.at)
+            if not games:
+                print(f"No games entered for Week {args.week}, {args.year}.")
+                return
+            _, slates = run_optimizer(games, args.engine, num_slates=args.num_slates)
+            if args.json:
+                print(json.dumps({'week': args.week, 'year': args.year, 'at': args.at, 'games': games,
+                                  'slates': slates}, indent=2))
+            else:
+                print(f"\nSlates for Week {args.week}, {args.year} against the {'line at ' + args.at if args.at else 'latest line'}:")
+                for i, slate in enumerate(slates, 1):
+                    print(f"\n#{i}  Success {slate['overall_prob'] * 100:.4f}%  "
+                          f"Expected {slate['expected_correct']:.2f}  Underdogs {slate['underdog_count']}")
+                    print("    " + ", ".join(slate['picks']))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,104 +1,178 @@
 import db_commands
 from nflpick import *
+from optimizers import ENGINES, PORTFOLIO_METHOD, default_engine, optimize_portfolio, run_optimizer
+from planner import plan_non_winners
+from pool_sim import PoolSimulator, confidence_pool_search
+from tiebreaker import TiebreakerModel
 from datetime import datetime
+import sys
+import time
+
+import profiling
+
+
+class WeekState:
+    """
+    The menu session's view of one week: its games, teams already used, tiebreaker and
+    non-winner. Loaded once, then kept in sync by write-through methods that update the
+    database and the in-memory copy together, so the menu loop does not re-query.
+    """
+    __slots__ = ('week', 'year', 'games', 'teams_picked', 'non_winner', 'over_under')
+
+    def __init__(self, week, year):
+        self.week = week
+        self.year = year
+        self.games = []
+        self.teams_picked = set()
+        self.non_winner = None
+        self.over_under = None
+
+    @classmethod
+    def load(cls, cur, week, year):
+        state = cls(week, year)
+        cur.execute("SELECT id, favorite, underdog, spread, pick FROM picks WHERE week = ? AND year = ? ORDER BY id",
+                    (week, year))
+        state.games = [dict(row) for row in cur.fetchall()]
+        state.teams_picked = {team for game in state.games for team in (game['favorite'], game['underdog'])}
+        row = cur.execute("SELECT team FROM non_winners WHERE week = ? AND year = ?", (week, year)).fetchone()
+        state.non_winner = row['team'] if row else None
+        row = cur.execute("SELECT score FROM weekly_scores WHERE week = ? AND year = ?", (week, year)).fetchone()
+        state.over_under = row['score'] if row else None
+        return state
+
+    @property
+    def winners(self):
+        """Picked teams in entry order."""
+        return [game['pick'] for game in self.games if game['pick']]
+
+    def add_game(self, cur, conn, favorite, underdog, spread, adjusted_spread, pick=None, adjustments=None):
+        game_id = db_commands.add_game(cur, self.week, self.year, favorite, underdog, spread, adjusted_spread,
+                                       pick, adjustments)
+        conn.commit()
+        self.games.append({'id': game_id, 'favorite': favorite, 'underdog': underdog, 'spread': spread, 'pick': pick})
+        self.teams_picked.update((favorite, underdog))
+        return game_id
+
+    def set_picks(self, cur, conn, picks):
+        """Sets each game's pick to whichever of its teams appears in 'picks'."""
+        picked = set(picks)
+        updates = []
+        for game in self.games:
+            for team in (game['favorite'], game['underdog']):
+                if team in picked:
+                    game['pick'] = team
+                    updates.append((team, game['id']))
+                    break
+        cur.executemany("UPDATE picks SET pick = ? WHERE id = ?", updates)
+        conn.commit()
+
+    def set_non_winner(self, cur, conn, team):
+        cur.execute("""
+            INSERT INTO non_winners (week, year, team, result) VALUES (?, ?, ?, NULL)
+            ON CONFLICT (year, week) DO UPDATE SET
+                team = excluded.team,
+                result = CASE WHEN team = excluded.team THEN result END
+        """, (self.week, self.year, team))
+        conn.commit()
+        self.non_winner = team
+
+    def set_tiebreaker(self, cur, conn, total, over_under):
+        cur.execute("""
+            INSERT INTO weekly_scores (week, year, score, over_under) VALUES (?, ?, ?, ?)
+            ON CONFLICT (year, week) DO UPDATE SET score = excluded.score, over_under = excluded.over_under
+        """, (self.week, self.year, total, over_under))
+        conn.commit()
+        self.over_under = total
 
 
-def handle_new_game(cur, conn, week, year, teams_picked):
+def handle_new_game(cur, conn, state):
     print("\nEnter the information for a new pick:")
     game_data = get_game() 
     if game_data:
         
-        (favorite, underdog, raw_spread, adjusted_spread, pick) = game_data
-        if favorite not in teams_picked and underdog not in teams_picked:
+        (favorite, underdog, raw_spread, adjusted_spread, pick, adjustments) = game_data
+        if favorite not in state.teams_picked and underdog not in state.teams_picked:
             
-            cur.execute("""
-                INSERT INTO picks (date, week, year, favorite, underdog, spread, adjusted_spread, pick)
-                VALUES (date('now', 'localtime'), ?, ?, ?, ?, ?, ?, ?)
-            """, (week, year, favorite, underdog, raw_spread, adjusted_spread, pick))
-            conn.commit()
+            state.add_game(cur, conn, favorite, underdog, raw_spread, adjusted_spread, pick, adjustments)
             print(f"\nGame Added: {favorite} vs. {underdog}")
             return (favorite, underdog, pick)
         else:
             print("\nOne of these teams has already been picked this week.")
     return None
 
-def handle_advanced_ga(cur, conn, week, year):
-    """Generates, displays, saves, and allows selection of slates via Genetic Algorithm."""
+def handle_advanced_ga(cur, conn, state):
+    """Generates, displays, saves, and allows selection of slates from the chosen optimizer engine."""
+    week, year = state.week, state.year
     print(f"\nClearing previously generated slates for Week {week}, {year}...")
-    cur.execute("""
-        DELETE FROM slate_picks 
-        WHERE slate_id IN (SELECT id FROM generated_slates WHERE week = ? AND year = ?)
-    """, (week, year))
-    rows_deleted = cur.execute("DELETE FROM generated_slates WHERE week = ? AND year = ?", (week, year)).rowcount
+    rows_deleted = db_commands.clear_generated_slates(cur, week, year)
     conn.commit()
     if rows_deleted > 0:
         print(f"Cleared {rows_deleted} old slate(s).")
     else:
         print("No previous slates found to clear.")
 
-    print("\nGenerating optimized slates with Genetic Algorithm...")
-    
-    cur.execute("SELECT favorite, underdog, adjusted_spread as spread FROM picks WHERE week = ? AND year = ?", (week, year))
-    games_for_slate = [dict(row) for row in cur.fetchall()]
+    games_for_slate = db_commands.week_games(cur, week, year)
     
     if not games_for_slate:
         print(f"No games entered for Week {week}. Please add games using 'N'.")
         return None
 
-    top_slates = generate_slates_ga(games_for_slate, num_slates=5)
+    default = default_engine(len(games_for_slate))
+    engine = input(f"Optimizer engine ({'/'.join(ENGINES)}, Enter for {default}): ").strip().lower() or default
+    if engine not in ENGINES:
+        print(f"Unknown engine '{engine}', using {default}.")
+        engine = default
+
+    pool_input = input("Pool size to maximize your chance of finishing first (Enter for standard fitness): ").strip()
+    pool_size = int(pool_input) if pool_input.isdigit() else 0
+    entries = 1
+    if pool_size > 1:
+        entries_input = input("Number of entries you submit (Enter for 1): ").strip()
+        entries = int(entries_input) if entries_input.isdigit() and int(entries_input) > 0 else 1
+
+    seed = new_seed()
+    params = {'engine': engine, 'pool_size': pool_size, 'num_slates': 5, 'entries': entries}
+    start = time.perf_counter()
+    if entries > 1:
+        print(f"\nSimulating a {pool_size}-entry pool and choosing {entries} entries jointly...")
+        top_slates, portfolio_prob, independent_prob = optimize_portfolio(games_for_slate, pool_size, entries, rng=seed)
+        method = PORTFOLIO_METHOD
+        # Listed like other slates, best individual pool-win chance first.
+        top_slates.sort(key=lambda slate: slate['fitness'], reverse=True)
+        print(f"Chance at least one entry finishes first: {portfolio_prob * 100:.2f}% "
+              f"(the {entries} individually best slates: {independent_prob * 100:.2f}%)")
+    elif pool_size > 1:
+        print(f"\nSimulating a {pool_size}-entry pool and optimizing slates against it ({engine})...")
+        method, top_slates = run_optimizer(games_for_slate, rng=seed, **params)
+    else:
+        print(f"\nGenerating optimized slates ({engine})...")
+        method, top_slates = run_optimizer(games_for_slate, rng=seed, **params)
+    duration_ms = (time.perf_counter() - start) * 1000
 
     if not top_slates:
         print("Could not generate slates.")
         return None
 
     print("Saving generated slates to the database...")
-    for slate in top_slates:
-        cur.execute("""
-            INSERT INTO generated_slates (week, year, method, fitness, overall_prob, underdog_count)
-            VALUES (?, ?, 'GA', ?, ?, ?)
-        """, (week, year, slate['fitness'], slate['overall_prob'], slate['underdog_count']))
-        slate_id = cur.lastrowid
-        
-        slate_picks_with_context = []
-        temp_games = list(games_for_slate)
-        for pick in slate['picks']:
-            for game in temp_games:
-                if pick in (game['favorite'], game['underdog']):
-                    slate_picks_with_context.append({
-                        'team_pick': pick,
-                        'favorite': game['favorite'],
-                        'underdog': game['underdog'],
-                        'spread': game['spread'] 
-                    })
-                    temp_games.remove(game)
-                    break
-        
-        for i, pick_data in enumerate(slate_picks_with_context):
-            cur.execute("""
-                INSERT INTO slate_picks (slate_id, pick_order, team_pick, favorite, underdog, spread)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (slate_id, i + 1, pick_data['team_pick'], pick_data['favorite'], pick_data['underdog'], pick_data['spread']))
-    conn.commit()
-    print("Slates saved successfully.")
+    with profiling.timer('advanced_ga.save'):
+        manifest_id = db_commands.save_run_manifest(cur, week, year, 'generate', method, seed,
+                                                    dict(params, at=None), games_for_slate, duration_ms)
+        db_commands.save_generated_slates(cur, week, year, method, games_for_slate, top_slates, manifest_id=manifest_id)
+        conn.commit()
+    print(f"Slates saved successfully (run {manifest_id}, seed {seed}; replay with: python3 cli.py replay --manifest {manifest_id}).")
     
     
-    handle_view_slates(cur, week, year, limit=5)
+    handle_view_slates(cur, week, year, limit=len(top_slates))
 
     while True:
         try:
-            selection = input(f"\nWhich slate do you want to set as your final picks for Week {week}? (1-5 or 'c' to cancel): ").strip().lower()
+            selection = input(f"\nWhich slate do you want to set as your final picks for Week {week}? (1-{len(top_slates)} or 'c' to cancel): ").strip().lower()
             if selection == 'c': break
             selection_idx = int(selection) - 1
             if 0 <= selection_idx < len(top_slates):
                 final_picks = top_slates[selection_idx]['picks']
                 print(f"\nSlate #{selection_idx + 1} selected as your final picks!")
-                for game in games_for_slate:
-                    chosen_winner = next((p for p in final_picks if p in (game['favorite'], game['underdog'])), None)
-                    if chosen_winner:
-                        cur.execute("""
-                            UPDATE picks SET pick = ? WHERE week = ? AND year = ? AND favorite = ? AND underdog = ?
-                        """, (chosen_winner, week, year, game['favorite'], game['underdog']))
-                conn.commit()
+                state.set_picks(cur, conn, final_picks)
                 print("Database has been updated with your final picks.")
                 return final_picks
             else:
@@ -107,16 +181,103 @@ def handle_advanced_ga(cur, conn, week, year):
             print("Please enter a valid number.")
     return None
 
+def handle_confidence(cur, conn, state):
+    """Builds a confidence-points entry (side and rank per game), saves it, and allows selection."""
+    week, year = state.week, state.year
+    games_for_slate = db_commands.week_games(cur, week, year)
+
+    if not games_for_slate:
+        print(f"No games entered for Week {week}. Please add games using 'N'.")
+        return None
+
+    game_probs = game_probabilities(games_for_slate)
+    picks, ranks, expected_points = confidence_assignment(game_probs)
+    method = 'CONFIDENCE'
+    fitness = expected_points
+
+    pool_input = input("Pool size to maximize your chance of finishing first (Enter to maximize expected points): ").strip()
+    if pool_input.isdigit() and int(pool_input) > 1:
+        print(f"\nSimulating a {int(pool_input)}-entry confidence pool...")
+        simulator = PoolSimulator(games_for_slate, pool_size=int(pool_input), opponent_ranks=ranks)
+        picks, ranks, fitness = confidence_pool_search(simulator, picks, ranks)
+        expected_points = confidence_expected_points(game_probs, picks, ranks)
+        method = 'CONFIDENCE-POOL'
+
+    overall_prob = 1.0
+    underdog_count = 0
+    for probs, pick in zip(game_probs, picks):
+        if pick == probs['favorite']['team']:
+            overall_prob *= probs['favorite']['prob']
+        else:
+            overall_prob *= probs['underdog']['prob']
+            underdog_count += 1
+
+    db_commands.clear_generated_slates(cur, week, year, confidence=True)
+    correct_dist = correct_distributions(game_probs, [picks])[0]
+    expected_correct, tail_probs = summarize_distribution(correct_dist)
+    entry = {'picks': picks, 'fitness': fitness, 'overall_prob': overall_prob, 'underdog_count': underdog_count,
+             'expected_correct': expected_correct, 'correct_dist': correct_dist, 'tail_probs': tail_probs,
+             'confidence': ranks}
+    slate_id, = db_commands.save_generated_slates(cur, week, year, method, games_for_slate, [entry], compact=False)
+    order = sorted(range(len(picks)), key=lambda i: ranks[i], reverse=True)
+    conn.commit()
+
+    print(f"\n--- Confidence Entry (DB ID: {slate_id}) ---")
+    print(f"Expected Points:   {expected_points:.2f} of {len(picks) * (len(picks) + 1) // 2}")
+    if method == 'CONFIDENCE-POOL':
+        print(f"Pool Win Chance:   {fitness * 100:.2f}%")
+    print("-" * 55)
+    for i in order:
+        status = "Favorite" if picks[i] == games_for_slate[i]['favorite'] else "Underdog"
+        print(f"{ranks[i]:>2} pts  {picks[i]:<20} ({status})")
+
+    if input(f"\nSet this entry as your final picks for Week {week}? (y/n): ").strip().lower() == 'y':
+        state.set_picks(cur, conn, picks)
+        print("Database has been updated with your final picks.")
+        return [picks[i] for i in order]
+    return None
+
+def handle_frontier(cur, conn, state):
+    """Computes and saves the week's risk frontier, then shows any risk level's slate on request."""
+    week, year = state.week, state.year
+    games_for_slate = db_commands.week_games(cur, week, year)
+    if not games_for_slate:
+        print(f"No games entered for Week {week}. Please add games using 'N'.")
+        return None
+
+    db_commands.save_frontier(cur, week, year, games_for_slate)
+    conn.commit()
+    frontier = db_commands.fetch_generated_slates(cur, week, year, frontier=True)
+
+    print(f"\n--- Risk Frontier for Week {week}, {year} (most likely slate per underdog count) ---")
+    print("{:<10} {:<14} {:<18}".format("Underdogs", "Success", "Expected Correct"))
+    print("-" * 42)
+    for slate in frontier:
+        print("{:<10} {:<14} {:<18}".format(slate['underdog_count'], f"{slate['overall_prob'] * 100:.4f}%",
+                                            f"{slate['expected_correct']:.2f} of {len(games_for_slate)}"))
+
+    while True:
+        selection = input(f"\nUnderdog count to view (0-{len(games_for_slate)}) or 'c' to cancel: ").strip().lower()
+        if selection == 'c':
+            return None
+        if not selection.isdigit() or int(selection) >= len(frontier):
+            print("Invalid selection.")
+            continue
+        slate = frontier[int(selection)]
+        print(f"\n--- {slate['underdog_count']} Underdog(s) --- Success Chance: {slate['overall_prob'] * 100:.4f}%")
+        for j, pick in enumerate(slate['picks'], 1):
+            status = "Favorite" if pick['team_pick'] == pick['favorite'] else "Underdog"
+            print(f"{j:>2}. {pick['team_pick']:<20} ({status})")
+        if input("\nSet this slate as your final picks? (y/n): ").strip().lower() == 'y':
+            final_picks = [pick['team_pick'] for pick in slate['picks']]
+            state.set_picks(cur, conn, final_picks)
+            print("Database has been updated with your final picks.")
+            return final_picks
+
 def handle_view_slates(cur, week, year, limit=None):
     """Queries and displays previously generated slates from the database."""
     print("\n--- Viewing Saved Slates ---")
-    query = "SELECT * FROM generated_slates WHERE week = ? AND year = ? ORDER BY fitness DESC"
-    params = (week, year)
-    if limit:
-        query += " LIMIT ?"
-        params += (limit,)
-
-    slates = cur.execute(query, params).fetchall()
+    slates = db_commands.fetch_generated_slates(cur, week, year, limit)
 
     if not slates:
         print(f"No saved slates found for Week {week}, {year}.")
@@ -127,18 +288,36 @@ def handle_view_slates(cur, week, year, limit=None):
         print(f"\n--- Slate #{i} (DB ID: {slate['id']}) --- (Fitness: {slate['fitness']:.4f})")
         print(f"Risk Profile:      {slate['underdog_count']} Underdog(s)")
         print(f"Success Chance:    {prob_percent:.4f}%")
+        if slate['method'].endswith('-POOL'):
+            print(f"Pool Win Chance:   {slate['fitness'] * 100:.2f}%")
+        if slate['expected_correct'] is not None and slate['tail_probs'] is not None:
+            tail_probs = slate['tail_probs']
+            num_games = len(tail_probs) - 1
+            print(f"Expected Correct:  {slate['expected_correct']:.2f} of {num_games}")
+            tail_str = " | ".join(f"{k}+: {tail_probs[k] * 100:.1f}%" for k in range(num_games, max(num_games - 4, 0), -1))
+            print(f"Score Chances:     {tail_str}")
         print("-" * 55)
         
-        picks = cur.execute("SELECT * FROM slate_picks WHERE slate_id = ? ORDER BY pick_order", (slate['id'],)).fetchall()
-        for j, pick in enumerate(picks, 1):
+        for j, pick in enumerate(slate['picks'], 1):
             status = "Favorite" if pick['team_pick'] == pick['favorite'] else "Underdog"
             spread_str = f"-{pick['spread']}" if status == "Favorite" else f"+{pick['spread']}"
-            print(f"{j:>2}. {pick['team_pick']:<20} ({status} {spread_str})")
+            confidence_str = f" [{pick['confidence']} pts]" if pick['confidence'] is not None else ""
+            print(f"{j:>2}. {pick['team_pick']:<20} ({status} {spread_str}){confidence_str}")
     print("\n" + "="*55)
 
 def handle_print_picks(cur, week, year, winners, non_winner, over_under):
     """Prints the final selected picks for the week and saves to a file if requested."""
 
+    # Confidence ranks come from the week's saved confidence entry, when the picks match it.
+    confidence = {row['team_pick']: row['confidence'] for row in cur.execute("""
+        SELECT sp.team_pick, sp.confidence FROM slate_picks sp
+        JOIN generated_slates gs ON gs.id = sp.slate_id
+        WHERE gs.week = ? AND gs.year = ? AND gs.method LIKE 'CONFIDENCE%'
+    """, (week, year)).fetchall()}
+    if winners and all(team in confidence for team in winners):
+        winners = sorted(winners, key=lambda team: confidence[team], reverse=True)
+    else:
+        confidence = {}
     
     output_lines = []
     output_lines.append("\n" + "="*40)
@@ -158,7 +337,10 @@ def handle_print_picks(cur, week, year, winners, non_winner, over_under):
     output_lines.append("TEAM SELECTIONS".center(40))
     if winners:
         for i, team in enumerate(winners, 1):
-            output_lines.append(f"{i:>2}. {team.center(31)}")
+            if confidence:
+                output_lines.append(f"{i:>2}. {team.center(25)}{confidence[team]:>2} pts")
+            else:
+                output_lines.append(f"{i:>2}. {team.center(31)}")
     else:
         output_lines.append("No teams selected yet".center(40))
     
@@ -177,7 +359,10 @@ def handle_print_picks(cur, week, year, winners, non_winner, over_under):
                 f.write(f"Non-Winner Pick: {non_winner}\n\n")
             f.write("Team Selections:\n")
             for i, team in enumerate(winners, 1):
-                f.write(f"{i:>2}. {team}\n")
+                if confidence:
+                    f.write(f"{i:>2}. {team} ({confidence[team]} pts)\n")
+                else:
+                    f.write(f"{i:>2}. {team}\n")
         print(f"Picks saved to {filename}")
 
 def main():
@@ -195,63 +380,49 @@ def main():
 
     current_year = datetime.now().year
     
-    existing_picks = cur.execute("SELECT favorite, underdog, pick FROM picks WHERE week = ? AND year = ?", (week, current_year)).fetchall()
-    teams_picked = [team for row in existing_picks for team in (row['favorite'], row['underdog'])]
-    winners = [row['pick'] for row in existing_picks if row['pick']]
-    
-
-    non_winner_row = cur.execute("SELECT team FROM non_winners WHERE week = ? AND year = ?", (week, current_year)).fetchone()
-    non_winner = non_winner_row['team'] if non_winner_row else None
-    
-    over_under_row = cur.execute("SELECT score FROM weekly_scores WHERE week = ? AND year = ?", (week, current_year)).fetchone()
-    over_under = over_under_row['score'] if over_under_row else None
+    state = WeekState.load(cur, week, current_year)
 
     while True:
-        games_picked_so_far = len(teams_picked) // 2
+        games_picked_so_far = len(state.games)
         print(f"\n--- Week {week} | Year {current_year} | Games Entered: {games_picked_so_far} ---")
         
         choice_input = input(
-            "New Game (N), Update (U), Score (S), Loser (L), Print (P), Advanced GA (A), View Slates (V), or Quit (Q)? "
+            "New Game (N), Update (U), Score (S), Loser (L), Print (P), Advanced GA (A), Risk Frontier (R), Confidence (C), View Slates (V), or Quit (Q)? "
         ).strip().upper()
 
         if choice_input == "N":
-            result = handle_new_game(cur, conn, week, current_year, teams_picked)
-            if result:
-                fav, und, pick = result
-                teams_picked.extend([fav, und])
-                if pick not in winners:
-                    winners.append(pick)
+            handle_new_game(cur, conn, state)
         
         elif choice_input == "A":
-            new_picks = handle_advanced_ga(cur, conn, week, current_year)
-            if new_picks:
-                winners = new_picks
+            handle_advanced_ga(cur, conn, state)
+
+        elif choice_input == "R":
+            handle_frontier(cur, conn, state)
+
+        elif choice_input == "C":
+            handle_confidence(cur, conn, state)
 
         elif choice_input == "V":
             handle_view_slates(cur, week, current_year)
 
         elif choice_input == "P":
-            if not winners:
-                winners = [row['pick'] for row in cur.execute("SELECT pick FROM picks WHERE week = ? AND year = ?", (week, current_year)).fetchall() if row['pick']]
-            
+            winners = state.winners
             if not winners:
                  print("\nNo final picks selected. Please generate slates with 'A' and make a selection first.")
             else:
-                handle_print_picks(cur, week, current_year, winners, non_winner, over_under)
+                handle_print_picks(cur, week, current_year, winners, state.non_winner, state.over_under)
 
         elif choice_input == "Q":
             break
 
         elif choice_input =="U":
-            cur.execute("SELECT id FROM picks WHERE winner IS NULL OR correct IS NULL")
+            cur.execute("SELECT id, date, week, favorite, underdog FROM picks WHERE winner IS NULL OR correct IS NULL")
             rows = cur.fetchall()
             missing = [row['id'] for row in rows]
             if rows:
                 print("\nThe following games have missing information:")
-                for game_id in missing:
-                    cur.execute("SELECT date, week, favorite, underdog FROM picks WHERE id = ?", (game_id,))
-                    result = cur.fetchone()
-                    print(f"ID# {game_id}: {result['date']} Wk {result['week']} - {result['favorite']} vs {result['underdog']}")
+                for result in rows:
+                    print(f"ID# {result['id']}: {result['date']} Wk {result['week']} - {result['favorite']} vs {result['underdog']}")
                     
                 while True:
                     id_input = input("\nEnter the id of the game you want to update (or 'q' to go back): ")
@@ -266,34 +437,25 @@ def main():
                         
                        
                         winner_for_db = None
-                        correct = 0
                         
                         while True: 
                             result_input = input("Enter the winning team's abbreviation, or 'TIE' for a tie: ").strip().upper()
 
                             if result_input == 'TIE':
                                 winner_for_db = 'TIE'
-                                correct = 0 
                                 break
                             
                            
-                            team_name = TEAMS.get(result_input.lower()) 
-                            
-                            if not team_name: 
-                                for abbr, full_name in TEAMS.items():
-                                    if result_input == full_name.upper():
-                                        team_name = full_name
-                                        break
+                            team_name = lookup_team(result_input)
                             
                             if team_name and team_name in (row['favorite'], row['underdog']):
                                 winner_for_db = team_name
-                                correct = 1 if winner_for_db == row['pick'] else 0
                                 break
                             else:
                                 print(f"Invalid input. Please enter an abbreviation for '{row['favorite']}', '{row['underdog']}', or 'TIE'.")
                         
                         
-                        cur.execute("UPDATE picks SET winner = ?, correct = ? WHERE id = ?", (winner_for_db, correct, id_to_update))
+                        db_commands.settle_game(cur, id_to_update, winner_for_db)
                         conn.commit()
                         print(f"Updated game {id_to_update}. Result: {winner_for_db}")
                         break
@@ -315,19 +477,16 @@ def main():
                     if points <= 0:
                         print("Over/under should be a positive number.")
                         continue
-                    total = score(points)
-                    cur.execute("INSERT OR REPLACE INTO weekly_scores (week, year, score) VALUES (?, ?, ?)", (week, current_year, total))
-                    conn.commit()
+                    total, total_prob, expected_distance = TiebreakerModel.from_sources(cur).sample(points)
+                    state.set_tiebreaker(cur, conn, total, points)
                     print(f"Predicted total score: {total}")
-                    
-                    over_under = total
+                    print(f"Chance of exactly {total}: {total_prob * 100:.1f}% | Expected tiebreak distance: {expected_distance:.1f} points")
                     break
                 except (ValueError, TypeError):
                     print("Invalid number. Please enter a decimal number (e.g., 45.5) or 'q' to quit.")
 
         elif choice_input == "L":
-            cur.execute("SELECT favorite, underdog, spread, pick FROM picks WHERE week = ? AND year = ?", (week, current_year))
-            games_this_week = cur.fetchall()
+            games_this_week = state.games
             
             if not games_this_week:
                 print(f"\nNo games found for Week {week}, {current_year}.")
@@ -342,32 +501,34 @@ def main():
 
             available_teams.sort(key=lambda x: x['sort_spread'], reverse=True)
 
+            plan, used_teams = plan_non_winners(cur, current_year)
+            if plan:
+                season_chance = 1.0
+                for entry in plan:
+                    season_chance *= entry['success_prob']
+                print(f"\nSeason non-winner plan ({season_chance * 100:.1f}% chance all planned weeks succeed):")
+                for entry in plan:
+                    marker = "  <- this week" if entry['week'] == week else ""
+                    print(f"  Wk {entry['week']:>2}: {entry['team']:<20} ({entry['success_prob'] * 100:.0f}%){marker}")
+
             print(f"\nAvailable teams for non-winner pick (Week {week}, {current_year}):")
             print("-" * 40)
             
             for i, team_info in enumerate(available_teams, 1):
-                print(f"{i:2d}. {team_info['team']:<20} ({team_info['spread']:>5})")
+                used_week = used_teams.get(team_info['team'])
+                used_str = f"  (used Wk {used_week})" if used_week is not None and used_week != week else ""
+                print(f"{i:2d}. {team_info['team']:<20} ({team_info['spread']:>5}){used_str}")
             
             while True:
                 non_winner_input = input("\nEnter your non-winner pick (team abbreviation) or 'q' to quit: ").strip()
                 if normalize_input(non_winner_input) in ['quit', 'q']:
                     break
                 
-                valid_team_name = None
-                if non_winner_input in TEAMS:
-                    valid_team_name = TEAMS[non_winner_input]
-                else:
-                    for abbr, full_name in TEAMS.items():
-                        if non_winner_input.lower() == full_name.lower():
-                            valid_team_name = full_name
-                            break
+                valid_team_name = lookup_team(non_winner_input)
                 
                 if valid_team_name and any(d['team'] == valid_team_name for d in available_teams):
-                    cur.execute("INSERT OR REPLACE INTO non_winners (week, year, team, result) VALUES (?, ?, ?, NULL)", (week, current_year, valid_team_name))
-                    conn.commit()
+                    state.set_non_winner(cur, conn, valid_team_name)
                     print(f"\n{valid_team_name} has been selected as your non-winner for Week {week}.")
-                   
-                    non_winner = valid_team_name
                     break
                 else:
                     print(f"'{non_winner_input}' is not a valid or available team. Please choose from the list.")
@@ -379,4 +540,6 @@ def main():
     conn.close()
 
 if __name__ == "__main__":
+    if "--profile" in sys.argv:
+        profiling.enable()
     main()
\ No newline at end of file
@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 
+import copy
+import hashlib
 import random
+import secrets
 from collections import defaultdict
+from functools import lru_cache
 import math
 
+import profiling
+
 TEAMS = {
     "ari":"Cardinals",
     "atl":"Falcons",
@@ -71,6 +77,28 @@ def normalize_input(user_input):
     
     return shortcuts.get(user_input, user_input)
 
+DIVISIONS = {
+    'AFC_EAST': ['buf', 'mia', 'ne', 'nyj'],
+    'AFC_NORTH': ['bal', 'cin', 'cle', 'pit'],
+    'AFC_SOUTH': ['hou', 'ind', 'jax', 'ten'],
+    'AFC_WEST': ['den', 'kc', 'lac', 'lv'],
+    'NFC_EAST': ['dal', 'nyg', 'phi', 'was'],
+    'NFC_NORTH': ['chi', 'det', 'gb', 'mn'],
+    'NFC_SOUTH': ['atl', 'car', 'no', 'tb'],
+    'NFC_WEST': ['ari', 'lar', 'sea', 'sf']
+}
+
+# Team registry, built once at import so name, abbreviation and division lookups are O(1).
+TEAM_BY_NAME = {name.lower(): name for name in TEAMS.values()}
+ABBR_BY_TEAM = {name: abbr for abbr, name in TEAMS.items()}
+DIVISION_BY_TEAM = {TEAMS[abbr]: division for division, abbrs in DIVISIONS.items() for abbr in abbrs}
+
+
+def lookup_team(team):
+    """Returns the full team name for an abbreviation or full name (any case), or None."""
+    team = team.strip().lower()
+    return TEAMS.get(team) or TEAM_BY_NAME.get(team)
+
 def get_team_input(prompt):
     """
     Gets and validates team input from the user.
@@ -88,12 +116,9 @@ def get_team_input(prompt):
                 return 'QUIT'
                 
 
-            if normalized in TEAMS:
-                return TEAMS[normalized]
-            
-            for abbr, full_name in TEAMS.items():
-                if team.lower() == full_name.lower():
-                    return full_name
+            full_name = lookup_team(normalized)
+            if full_name:
+                return full_name
             
             print(f"'{team}' is not a valid team. Valid abbreviations:")
             use_Error()
@@ -138,117 +163,430 @@ def weighted(spread):
         weight_F = 0.50
     return weight_F
 
-def generate_slates_ga(games, num_slates=5, population_size=500, generations=300, mutation_rate=0.07, underdog_bonus=0.45):
+def new_seed():
+    """A fresh 63-bit seed for a run that was not given one (so it can be recorded and replayed)."""
+    return secrets.randbits(63)
+
+def make_rng(rng=None):
     """
-    Generates optimized slates of picks using a Genetic Algorithm.
-    [TUNING: underdog_bonus default changed from .05 to 0.45 for N=15 pool]
+    The random.Random to draw from: 'rng' itself if it is one, else a generator seeded with it
+    (an int seed, or None for a fresh OS-seeded generator). Never the module-global generator.
     """
-    if not games:
-        return []
+    return rng if isinstance(rng, random.Random) else random.Random(rng)
+
+def derive_seed(seed, *labels):
+    """
+    Seed of an independent stream for a sub-task or parallel worker (e.g. labels year, week),
+    so results do not depend on which worker ran which task or in what order.
+    """
+    digest = hashlib.sha256(repr((seed,) + labels).encode()).digest()
+    return int.from_bytes(digest[:8], 'big') >> 1
+
+@lru_cache(maxsize=None)
+def spread_probabilities(adjusted_spread):
+    """
+    (favorite, underdog) win probabilities for an adjusted spread, memoized since the
+    same half-point spreads recur across games, weeks and what-if scenarios.
+    A negative adjusted spread means the adjustments flipped the favorite.
+    """
+    if adjusted_spread >= 0:
+        fav_prob = weighted(adjusted_spread)
+        return fav_prob, 1 - fav_prob
+    dog_prob = weighted(abs(adjusted_spread))
+    return 1 - dog_prob, dog_prob
 
+def game_probabilities(games):
+    """
+    Converts each game's adjusted spread into win probabilities for both sides.
+    A negative adjusted spread means the adjustments flipped the favorite.
+    """
     game_probs = []
     for game in games:
-        adjusted_spread = game['spread'] 
-        initial_favorite = game['favorite']
-        initial_underdog = game['underdog']
+        fav_prob, dog_prob = spread_probabilities(game['spread'])
+        game_probs.append({
+            'favorite': {'team': game['favorite'], 'prob': fav_prob},
+            'underdog': {'team': game['underdog'], 'prob': dog_prob}
+        })
+    return game_probs
 
-        if adjusted_spread >= 0:
-            fav_prob = weighted(adjusted_spread)
-            dog_prob = 1 - fav_prob
+def poisson_binomial(probs):
+    """
+    Returns the exact distribution of the number of successes among independent
+    trials with the given success probabilities: dist[k] = P(exactly k successes).
+    """
+    dist = [1.0]
+    for p in probs:
+        dist = _add_trial(dist, p)
+    return dist
+
+def _add_trial(dist, p):
+    """One convolution step: the distribution after one more trial with success probability p."""
+    q = 1 - p
+    new_dist = [0.0] * (len(dist) + 1)
+    for k, mass in enumerate(dist):
+        new_dist[k] += mass * q
+        new_dist[k + 1] += mass * p
+    return new_dist
+
+def slate_mask(games, picks):
+    """
+    Compact slate encoding: bit i is set when the underdog of games[i] is picked.
+    'games' fixes the bit order (the week's games in entry order, see week_games).
+    """
+    mask = 0
+    for i, (pick, game) in enumerate(zip(picks, games)):
+        if pick == game['underdog']:
+            mask |= 1 << i
+    return mask
+
+def mask_picks(games, mask):
+    """Expands a slate bitmask back into the picked team names (for display and export)."""
+    return [game['underdog'] if (mask >> i) & 1 else game['favorite'] for i, game in enumerate(games)]
+
+def correct_distributions(game_probs, slates):
+    """
+    Exact distribution of correct picks for many slates at once.
+    Each slate is a list of picked teams aligned with 'game_probs', or a slate bitmask.
+    Slates are processed in sorted order so those sharing leading picks reuse the same
+    partial DP rows, making the batch much cheaper than running poisson_binomial per slate.
+    Returns one dist per slate: dist[k] = P(exactly k picks correct).
+    """
+    keys = []
+    for picks in slates:
+        if isinstance(picks, int):
+            keys.append(tuple(not (picks >> i) & 1 for i in range(len(game_probs))))
         else:
-            dog_prob = weighted(abs(adjusted_spread)) 
-            fav_prob = 1 - dog_prob
+            keys.append(tuple(pick == probs['favorite']['team'] for pick, probs in zip(picks, game_probs)))
+    results = {}
+    prefix = ()
+    rows = [[1.0]]
+    for key in sorted(set(keys)):
+        common = 0
+        while common < len(prefix) and prefix[common] == key[common]:
+            common += 1
+        del rows[common + 1:]
+        for i in range(common, len(key)):
+            p = game_probs[i]['favorite']['prob'] if key[i] else game_probs[i]['underdog']['prob']
+            rows.append(_add_trial(rows[-1], p))
+        prefix = key
+        results[key] = rows[-1]
+    return [results[key] for key in keys]
 
-        game_probs.append({
-            'favorite': {'team': initial_favorite, 'prob': fav_prob},
-            'underdog': {'team': initial_underdog, 'prob': dog_prob}
-        })
+def summarize_distribution(dist):
+    """Expected correct picks and tail probabilities: tail[k] = P(at least k correct)."""
+    expected = sum(k * mass for k, mass in enumerate(dist))
+    tail = []
+    running = 0.0
+    for mass in reversed(dist):
+        running += mass
+        tail.append(min(running, 1.0))
+    tail.reverse()
+    return expected, tail
+
+def confidence_assignment(game_probs):
+    """
+    Exact expected-points optimum for a confidence pool. Each game takes its more likely
+    side, and ranks 1..N go to the picks in order of win probability (by the rearrangement
+    inequality no other assignment scores more in expectation).
+    Returns (picks, ranks, expected_points) with picks and ranks in game order.
+    """
+    picks = []
+    pick_probs = []
+    for probs in game_probs:
+        side = 'favorite' if probs['favorite']['prob'] >= probs['underdog']['prob'] else 'underdog'
+        picks.append(probs[side]['team'])
+        pick_probs.append(probs[side]['prob'])
+
+    ranks = [0] * len(picks)
+    for rank, i in enumerate(sorted(range(len(picks)), key=lambda i: pick_probs[i]), 1):
+        ranks[i] = rank
+    expected_points = sum(rank * p for rank, p in zip(ranks, pick_probs))
+    return picks, ranks, expected_points
+
+def confidence_expected_points(game_probs, picks, ranks):
+    """Expected confidence points for a given set of picks and ranks."""
+    total = 0.0
+    for probs, pick, rank in zip(game_probs, picks, ranks):
+        side = 'favorite' if pick == probs['favorite']['team'] else 'underdog'
+        total += rank * probs[side]['prob']
+    return total
+
+def best_slates_by_underdogs(fav_probs):
+    """
+    Exact most-likely slate for every underdog count. Taking the underdog in game i
+    multiplies the all-favorites probability by dog/fav for that game, so the best slate
+    with k underdogs takes the k largest ratios.
+    Returns a list indexed by k of (mask, overall_prob).
+    """
+    mask = 0
+    prob = 1.0
+    for p in fav_probs:
+        prob *= p
+    best = [(mask, prob)]
+    for i in sorted(range(len(fav_probs)), key=lambda i: (1 - fav_probs[i]) / fav_probs[i], reverse=True):
+        mask |= 1 << i
+        prob *= (1 - fav_probs[i]) / fav_probs[i]
+        best.append((mask, prob))
+    return best
+
+def best_proxy_slate(fav_probs, underdog_bonus=0.45):
+    """
+    Exact optimum of the GA's default fitness (joint probability x underdog bonus).
+    Returns (mask, fitness, overall_prob).
+    """
+    return max(((mask, prob * (1 + underdog_bonus * k), prob)
+                for k, (mask, prob) in enumerate(best_slates_by_underdogs(fav_probs))),
+               key=lambda x: x[1])
+
+class ProxyFitness:
+    """
+    The GA's default objective: joint probability x (1 + underdog_bonus x underdogs).
+    Callable on a slate bitmask. Joint probabilities come from a lookup table per 8-game
+    chunk, so a slate's probability is one table entry per chunk instead of one multiply per game.
+    """
+
+    def __init__(self, game_probs, underdog_bonus=0.45):
+        self.underdog_bonus = underdog_bonus
+        self.chunk_tables = []
+        for start in range(0, len(game_probs), 8):
+            chunk = game_probs[start:start + 8]
+            table = []
+            for bits in range(1 << len(chunk)):
+                prob = 1.0
+                for j, probs in enumerate(chunk):
+                    prob *= probs['underdog']['prob'] if (bits >> j) & 1 else probs['favorite']['prob']
+                table.append(prob)
+            self.chunk_tables.append(table)
+
+    def with_bonus(self, underdog_bonus):
+        """The same week scored with another underdog_bonus, sharing the probability tables."""
+        other = copy.copy(self)
+        other.underdog_bonus = underdog_bonus
+        return other
+
+    def overall_prob(self, mask):
+        """Chance every pick in the slate is correct."""
+        prob = 1.0
+        for c, table in enumerate(self.chunk_tables):
+            prob *= table[(mask >> (8 * c)) & 0xFF]
+        return prob
+
+    def __call__(self, mask):
+        return self.overall_prob(mask) * (1 + self.underdog_bonus * mask.bit_count())
 
-    def calculate_fitness(individual):
-        """Calculates the fitness of a single slate (individual)."""
-        overall_prob = 1.0
-        underdog_count = 0
-        for i, pick in enumerate(individual):
-            if pick == game_probs[i]['favorite']['team']:
-                overall_prob *= game_probs[i]['favorite']['prob']
-            else:
-                overall_prob *= game_probs[i]['underdog']['prob']
-                underdog_count += 1
 
-        fitness = overall_prob * (1 + underdog_bonus * underdog_count)
-        return fitness, overall_prob, underdog_count
+# GA operator choices (see evolve_slates).
+SELECTIONS = ('truncation', 'tournament')
+CROSSOVERS = ('single_point', 'uniform')
+
+# Adaptive mutation: below this share of distinct slates in the population the flip rate is
+# raised by MUTATION_STEP (up to MAX_MUTATION_RATE), above it the rate decays back to the base.
+DIVERSITY_TARGET = 0.5
+MUTATION_STEP = 1.5
+MAX_MUTATION_RATE = 0.25
+
+
+def evolve_slates(game_probs, fitness, population_size=500, generations=300, mutation_rate=0.07, rng=None,
+                  selection='truncation', crossover='single_point', adaptive_mutation=False,
+                  avoid_duplicates=False, tournament_size=3, history=None):
+    """
+    The GA's search loop over slate bitmasks (see slate_mask), starting from a
+    probability-weighted random population. Crossover and mutation are integer bit operations.
+    'fitness' is any callable on a mask.
+
+    Operators:
+    - selection: 'truncation' breeds from the top half; 'tournament' takes the best of
+      'tournament_size' random individuals for each parent.
+    - crossover: 'single_point' takes games before a random split from the first parent
+      (so it depends on game entry order); 'uniform' takes each game from either parent.
+    - adaptive_mutation: steers the flip rate by population diversity (DIVERSITY_TARGET).
+    - avoid_duplicates: a child already in the next generation gets extra flips (a few
+      tries) so the population keeps distinct slates.
+
+    If 'history' is a list, the best fitness of each generation is appended to it.
+    Returns the final population.
+    """
+    if selection not in SELECTIONS:
+        raise ValueError(f"selection must be one of {SELECTIONS}")
+    if crossover not in CROSSOVERS:
+        raise ValueError(f"crossover must be one of {CROSSOVERS}")
+    rng = make_rng(rng)
+    num_games = len(game_probs)
+    full_mask = (1 << num_games) - 1
+    dog_probs = [probs['underdog']['prob'] for probs in game_probs]
+    rate = mutation_rate
+    # Only track every distinct slate evaluated when profiling asks for it.
+    seen_slates = set() if profiling.ENABLED else None
 
     def create_individual():
         """Creates one random individual, weighted by probability."""
-        picks = []
-        for prob_info in game_probs:
-            pick = random.choices(
-                [prob_info['favorite']['team'], prob_info['underdog']['team']],
-                weights=[prob_info['favorite']['prob'], prob_info['underdog']['prob']]
-            )[0]
-            picks.append(pick)
-        return picks
+        individual = 0
+        for i, dog_prob in enumerate(dog_probs):
+            if rng.random() < dog_prob:
+                individual |= 1 << i
+        return individual
+
+    def mutate(child, rate):
+        for i in range(num_games):
+            if rng.random() < rate:
+                # Flip the pick
+                child ^= 1 << i
+        return child
 
     # --- GA Execution ---
     
     # 1. Initialization
-    population = [create_individual() for _ in range(population_size)]
+    with profiling.timer('ga.initialization'):
+        population = [create_individual() for _ in range(population_size)]
 
     for _ in range(generations):
         # 2. Evaluation
-        pop_with_fitness = [(ind, calculate_fitness(ind)) for ind in population]
-        
-        # 3. Selection (Elitism: keep top 50%)
-        pop_with_fitness.sort(key=lambda x: x[1][0], reverse=True)
-        parent_pool = [ind for ind, fit in pop_with_fitness[:population_size // 2]]
-        
-        # 4. Crossover & Mutation
-        offspring = []
-        while len(offspring) < population_size:
-            parent1, parent2 = random.choices(parent_pool, k=2)
-            
-            # Single-point crossover
-            if len(games) < 2:
-                child = parent1[:] # Avoid mutation by reference
+        with profiling.timer('ga.evaluation'):
+            pop_with_fitness = [(ind, fitness(ind)) for ind in population]
+        profiling.count('ga.evaluations', len(population))
+        if seen_slates is not None:
+            seen_slates.update(population)
+        if history is not None:
+            history.append(max(fit for _, fit in pop_with_fitness))
+        if adaptive_mutation:
+            diversity = len(set(population)) / len(population)
+            if diversity < DIVERSITY_TARGET:
+                rate = min(rate * MUTATION_STEP, MAX_MUTATION_RATE)
             else:
-                split_point = random.randint(1, len(games) - 1)
-                child = parent1[:split_point] + parent2[split_point:]
-            
-            # Mutation
-            for i in range(len(child)):
-                if random.random() < mutation_rate:
-                    # Flip the pick
-                    child[i] = game_probs[i]['underdog']['team'] if child[i] == game_probs[i]['favorite']['team'] else game_probs[i]['favorite']['team']
-            
-            offspring.append(child)
+                rate = max(rate / MUTATION_STEP, mutation_rate)
+
+        # 3. Selection
+        with profiling.timer('ga.selection'):
+            pop_with_fitness.sort(key=lambda x: x[1], reverse=True)
+            if selection == 'truncation':
+                # Elitism: keep top 50%
+                parent_pool = [ind for ind, fit in pop_with_fitness[:population_size // 2]]
+
+                def pick_parents():
+                    return rng.choices(parent_pool, k=2)
+            else:
+                # With the population ranked, a tournament's winner is its lowest drawn rank.
+                ranked = [ind for ind, fit in pop_with_fitness]
+
+                def pick_parents():
+                    return [ranked[min(rng.randrange(len(ranked)) for _ in range(tournament_size))]
+                            for _ in range(2)]
+
+        # 4. Crossover & Mutation
+        with profiling.timer('ga.crossover_mutation'):
+            offspring = []
+            offspring_set = set()
+            while len(offspring) < population_size:
+                parent1, parent2 = pick_parents()
+
+                if crossover == 'uniform':
+                    from_first = rng.getrandbits(num_games) if num_games else 0
+                    child = (parent1 & from_first) | (parent2 & ~from_first & full_mask)
+                elif num_games < 2:
+                    child = parent1
+                else:
+                    # Single-point crossover: games before the split come from parent1
+                    low_bits = (1 << rng.randint(1, num_games - 1)) - 1
+                    child = (parent1 & low_bits) | (parent2 & ~low_bits & full_mask)
+
+                child = mutate(child, rate)
+                if avoid_duplicates and num_games:
+                    for _ in range(3):
+                        if child not in offspring_set:
+                            break
+                        child ^= 1 << rng.randrange(num_games)
+                    offspring_set.add(child)
+
+                offspring.append(child)
         population = offspring # New generation replaces the old
 
-    # Get final, unique slates from the last generation
-    final_population_details = []
-    unique_slates = set()
-    for ind in population:
-        fitness, overall_prob, underdog_count = calculate_fitness(ind)
-        slate_tuple = tuple(ind)
-        if slate_tuple not in unique_slates:
-            final_population_details.append({
-                'picks': ind,
-                'fitness': fitness,
-                'overall_prob': overall_prob,
-                'underdog_count': underdog_count
-            })
-            unique_slates.add(slate_tuple)
-    
+    if seen_slates is not None:
+        seen_slates.update(population)
+        profiling.set_value('ga.unique_slates_seen', len(seen_slates))
+    profiling.count('ga.runs')
+    return population
+
+
+def describe_slates(games, game_probs, masks, fitness, num_slates=5, proxy=None):
+    """
+    The best 'num_slates' distinct masks by fitness as slate dicts: mask, picks, fitness,
+    overall_prob, underdog_count and the exact correct-pick distribution.
+    """
+    proxy = proxy or ProxyFitness(game_probs)
+    details = []
+    for mask in set(masks):
+        details.append({
+            'mask': mask,
+            'fitness': fitness(mask),
+            'overall_prob': proxy.overall_prob(mask),
+            'underdog_count': mask.bit_count()
+        })
+
     # Return the best N slates, sorted by fitness
-    final_population_details.sort(key=lambda x: x['fitness'], reverse=True)
-    return final_population_details[:num_slates]
+    details.sort(key=lambda x: (x['fitness'], -x['mask']), reverse=True)
+    return _add_distributions(games, game_probs, details[:num_slates])
+
+
+def _add_distributions(games, game_probs, slates):
+    """Adds picks and the exact correct-pick distribution to slate dicts that have a 'mask'."""
+    dists = correct_distributions(game_probs, [slate['mask'] for slate in slates])
+    for slate, dist in zip(slates, dists):
+        slate['picks'] = mask_picks(games, slate['mask'])
+        slate['correct_dist'] = dist
+        slate['expected_correct'], slate['tail_probs'] = summarize_distribution(dist)
+    return slates
+
+
+def risk_frontier(games, underdog_bonus=0.45):
+    """
+    The most likely slate for every underdog count from 0 to len(games): the Pareto front
+    of success chance against risk, in one sort (see best_slates_by_underdogs).
+    Returns slate dicts in underdog-count order, scored with the proxy fitness.
+    """
+    if not games:
+        return []
+    game_probs = game_probabilities(games)
+    fav_probs = [probs['favorite']['prob'] for probs in game_probs]
+    slates = [{'mask': mask, 'fitness': prob * (1 + underdog_bonus * k), 'overall_prob': prob, 'underdog_count': k}
+              for k, (mask, prob) in enumerate(best_slates_by_underdogs(fav_probs))]
+    return _add_distributions(games, game_probs, slates)
+
+
+def generate_slates_ga(games, num_slates=5, population_size=500, generations=300, mutation_rate=0.07, underdog_bonus=0.45, fitness_fn=None, rng=None,
+                       selection='truncation', crossover='single_point', adaptive_mutation=False, avoid_duplicates=False):
+    """
+    Generates optimized slates of picks using a Genetic Algorithm.
+    [TUNING: underdog_bonus default changed from .05 to 0.45 for N=15 pool]
+    If 'fitness_fn' is given (e.g. PoolSimulator.win_probability), it scores each
+    slate bitmask instead of the joint probability x underdog bonus proxy.
+    Each returned slate has its 'mask' and the expanded 'picks'.
+    'rng' (a random.Random or an int seed) makes a run reproducible; unseeded by default.
+    The operator options are evolve_slates'.
+    """
+    if not games:
+        return []
+
+    with profiling.timer('ga.probabilities'):
+        game_probs = game_probabilities(games)
+        proxy = ProxyFitness(game_probs, underdog_bonus)
+    fitness = fitness_fn or proxy
+
+    population = evolve_slates(game_probs, fitness, population_size, generations, mutation_rate, rng,
+                               selection=selection, crossover=crossover, adaptive_mutation=adaptive_mutation,
+                               avoid_duplicates=avoid_duplicates)
+
+    # Get final, unique slates from the last generation
+    with profiling.timer('ga.finalize'):
+        return describe_slates(games, game_probs, population, fitness, num_slates, proxy)
 
 
 def get_game():
     """
     Gathers all data for a single game from the user.
     Calculates all adjustments and returns a final 'adjusted_spread'.
-    Returns a tuple: (favorite, underdog, raw_spread, adjusted_spread, pick)
+    Returns a tuple: (favorite, underdog, raw_spread, adjusted_spread, pick, adjustments)
     [REVISION: 'pick' is now returned as None, as the GA should make the final pick.]
+    'adjustments' is the fired list from calculate_adjusted_spread, for adjustment_tracking.
     """
     print("Type 'q' or 'quit' at any time to return to main menu.")
     
@@ -286,8 +624,6 @@ def get_game():
             print("\nOperation cancelled.")
             return None
     
-    adjusted_spread = spread
-
     while True:
         home_team_input = input("Which team is home? (Enter 'f' for favorite, 'u' for underdog, 'q' to quit): ").strip()
         home_team = normalize_input(home_team_input)
@@ -307,9 +643,6 @@ def get_game():
             print("Please enter 'f' for favorite, 'u' for underdog, or 'q' to quit.")
 
     
-    if home_team == "underdog":
-        adjusted_spread -= 0.5
-    
     while True:
         prime_time_input = input("Is this a prime time game Thursday, Sunday, or Monday night? (y/n/q): ").strip()
         prime_time = normalize_input(prime_time_input)
@@ -325,42 +658,41 @@ def get_game():
         else:
             print("Please enter 'y' for yes, 'n' for no, or 'q' to quit.")
     
-    if prime_time == 'yes':
-        if home_team == "favorite":
-            adjusted_spread += 0.5
-        elif home_team == "underdog":
-            adjusted_spread -= 1.0 
+    rest_advantage = ask_rest_advantage()
+    if rest_advantage is None: return None 
     
 
-    adjusted_spread = adjust_for_rest(adjusted_spread)
-    if adjusted_spread is None: return None 
+    streaks = ask_win_streaks(favorite, underdog)
+    if streaks is None: return None 
     
 
-    adjusted_spread = adjust_for_momentum(favorite, underdog, adjusted_spread)
-    if adjusted_spread is None: return None 
-    
-
-    if is_division_game(favorite, underdog):
-        print("-> Division game detected - applying 0.85x modifier.")
-        adjusted_spread = adjusted_spread * 0.85
+    adjusted_spread, fired = calculate_adjusted_spread(
+        favorite, underdog, spread, home_team=home_team, prime_time=(prime_time == 'yes'),
+        rest_advantage=rest_advantage, fav_streak=streaks[0], dog_streak=streaks[1])
+    for adjustment_type, _, _ in fired:
+        if adjustment_type in ADJUSTMENT_MESSAGES:
+            print(ADJUSTMENT_MESSAGES[adjustment_type])
     
     print(f"\nOriginal spread: {spread:.1f}")
     print(f"Final Adjusted spread: {adjusted_spread:.1f}")
     
     pick = None
     
-    return(favorite, underdog, spread, adjusted_spread, pick)
+    return(favorite, underdog, spread, adjusted_spread, pick, fired)
 
-def score(points):
+TIEBREAKER_TOTALS = (41, 37, 51, 44, 40, 43, 47, 33, 48, 30, 34, 55, 45)
+
+@lru_cache(maxsize=256)
+def score_weights(points):
     """
-    Selects a weighted random score for the tiebreaker.
-    'points' is the O/U total for the tiebreaker game.
+    Normalized tiebreaker weights over TIEBREAKER_TOTALS for an O/U of 'points'.
+    Cached, since the same O/U values come up week after week.
     
     This function weights two things:
     1. Closeness to the O/U (distance_weight)
     2. Preference for common NFL totals (position_weight, nums array)
     """
-    nums = [41, 37, 51, 44, 40, 43, 47, 33, 48, 30, 34, 55, 45]
+    nums = TIEBREAKER_TOTALS
     total = float(points)
     
     weights = []
@@ -377,51 +709,29 @@ def score(points):
         combined_weight = distance_weight * position_weight
         weights.append(combined_weight)
     
-    # Normalize weights and make a random choice
     total_weight = sum(weights)
     
     if total_weight == 0 or math.isnan(total_weight):
-        return random.choice(nums)
+        return tuple(1.0 / len(nums) for _ in nums)
         
-    normalized_weights = [w / total_weight for w in weights]
-    
-    selected_total = random.choices(nums, weights=normalized_weights)[0]
-    
-    return selected_total
+    return tuple(w / total_weight for w in weights)
+
+def score(points, rng=None):
+    """
+    Selects a weighted random score for the tiebreaker.
+    'points' is the O/U total for the tiebreaker game.
+    See score_weights for how the candidate totals are weighted.
+    'rng' is a random.Random or seed (see make_rng).
+    """
+    return make_rng(rng).choices(TIEBREAKER_TOTALS, weights=score_weights(float(points)))[0]
 
 def is_division_game(favorite_full, underdog_full):
     """Checks if two teams are in the same division."""
-    favorite_abbr = None
-    underdog_abbr = None
-    
-    for abbr, name in TEAMS.items():
-        if name == favorite_full:
-            favorite_abbr = abbr
-        if name == underdog_full:
-            underdog_abbr = abbr
-    
-    if not favorite_abbr or not underdog_abbr:
-        return False 
-    
-    divisions = {
-        'AFC_EAST': ['buf', 'mia', 'ne', 'nyj'],
-        'AFC_NORTH': ['bal', 'cin', 'cle', 'pit'],
-        'AFC_SOUTH': ['hou', 'ind', 'jax', 'ten'],
-        'AFC_WEST': ['den', 'kc', 'lac', 'lv'],
-        'NFC_EAST': ['dal', 'nyg', 'phi', 'was'],
-        'NFC_NORTH': ['chi', 'det', 'gb', 'mn'],
-        'NFC_SOUTH': ['atl', 'car', 'no', 'tb'],
-        'NFC_WEST': ['ari', 'lar', 'sea', 'sf']
-    }
-    
-    for division in divisions.values():
-        if favorite_abbr in division and underdog_abbr in division:
-            return True
-    
-    return False
+    division = DIVISION_BY_TEAM.get(favorite_full)
+    return division is not None and division == DIVISION_BY_TEAM.get(underdog_full)
 
-def adjust_for_momentum(favorite, underdog, spread):
-    """Adjusts spread based on 3+ game winning streaks."""
+def ask_win_streaks(favorite, underdog):
+    """Asks whether each team is on a 3+ game win streak. Returns (fav_streak, dog_streak) or None to quit."""
     while True:
         fav_input = input(f"Is {favorite} on a 3+ game win streak? (y/n/q): ").strip()
         fav_streak = normalize_input(fav_input)
@@ -448,18 +758,10 @@ def adjust_for_momentum(favorite, underdog, spread):
         else:
             print("Please enter 'y' or 'n'.")
     
-    adjustment = 0
-    if fav_streak == 'yes':
-        adjustment += 1.0 
-        print("-> Momentum adjustment: +1.0 (fav streak)")
-    if dog_streak == 'yes':
-        adjustment -= 1.0 
-        print("-> Momentum adjustment: -1.0 (dog streak)")
-        
-    return spread + adjustment
+    return fav_streak == 'yes', dog_streak == 'yes'
 
-def adjust_for_rest(spread):
-    """Adjusts spread for significant rest advantage (e.g., bye week vs. short week)."""
+def ask_rest_advantage():
+    """Asks which team has a significant rest advantage. Returns 'favorite', 'underdog', 'neither' or None to quit."""
     while True:
         rest_input = input("Rest advantage? ('f' fav, 'u' dog, 'n' neither, 'q' quit): ").strip()
         rest_advantage = normalize_input(rest_input)
@@ -479,11 +781,60 @@ def adjust_for_rest(spread):
         else:
             print("Please enter: 'f', 'u', 'n', or 'q'.")
     
-    if rest_advantage == "favorite":
-        print("-> Rest adjustment: +1.0 (fav advantage)")
-        return spread + 1.0
-    elif rest_advantage == "underdog":
-        print("-> Rest adjustment: -1.5 (dog advantage)")
-        return spread - 1.5
-    
-    return spread 
\ No newline at end of file
+    return rest_advantage
+
+# Spread adjustments applied by get_game, in points added to the favorite's spread.
+# 'division' is a multiplier applied last.
+ADJUSTMENT_VALUES = {
+    'home_underdog': -0.5,
+    'prime_time_home_favorite': 0.5,
+    'prime_time_home_underdog': -1.0,
+    'rest_favorite': 1.0,
+    'rest_underdog': -1.5,
+    'momentum_favorite': 1.0,
+    'momentum_underdog': -1.0,
+    'division': 0.85,
+}
+
+ADJUSTMENT_MESSAGES = {
+    'rest_favorite': "-> Rest adjustment: +1.0 (fav advantage)",
+    'rest_underdog': "-> Rest adjustment: -1.5 (dog advantage)",
+    'momentum_favorite': "-> Momentum adjustment: +1.0 (fav streak)",
+    'momentum_underdog': "-> Momentum adjustment: -1.0 (dog streak)",
+    'division': "-> Division game detected - applying 0.85x modifier.",
+}
+
+def calculate_adjusted_spread(favorite, underdog, spread, home_team='favorite', prime_time=False,
+                              rest_advantage='neither', fav_streak=False, dog_streak=False, values=None):
+    """
+    Applies get_game's spread adjustments without prompting.
+    'values' can override ADJUSTMENT_VALUES (e.g. fitted magnitudes).
+    Returns (adjusted_spread, fired) where 'fired' lists
+    (adjustment_type, spread_before, spread_after) in the order they were applied.
+    """
+    values = values or ADJUSTMENT_VALUES
+    fired = []
+    adjusted_spread = spread
+
+    def apply(adjustment_type):
+        nonlocal adjusted_spread
+        before = adjusted_spread
+        if adjustment_type == 'division':
+            adjusted_spread = adjusted_spread * values['division']
+        else:
+            adjusted_spread += values[adjustment_type]
+        fired.append((adjustment_type, before, adjusted_spread))
+
+    if home_team == 'underdog':
+        apply('home_underdog')
+    if prime_time:
+        apply('prime_time_home_favorite' if home_team == 'favorite' else 'prime_time_home_underdog')
+    if rest_advantage in ('favorite', 'underdog'):
+        apply(f'rest_{rest_advantage}')
+    if fav_streak:
+        apply('momentum_favorite')
+    if dog_streak:
+        apply('momentum_underdog')
+    if is_division_game(favorite, underdog):
+        apply('division')
+    return adjusted_spread, fired
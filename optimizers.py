@@ -0,0 +1,435 @@
+import argparse
+import heapq
+import json
+import math
+import random
+import time
+
+from nflpick import (ProxyFitness, best_proxy_slate, best_slates_by_underdogs, correct_distributions, describe_slates,
+                     evolve_slates, game_probabilities, make_rng, mask_picks, spread_probabilities,
+                     summarize_distribution)
+from pool_sim import PoolSimulator, portfolio_probability, select_portfolio
+
+# Engine used when none is chosen, by week size (largest threshold <= number of games).
+# From `python optimizers.py` (proxy and --pool-size 50) on 8/12/16-game weeks, beam search
+# found the best slate on every seed at under 1% of the GA's time and about a fifth of annealing's.
+DEFAULT_ENGINE_BY_SIZE = ((0, 'beam'),)
+
+# GA operator sets compared by `python optimizers.py --ga-operators` (see evolve_slates).
+GA_OPERATOR_PRESETS = {
+    'current': {},
+    'tournament': {'selection': 'tournament'},
+    'uniform': {'crossover': 'uniform'},
+    'adaptive': {'adaptive_mutation': True},
+    'no-duplicates': {'avoid_duplicates': True},
+    'all': {'selection': 'tournament', 'crossover': 'uniform', 'adaptive_mutation': True, 'avoid_duplicates': True},
+}
+
+# generated_slates.method of a jointly chosen multi-entry portfolio.
+PORTFOLIO_METHOD = 'PORTFOLIO-POOL'
+
+# Slates the shared search keeps per underdog_bonus for generate_pool_slates to re-rank.
+POOL_CANDIDATES = 200
+
+
+class PoolWinFitness:
+    """Simulated first-place share in a pool (see PoolSimulator), callable on a slate bitmask."""
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+
+    def __call__(self, mask):
+        return self.simulator.win_probability(mask)
+
+
+class Optimizer:
+    """
+    A slate search strategy. Subclasses implement search(game_probs, fitness, top_n, rng),
+    returning candidate bitmasks; optimize() turns those into the best 'top_n' slates in the
+    same shape generate_slates_ga returns. 'fitness' is any callable on a mask
+    (ProxyFitness, PoolWinFitness, ...). 'rng' is a random.Random or an int seed.
+    """
+    name = None
+
+    def search(self, game_probs, fitness, top_n, rng):
+        raise NotImplementedError
+
+    def optimize(self, games, fitness=None, top_n=5, rng=None):
+        if not games:
+            return []
+        game_probs = game_probabilities(games)
+        proxy = ProxyFitness(game_probs)
+        fitness = fitness or proxy
+        masks = self.search(game_probs, fitness, top_n, make_rng(rng))
+        return describe_slates(games, game_probs, masks, fitness, top_n, proxy)
+
+
+class GAOptimizer(Optimizer):
+    """The genetic algorithm behind generate_slates_ga; 'operators' are evolve_slates' options."""
+    name = 'ga'
+
+    def __init__(self, population_size=500, generations=300, mutation_rate=0.07, **operators):
+        self.population_size = population_size
+        self.generations = generations
+        self.mutation_rate = mutation_rate
+        self.operators = operators
+
+    def search(self, game_probs, fitness, top_n, rng):
+        return evolve_slates(game_probs, fitness, self.population_size, self.generations, self.mutation_rate, rng,
+                             **self.operators)
+
+
+class AnnealingOptimizer(Optimizer):
+    """
+    Simulated annealing over single-pick flips with a geometric cooling schedule.
+    Moves are judged on log fitness, so the temperature means the same thing for the proxy
+    and for pool-win shares. The first run starts from the most likely slate, restarts from
+    probability-weighted random slates. Every slate visited is kept for the top_n.
+    """
+    name = 'anneal'
+
+    def __init__(self, steps=6000, restarts=3, start_temp=1.0, end_temp=0.005):
+        self.steps = steps
+        self.restarts = restarts
+        self.start_temp = start_temp
+        self.end_temp = end_temp
+
+    def search(self, game_probs, fitness, top_n, rng):
+        num_games = len(game_probs)
+        dog_probs = [probs['underdog']['prob'] for probs in game_probs]
+        visited = {}
+
+        def score(mask):
+            if mask not in visited:
+                visited[mask] = fitness(mask)
+            return math.log(max(visited[mask], 1e-300))
+
+        steps_per_run = max(self.steps // self.restarts, 1)
+        cooling = (self.end_temp / self.start_temp) ** (1 / steps_per_run)
+        for run in range(self.restarts):
+            if run == 0:
+                current = sum(1 << i for i, p in enumerate(dog_probs) if p > 0.5)
+            else:
+                current = sum(1 << i for i, p in enumerate(dog_probs) if rng.random() < p)
+            current_score = score(current)
+            temp = self.start_temp
+            for _ in range(steps_per_run):
+                candidate = current ^ (1 << rng.randrange(num_games))
+                candidate_score = score(candidate)
+                if candidate_score >= current_score or rng.random() < math.exp((candidate_score - current_score) / temp):
+                    current, current_score = candidate, candidate_score
+                temp *= cooling
+        return heapq.nlargest(top_n, visited, key=visited.get)
+
+
+class BeamOptimizer(Optimizer):
+    """
+    Beam search over pick decisions, most uncertain game first. A partial slate is scored
+    by completing its undecided games with their more likely side, so keeping a game's
+    likely side costs nothing and each level needs one evaluation per beam entry.
+    The 'beam_width' best partial slates survive each level.
+    """
+    name = 'beam'
+
+    def __init__(self, beam_width=64):
+        self.beam_width = beam_width
+
+    def search(self, game_probs, fitness, top_n, rng):
+        dog_probs = [probs['underdog']['prob'] for probs in game_probs]
+        likely = sum(1 << i for i, p in enumerate(dog_probs) if p > 0.5)
+        order = sorted(range(len(dog_probs)), key=lambda i: abs(dog_probs[i] - 0.5))
+        scores = {likely: fitness(likely)}
+        beam = [likely]
+        for i in order:
+            children = []
+            for mask in beam:
+                flipped = mask ^ (1 << i)
+                if flipped not in scores:
+                    scores[flipped] = fitness(flipped)
+                children.extend((mask, flipped))
+            beam = heapq.nlargest(self.beam_width, children, key=scores.get)
+        return heapq.nlargest(top_n, scores, key=scores.get)
+
+
+ENGINES = {
+    'ga': GAOptimizer,
+    'anneal': AnnealingOptimizer,
+    'beam': BeamOptimizer,
+}
+
+
+def default_engine(num_games):
+    """Engine name to use for a week with 'num_games' games (see DEFAULT_ENGINE_BY_SIZE)."""
+    name = DEFAULT_ENGINE_BY_SIZE[0][1]
+    for threshold, engine in DEFAULT_ENGINE_BY_SIZE:
+        if num_games >= threshold:
+            name = engine
+    return name
+
+
+def method_name(engine, pool=False):
+    """generated_slates.method for an engine's slates, e.g. 'BEAM' or 'ANNEAL-POOL'."""
+    return engine.upper() + ('-POOL' if pool else '')
+
+
+def run_optimizer(games, engine=None, pool_size=0, num_slates=5, entries=1, rng=None):
+    """
+    Runs the named engine (default_engine if None) with the proxy fitness, or pool-win fitness
+    for pool_size > 1. With entries > 1 in a pool, returns that many slates chosen jointly as
+    a portfolio instead (optimize_portfolio, with the engine generating the candidates). 'rng' (a random.Random or int seed) drives every
+    random draw, so a seeded run is reproducible. Returns (method, slates).
+    """
+    rng = make_rng(rng)
+    engine = engine or default_engine(len(games))
+    if pool_size and pool_size > 1 and entries > 1:
+        slates, _, _ = optimize_portfolio(games, pool_size, entries, rng=rng, engine=engine)
+        return PORTFOLIO_METHOD, slates
+    if pool_size and pool_size > 1:
+        fitness = PoolWinFitness(PoolSimulator(games, pool_size=pool_size, seed=rng.getrandbits(63)))
+    else:
+        fitness = None
+    slates = ENGINES[engine]().optimize(games, fitness, top_n=num_slates, rng=rng)
+    return method_name(engine, fitness is not None), slates
+
+
+def optimize_portfolio(games, pool_size, num_entries=5, num_candidates=500, simulator=None, rng=None, engine=None):
+    """
+    Chooses 'num_entries' slates jointly to maximize the chance at least one of them finishes
+    first (see select_portfolio), all scored against one shared set of simulated weeks.
+    Candidates are the 'num_candidates' best slates 'engine' (default_engine if None) finds
+    by pool-win fitness, plus the risk frontier. Returns (slates in selection order, each with
+    'marginal_gain' and 'portfolio_prob'; the portfolio's chance; the same chance for the
+    'num_entries' individually best slates, for comparison).
+    """
+    if not games:
+        return [], 0.0, 0.0
+    rng = make_rng(rng)
+    simulator = simulator or PoolSimulator(games, pool_size=pool_size, seed=rng.getrandbits(63))
+    fitness = PoolWinFitness(simulator)
+    game_probs = game_probabilities(games)
+    optimizer = ENGINES[engine or default_engine(len(games))]()
+    found = list(dict.fromkeys(optimizer.search(game_probs, fitness, num_candidates, rng)))
+    # The GA returns its final population unranked; a stable sort keeps the beam's own order.
+    shares = dict(zip(found, simulator.win_probabilities(found)))
+    candidates = sorted(found, key=shares.get, reverse=True)[:num_candidates]
+    independent = candidates[:num_entries]
+    candidates += [mask for mask, _ in best_slates_by_underdogs([probs['favorite']['prob'] for probs in game_probs])]
+
+    chosen = select_portfolio(simulator, candidates, num_entries)
+    slates = describe_slates(games, game_probs, [mask for mask, _, _ in chosen], fitness, num_entries)
+    order = {mask: (i, gain, prob) for i, (mask, gain, prob) in enumerate(chosen)}
+    for slate in slates:
+        _, slate['marginal_gain'], slate['portfolio_prob'] = order[slate['mask']]
+    slates.sort(key=lambda slate: order[slate['mask']][0])
+    return slates, chosen[-1][2], portfolio_probability(simulator, independent)
+
+
+def generate_pool_slates(games, pools, num_slates=5, rng=None):
+    """
+    Slates for several pools sharing one week's games, in one batched run. Probabilities and
+    the proxy's probability tables are built once, the beam search runs once per distinct
+    underdog_bonus, and each pool re-ranks the shared candidates under its own bonus.
+    Pools with a pool size are scored like run_optimizer's pool runs: single-entry pools
+    re-rank the candidates (plus the risk frontier) by pool-win fitness, and pools submitting
+    several entries get a portfolio (optimize_portfolio), with one simulator shared per pool
+    size. Correct-pick distributions are computed once per distinct slate.
+
+    'pools' are fetch_pools dicts. Returns {pool id: (method, slates)}; each pool gets
+    max(num_slates, entries) slates, the first ones carrying its entrants' 'entrant_id'.
+    """
+    if not games or not pools:
+        return {}
+    rng = make_rng(rng)
+    game_probs = game_probabilities(games)
+    base = ProxyFitness(game_probs)
+    candidates = {}
+    for bonus in sorted({pool['underdog_bonus'] for pool in pools}):
+        candidates.update(dict.fromkeys(BeamOptimizer().search(game_probs, base.with_bonus(bonus), POOL_CANDIDATES, rng)))
+    pool_candidates = list(dict.fromkeys(
+        list(candidates) + [mask for mask, _ in best_slates_by_underdogs([p['favorite']['prob'] for p in game_probs])]))
+    probs = {mask: base.overall_prob(mask) for mask in pool_candidates}
+
+    simulators = {}
+    results = {}
+    for pool in pools:
+        count = max(num_slates, pool['entries'] or 1)
+        pool_size = pool['pool_size'] or 0
+        if pool_size > 1 and pool_size not in simulators:
+            simulators[pool_size] = PoolSimulator(games, pool_size=pool_size, seed=rng.getrandbits(63))
+        if pool_size > 1 and (pool['entries'] or 1) > 1:
+            slates, _, _ = optimize_portfolio(games, pool_size, count, simulator=simulators[pool_size], rng=rng)
+            method = PORTFOLIO_METHOD
+        elif pool_size > 1:
+            shares = dict(zip(pool_candidates, simulators[pool_size].win_probabilities(pool_candidates)))
+            ranked = sorted(pool_candidates, key=lambda mask: (shares[mask], -mask), reverse=True)
+            slates = [{'mask': mask, 'fitness': shares[mask], 'overall_prob': probs[mask],
+                       'underdog_count': mask.bit_count()} for mask in ranked[:count]]
+            method = method_name(BeamOptimizer.name, True)
+        else:
+            bonus = pool['underdog_bonus']
+            ranked = sorted(candidates, key=lambda mask: (probs[mask] * (1 + bonus * mask.bit_count()), -mask), reverse=True)
+            slates = [{'mask': mask, 'fitness': probs[mask] * (1 + bonus * mask.bit_count()),
+                       'overall_prob': probs[mask], 'underdog_count': mask.bit_count()} for mask in ranked[:count]]
+            method = method_name(BeamOptimizer.name)
+        for slate, entrant in zip(slates, pool['entrants']):
+            slate['entrant_id'] = entrant['id']
+        results[pool['id']] = (method, slates)
+
+    pending = {slate['mask'] for _, slates in results.values() for slate in slates if 'correct_dist' not in slate}
+    pending = list(pending)
+    dists = dict(zip(pending, correct_distributions(game_probs, pending)))
+    for _, slates in results.values():
+        for slate in slates:
+            if 'correct_dist' not in slate:
+                slate['picks'] = mask_picks(games, slate['mask'])
+                slate['correct_dist'] = dists[slate['mask']]
+                slate['expected_correct'], slate['tail_probs'] = summarize_distribution(slate['correct_dist'])
+    return results
+
+
+def synthetic_week(num_games, rng):
+    """A random week with spreads drawn from common NFL lines (for benchmarking)."""
+    lines = (1, 1.5, 2.5, 3, 3, 3.5, 4, 5.5, 6, 7, 7, 8.5, 9.5, 10, 13.5)
+    return [{'favorite': f"FAV{i}", 'underdog': f"DOG{i}", 'spread': rng.choice(lines)} for i in range(num_games)]
+
+
+def benchmark(sizes=(8, 12, 16), seeds=range(5), pool_size=0, num_sims=2000, engines=None):
+    """
+    Head-to-head run of every engine on the same synthetic weeks and seeds. Each engine
+    gets its own copy of the fitness (same simulated weeks for pool fitness) so no engine
+    benefits from another's cache. Reports per week size and engine the mean best fitness
+    as a share of the best known (the exact optimum for the proxy), mean time, and
+    share per millisecond.
+    """
+    engines = engines or ENGINES
+    results = []
+    for size in sizes:
+        rows = {name: {'share': 0.0, 'ms': 0.0} for name in engines}
+        for seed in seeds:
+            games = synthetic_week(size, random.Random(seed))
+            game_probs = game_probabilities(games)
+            best = {}
+            for name, engine_cls in engines.items():
+                if pool_size > 1:
+                    fitness = PoolWinFitness(PoolSimulator(games, pool_size=pool_size, num_sims=num_sims, seed=seed))
+                else:
+                    fitness = ProxyFitness(game_probs)
+                start = time.perf_counter()
+                slates = engine_cls().optimize(games, fitness, top_n=5, rng=random.Random(seed))
+                rows[name]['ms'] += (time.perf_counter() - start) * 1000
+                best[name] = slates[0]['fitness']
+            if pool_size > 1:
+                reference = max(best.values())
+            else:
+                fav_probs = [spread_probabilities(game['spread'])[0] for game in games]
+                reference = best_proxy_slate(fav_probs, fitness.underdog_bonus)[1]
+            for name in engines:
+                rows[name]['share'] += best[name] / reference if reference > 0 else 1.0
+        for name, row in rows.items():
+            share = row['share'] / len(seeds)
+            ms = row['ms'] / len(seeds)
+            results.append({'games': size, 'engine': name, 'share_of_best': share, 'ms': ms,
+                            'share_per_ms': share / ms if ms else None})
+    return results
+
+
+def ga_convergence(sizes=(12, 16), seeds=range(8), population_size=40, generations=200, presets=None):
+    """
+    Generations for the GA to first reach the exact proxy optimum, per operator preset, on
+    synthetic weeks with mixed lines and with only close games (1 to 3 points). A small
+    population keeps the default 500 from finding the optimum at random in generation one.
+    Also reports distinct slates in the final population and mean time per run.
+    """
+    presets = presets or GA_OPERATOR_PRESETS
+    results = []
+    for size in sizes:
+        for close in (False, True):
+            rows = {name: {'generations': [], 'unique': 0, 'ms': 0.0} for name in presets}
+            for seed in seeds:
+                rng = random.Random(seed)
+                games = synthetic_week(size, rng)
+                if close:
+                    for game in games:
+                        game['spread'] = rng.choice((1, 1.5, 2, 2.5, 3))
+                game_probs = game_probabilities(games)
+                fitness = ProxyFitness(game_probs)
+                optimum = best_proxy_slate([probs['favorite']['prob'] for probs in game_probs])[1]
+                for name, operators in presets.items():
+                    history = []
+                    start = time.perf_counter()
+                    population = evolve_slates(game_probs, fitness, population_size, generations, 0.07,
+                                               random.Random(seed), history=history, **operators)
+                    rows[name]['ms'] += (time.perf_counter() - start) * 1000
+                    rows[name]['generations'].append(
+                        next((g for g, best in enumerate(history, 1) if best >= optimum * (1 - 1e-9)), None))
+                    rows[name]['unique'] += len(set(population))
+            for name, row in rows.items():
+                reached = [g for g in row['generations'] if g is not None]
+                results.append({'games': size, 'lines': 'close' if close else 'mixed', 'operators': name,
+                                'converged': len(reached) / len(seeds),
+                                'mean_generations': sum(reached) / len(reached) if reached else None,
+                                'unique_final': row['unique'] / len(seeds), 'ms': row['ms'] / len(seeds)})
+    return results
+
+
+def print_ga_convergence(results, population_size):
+    print(f"\n===== GA OPERATORS: generations to reach the optimum (population {population_size}) =====")
+    print("{:<7} {:<7} {:<15} {:<11} {:<13} {:<14} {:<8}".format(
+        "Games", "Lines", "Operators", "Converged", "Generations", "Unique Final", "Mean ms"))
+    print("-" * 80)
+    for r in results:
+        print("{:<7} {:<7} {:<15} {:<11} {:<13} {:<14} {:<8}".format(
+            r['games'], r['lines'], r['operators'], f"{r['converged'] * 100:.0f}%",
+            f"{r['mean_generations']:.2f}" if r['mean_generations'] is not None else "N/A",
+            f"{r['unique_final']:.0f}", f"{r['ms']:.1f}"))
+
+
+def recommend(results, min_share=0.99):
+    """Per week size, the engine with the best share per ms among those within min_share of the best."""
+    picks = {}
+    for size in sorted({r['games'] for r in results}):
+        rows = [r for r in results if r['games'] == size]
+        good = [r for r in rows if r['share_of_best'] >= min_share] or rows
+        picks[size] = max(good, key=lambda r: r['share_per_ms'] or 0)['engine']
+    return picks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the slate optimizers head to head on the same seeds.")
+    parser.add_argument("--sizes", default="8,12,16", help="comma-separated week sizes (games)")
+    parser.add_argument("--seeds", type=int, default=5, help="number of seeds per week size")
+    parser.add_argument("--pool-size", type=int, default=0, help="benchmark pool-win fitness for this pool size")
+    parser.add_argument("--num-sims", type=int, default=2000, help="simulated weeks for pool fitness")
+    parser.add_argument("--ga-operators", action="store_true",
+                        help="compare GA operator presets by generations to converge instead")
+    parser.add_argument("--population-size", type=int, default=40, help="GA population for --ga-operators")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    sizes = tuple(int(s) for s in args.sizes.split(',') if s.strip())
+    if args.ga_operators:
+        results = ga_convergence(sizes, range(args.seeds), args.population_size)
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print_ga_convergence(results, args.population_size)
+        return
+    results = benchmark(sizes, range(args.seeds), args.pool_size, args.num_sims)
+    picks = recommend(results)
+    if args.json:
+        print(json.dumps({'results': results, 'recommended': picks}, indent=2))
+        return
+
+    objective = f"pool-win fitness ({args.pool_size} entrants)" if args.pool_size > 1 else "proxy fitness"
+    print(f"\n===== OPTIMIZER BENCHMARK: {objective}, {args.seeds} seeds =====")
+    print("{:<7} {:<8} {:<14} {:<12} {:<14}".format("Games", "Engine", "Share of Best", "Mean ms", "Share per ms"))
+    print("-" * 58)
+    for r in results:
+        print("{:<7} {:<8} {:<14} {:<12} {:<14}".format(
+            r['games'], r['engine'], f"{r['share_of_best'] * 100:.2f}%", f"{r['ms']:.1f}",
+            f"{r['share_per_ms']:.5f}" if r['share_per_ms'] else "N/A"))
+    print("\nRecommended default: " + ", ".join(f"{size} games -> {engine}" for size, engine in picks.items()))
+
+
+if __name__ == "__main__":
+    main()
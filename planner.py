@@ -0,0 +1,142 @@
+import math
+from functools import lru_cache
+
+from nflpick import game_probabilities
+
+# Cost used for week/team pairs that are not allowed; large enough never to be chosen
+# over a real option, finite so the Hungarian potentials stay well defined.
+BLOCKED_COST = 1e6
+
+
+def hungarian(cost):
+    """
+    Exact minimum-cost assignment (Hungarian algorithm with potentials, O(n^2 m)).
+    'cost' is an n x m matrix with n <= m; returns the column assigned to each row.
+    """
+    n = len(cost)
+    if n == 0:
+        return []
+    m = len(cost[0])
+    INF = float('inf')
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [INF] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = cost[i0 - 1]
+            delta = INF
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    reduced = row[j - 1] - u[i0] - v[j]
+                    if reduced < minv[j]:
+                        minv[j] = reduced
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while True:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+            if j0 == 0:
+                break
+
+    assignment = [None] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            assignment[p[j] - 1] = j - 1
+    return assignment
+
+
+@lru_cache(maxsize=None)
+def week_options(games):
+    """
+    Non-winner options for one week, memoized on the week's games so re-planning only
+    rebuilds weeks that changed. 'games' is a tuple of (favorite, underdog, adjusted_spread, pick).
+    As in the 'L' menu, the available team is the one not picked to win (the favorite if no pick).
+    Returns {team: chance the team does not win}.
+    """
+    probs = game_probabilities([{'favorite': f, 'underdog': d, 'spread': s} for f, d, s, _ in games])
+    options = {}
+    for (favorite, underdog, _, pick), game_probs in zip(games, probs):
+        side = 'underdog' if pick == favorite else 'favorite'
+        options[game_probs[side]['team']] = 1 - game_probs[side]['prob']
+    return options
+
+
+@lru_cache(maxsize=256)
+def solve_plan(week_games, used_teams):
+    """
+    Memoized season solve. 'week_games' is a tuple of (week, games) for weeks still to plan,
+    'used_teams' a frozenset of teams already spent. Maximizes the product of weekly success
+    chances, i.e. minimizes the summed -log(chance), with each team used at most once.
+    Returns a tuple of (week, team, success_prob), skipping weeks with no usable team.
+    """
+    weeks = [(week, week_options(games)) for week, games in week_games]
+    teams = sorted({team for _, options in weeks for team in options} - used_teams)
+    if not weeks or not teams:
+        return ()
+
+    columns = teams + [None] * len(weeks)  # one "no pick" slot per week keeps the problem feasible
+    cost = []
+    for _, options in weeks:
+        row = []
+        for team in columns:
+            if team is None:
+                row.append(BLOCKED_COST / 2)
+            elif team in options and options[team] > 0:
+                row.append(-math.log(options[team]))
+            else:
+                row.append(BLOCKED_COST)
+        cost.append(row)
+
+    plan = []
+    for (week, options), col in zip(weeks, hungarian(cost)):
+        team = columns[col]
+        if team is not None:
+            plan.append((week, team, options[team]))
+    return tuple(plan)
+
+
+def plan_non_winners(cur, year):
+    """
+    Plans non-winner picks for every entered week of 'year' that has no recorded pick yet,
+    excluding teams already used in 'non_winners'. Returns (plan, used) where plan is a list
+    of dicts (week, team, success_prob) and used maps team -> week it was used.
+    """
+    cur.execute("""
+        SELECT week, favorite, underdog, adjusted_spread, pick
+        FROM picks WHERE year = ? AND week IS NOT NULL
+        ORDER BY week, id
+    """, (year,))
+    games_by_week = {}
+    for row in cur.fetchall():
+        games_by_week.setdefault(row['week'], []).append(
+            (row['favorite'], row['underdog'], row['adjusted_spread'], row['pick']))
+
+    cur.execute("SELECT week, team FROM non_winners WHERE year = ? AND team IS NOT NULL", (year,))
+    used = {row['team']: row['week'] for row in cur.fetchall()}
+    decided_weeks = set(used.values())
+
+    week_games = tuple((week, tuple(games)) for week, games in sorted(games_by_week.items())
+                       if week not in decided_weeks)
+    plan = solve_plan(week_games, frozenset(used))
+    return [{'week': week, 'team': team, 'success_prob': prob} for week, team, prob in plan], used
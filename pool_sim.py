@@ -0,0 +1,297 @@
+import heapq
+
+from nflpick import game_probabilities, make_rng
+
+
+def bernoulli_bits(rng, p, num_bits, precision=16):
+    """
+    Returns a num_bits-wide integer whose bits are independently 1 with probability p
+    (rounded to 'precision' binary digits). Each bit is one simulated week.
+    """
+    level = int(round(p * (1 << precision)))
+    if level <= 0:
+        return 0
+    if level >= 1 << precision:
+        return (1 << num_bits) - 1
+
+    # Walk p's binary expansion from the lowest set digit up: OR-ing in a fresh random
+    # word maps P(bit) to (1 + P) / 2, AND-ing maps it to P / 2, so after the last
+    # digit every bit is set with probability level / 2**precision.
+    bits = 0
+    for k in range((level & -level).bit_length() - 1, precision):
+        word = rng.getrandbits(num_bits)
+        bits = bits | word if (level >> k) & 1 else bits & word
+    return bits
+
+
+def add_bits(planes, bits, shift=0):
+    """
+    Bit-sliced addition: 'planes' holds one integer per binary digit of a per-simulation
+    counter (plane k = bit k of every counter). Adds (bits << shift) to every counter at once.
+    """
+    while len(planes) < shift:
+        planes.append(0)
+    carry = bits
+    k = shift
+    while carry:
+        if k == len(planes):
+            planes.append(carry)
+            return
+        planes[k], carry = planes[k] ^ carry, planes[k] & carry
+        k += 1
+
+
+def add_weighted(planes, bits, weight):
+    """Adds 'weight' to every counter whose bit is set in 'bits' (one shifted add per set bit)."""
+    for j in range(weight.bit_length()):
+        if (weight >> j) & 1:
+            add_bits(planes, bits, j)
+
+
+def compare_planes(a, b, mask):
+    """Per-simulation comparison of two bit-sliced counters. Returns (a > b, a == b) bit masks."""
+    greater = 0
+    equal = mask
+    for k in range(max(len(a), len(b)) - 1, -1, -1):
+        a_k = a[k] if k < len(a) else 0
+        b_k = b[k] if k < len(b) else 0
+        greater |= equal & a_k & ~b_k
+        equal &= ~(a_k ^ b_k)
+    return greater & mask, equal & mask
+
+
+def decode_planes(planes, num_sims):
+    """Expands a bit-sliced counter into a plain list with one value per simulation."""
+    if not planes:
+        return [0] * num_sims
+    columns = [format(plane, f'0{num_sims}b')[::-1] for plane in planes]
+    weights = [1 << k for k in range(len(planes))]
+    return [sum(w for w, c in zip(weights, digits) if c == '1') for digits in zip(*columns)]
+
+
+def encode_planes(values, num_sims):
+    """Packs one value per simulation into a bit-sliced counter (inverse of decode_planes)."""
+    planes = []
+    for k in range(max(values, default=0).bit_length()):
+        digits = ''.join('1' if (v >> k) & 1 else '0' for v in reversed(values))
+        planes.append(int(digits, 2))
+    return planes
+
+
+def favorites_opponents(favorite_rate=0.85):
+    """Opponent model: each entrant takes the model favorite with probability 'favorite_rate'."""
+    def model(game_probs):
+        dog_pick_probs = []
+        for probs in game_probs:
+            underdog_favored = probs['underdog']['prob'] > probs['favorite']['prob']
+            dog_pick_probs.append(favorite_rate if underdog_favored else 1 - favorite_rate)
+        return dog_pick_probs
+    return model
+
+
+def proportional_opponents(game_probs):
+    """Opponent model: each entrant picks a side with that side's win probability."""
+    return [probs['underdog']['prob'] for probs in game_probs]
+
+
+class PoolSimulator:
+    """
+    Monte Carlo estimate of a slate's chance of finishing first in a pick'em pool.
+
+    Game outcomes and the opponents' entries are sampled once per simulator, so every
+    candidate slate is scored against the same simulated weeks (common random numbers).
+    Simulations are packed into the bits of Python integers, so one bitwise operation
+    advances every simulated week at once.
+
+    'seed' (an int or a random.Random) fixes the simulated weeks; unseeded by default.
+
+    Passing 'opponent_ranks' (confidence points per game) switches the pool to confidence
+    scoring: opponents weight each hit by those ranks, and candidates are scored with
+    confidence_win_probability instead of win_probability.
+    """
+
+    def __init__(self, games, pool_size=15, opponent_model=None, num_sims=4000, seed=None, opponent_ranks=None):
+        self.game_probs = game_probabilities(games)
+        self.pool_size = pool_size
+        self.num_sims = num_sims
+        self.mask = (1 << num_sims) - 1
+        self._cache = {}
+        self._first_bits = {}
+
+        rng = make_rng(seed)
+        self.dog_wins = [bernoulli_bits(rng, probs['underdog']['prob'], num_sims) for probs in self.game_probs]
+        self.fav_wins = [~bits & self.mask for bits in self.dog_wins]
+
+        # Best opponent score and how many opponents share it, per simulated week.
+        opponent_model = opponent_model or favorites_opponents()
+        dog_pick_probs = opponent_model(self.game_probs)
+        best = [-1] * num_sims
+        tied = [0] * num_sims
+        for _ in range(pool_size - 1):
+            planes = []
+            for i, p in enumerate(dog_pick_probs):
+                dog_picks = bernoulli_bits(rng, p, num_sims)
+                add_weighted(planes, ~(dog_picks ^ self.dog_wins[i]) & self.mask,
+                             opponent_ranks[i] if opponent_ranks else 1)
+            for s, value in enumerate(decode_planes(planes, num_sims)):
+                if value > best[s]:
+                    best[s], tied[s] = value, 1
+                elif value == best[s]:
+                    tied[s] += 1
+
+        self.best_planes = encode_planes([max(v, 0) for v in best], num_sims)
+        self.no_opponents = pool_size <= 1
+        self.tie_groups = {count: int(''.join('1' if t == count else '0' for t in reversed(tied)), 2)
+                           for count in set(tied)}
+
+    def _dog_mask(self, picks):
+        """Slate bitmask (bit i = underdog in game i) for a mask or a list of team names."""
+        if isinstance(picks, int):
+            return picks
+        mask = 0
+        for i, (pick, probs) in enumerate(zip(picks, self.game_probs)):
+            if pick == probs['underdog']['team']:
+                mask |= 1 << i
+        return mask
+
+    def _share(self, planes):
+        if self.no_opponents:
+            return 1.0
+        greater, equal = compare_planes(planes, self.best_planes, self.mask)
+        wins = float(greater.bit_count())
+        for count, group in self.tie_groups.items():
+            wins += (equal & group).bit_count() / (count + 1)
+        return wins / self.num_sims
+
+    def win_probability(self, picks):
+        """
+        Estimated first-place share for one slate (ties for first split the prize).
+        'picks' is a slate bitmask or a list of team names in game order.
+        """
+        key = self._dog_mask(picks)
+        if key not in self._cache:
+            planes = []
+            for i in range(len(self.game_probs)):
+                add_bits(planes, self.dog_wins[i] if (key >> i) & 1 else self.fav_wins[i])
+            self._cache[key] = self._share(planes)
+        return self._cache[key]
+
+    def _planes_by_prefix(self, keys):
+        """
+        Yields (key, score planes) for each slate bitmask. Slates are visited in game order,
+        so slates sharing a prefix of picks reuse the partial counters already built for it.
+        """
+        num_games = len(self.game_probs)
+        prefix = None
+        stack = [[]]
+        for key in sorted(set(keys), key=lambda k: [(k >> i) & 1 for i in range(num_games)]):
+            common = 0
+            if prefix is not None:
+                diff = prefix ^ key
+                common = (diff & -diff).bit_length() - 1 if diff else num_games
+            del stack[common + 1:]
+            for i in range(common, num_games):
+                planes = list(stack[-1])
+                add_bits(planes, self.dog_wins[i] if (key >> i) & 1 else self.fav_wins[i])
+                stack.append(planes)
+            prefix = key
+            yield key, stack[-1]
+
+    def win_probabilities(self, slates):
+        """Batch version of win_probability, sharing work between slates with common pick prefixes."""
+        keys = [self._dog_mask(picks) for picks in slates]
+        for key, planes in self._planes_by_prefix(k for k in keys if k not in self._cache):
+            self._cache[key] = self._share(planes)
+        return [self._cache[k] for k in keys]
+
+    def first_place_bits(self, slates):
+        """
+        For each slate, the simulated weeks (as bits) in which it finishes first or ties for
+        first. OR-ing these across entries gives the weeks at least one of them finishes first.
+        """
+        keys = [self._dog_mask(picks) for picks in slates]
+        for key, planes in self._planes_by_prefix(k for k in keys if k not in self._first_bits):
+            if self.no_opponents:
+                self._first_bits[key] = self.mask
+            else:
+                greater, equal = compare_planes(planes, self.best_planes, self.mask)
+                self._first_bits[key] = greater | equal
+        return [self._first_bits[k] for k in keys]
+
+    def confidence_win_probability(self, picks, ranks):
+        """Estimated first-place share for a confidence entry: each hit scores its rank."""
+        key = (self._dog_mask(picks), tuple(ranks))
+        if key not in self._cache:
+            planes = []
+            for i, rank in enumerate(key[1]):
+                add_weighted(planes, self.dog_wins[i] if (key[0] >> i) & 1 else self.fav_wins[i], rank)
+            self._cache[key] = self._share(planes)
+        return self._cache[key]
+
+
+def select_portfolio(simulator, candidates, num_entries):
+    """
+    Greedy multi-entry portfolio: repeatedly adds the candidate slate that finishes first in
+    the most simulated weeks none of the chosen entries already wins. That coverage is
+    submodular, so a candidate's gain only shrinks as entries are added: gains are refreshed
+    lazily from a heap, and greedy is within 1 - 1/e of the best portfolio.
+    Returns [(mask, marginal gain, P(at least one entry finishes first) so far)].
+    """
+    masks = list(dict.fromkeys(simulator._dog_mask(c) for c in candidates))
+    bits = simulator.first_place_bits(masks)
+    heap = [(-b.bit_count(), i) for i, b in enumerate(bits)]
+    heapq.heapify(heap)
+    covered = 0
+    chosen = []
+    while heap and len(chosen) < num_entries:
+        stale_gain, i = heapq.heappop(heap)
+        gain = (bits[i] & ~covered).bit_count()
+        if gain < -stale_gain:
+            heapq.heappush(heap, (-gain, i))
+            continue
+        covered |= bits[i]
+        chosen.append((masks[i], gain / simulator.num_sims, covered.bit_count() / simulator.num_sims))
+    return chosen
+
+
+def portfolio_probability(simulator, slates):
+    """P(at least one of 'slates' finishes first or ties for first) over the simulated weeks."""
+    covered = 0
+    for bits in simulator.first_place_bits(slates):
+        covered |= bits
+    return covered.bit_count() / simulator.num_sims
+
+
+def confidence_pool_search(simulator, picks, ranks, max_rounds=50):
+    """
+    Hill-climbing heuristic for the confidence pool-win objective. Starting from the given
+    entry (normally the expected-points optimum), it repeatedly takes the best single side
+    flip or rank swap until no move improves the simulated first-place share.
+    Returns (picks, ranks, win_probability).
+    """
+    picks = list(picks)
+    ranks = list(ranks)
+    other_side = {}
+    for probs in simulator.game_probs:
+        other_side[probs['favorite']['team']] = probs['underdog']['team']
+        other_side[probs['underdog']['team']] = probs['favorite']['team']
+
+    best = simulator.confidence_win_probability(picks, ranks)
+    for _ in range(max_rounds):
+        best_move = None
+        for i in range(len(picks)):
+            trial = picks[:i] + [other_side[picks[i]]] + picks[i + 1:]
+            value = simulator.confidence_win_probability(trial, ranks)
+            if value > best:
+                best, best_move = value, (trial, ranks)
+        for i in range(len(ranks)):
+            for j in range(i + 1, len(ranks)):
+                trial = list(ranks)
+                trial[i], trial[j] = trial[j], trial[i]
+                value = simulator.confidence_win_probability(picks, trial)
+                if value > best:
+                    best, best_move = value, (picks, trial)
+        if best_move is None:
+            break
+        picks, ranks = list(best_move[0]), list(best_move[1])
+    return picks, ranks, best
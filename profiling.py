@@ -0,0 +1,161 @@
+import atexit
+import cProfile
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+
+# Turned on by NFL_PROFILE=1 (or any non-empty value other than 0) or by calling enable(),
+# e.g. from a --profile flag. When off, timer() hands back a shared no-op context and
+# connect_db keeps the plain sqlite3 cursor, so the instrumentation costs next to nothing.
+ENABLED = False
+
+# Upper edges (in milliseconds) of the query latency histogram buckets.
+LATENCY_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+_phase_times = {}
+_counters = {}
+_queries = {}
+_profiler = None
+_json_path = None
+_cprofile_path = None
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def enable(json_path=None, cprofile_path=None):
+    """Starts collecting timings and registers the summary (and optional exports) for exit."""
+    global ENABLED, _profiler, _json_path, _cprofile_path
+    if ENABLED:
+        return
+    ENABLED = True
+    _json_path = json_path or os.environ.get("NFL_PROFILE_JSON")
+    _cprofile_path = cprofile_path or os.environ.get("NFL_PROFILE_CPROFILE")
+    if _cprofile_path:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    atexit.register(_report)
+
+
+@contextmanager
+def _timed(phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phase_times[phase] = _phase_times.get(phase, 0.0) + time.perf_counter() - start
+
+
+def timer(phase):
+    """Context manager adding the block's wall time to 'phase'. No-op when profiling is off."""
+    return _timed(phase) if ENABLED else _NULL_TIMER
+
+
+def count(name, n=1):
+    """Adds n to a named counter."""
+    if ENABLED:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def set_value(name, value):
+    """Records a named value (e.g. a set size) in the counters."""
+    if ENABLED:
+        _counters[name] = value
+
+
+def _statement_key(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def record_query(sql, seconds):
+    """Adds one query latency to the statement's histogram."""
+    key = _statement_key(sql)
+    stats = _queries.get(key)
+    if stats is None:
+        stats = _queries[key] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                 'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+    ms = seconds * 1000
+    stats['count'] += 1
+    stats['total_ms'] += ms
+    stats['max_ms'] = max(stats['max_ms'], ms)
+    for i, edge in enumerate(LATENCY_BUCKETS_MS):
+        if ms <= edge:
+            stats['buckets'][i] += 1
+            break
+    else:
+        stats['buckets'][-1] += 1
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """sqlite3 cursor that records the latency of every execute/executemany by statement."""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_query(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_query(sql, time.perf_counter() - start)
+
+
+def snapshot():
+    """Returns everything collected so far as a JSON-friendly dict."""
+    return {
+        'phases_ms': {phase: seconds * 1000 for phase, seconds in _phase_times.items()},
+        'counters': dict(_counters),
+        'queries': _queries,
+        'latency_buckets_ms': list(LATENCY_BUCKETS_MS),
+    }
+
+
+def print_summary(file=None):
+    """Prints per-phase times, counters and the slowest statements, to stderr by default so JSON output stays clean."""
+    file = file or sys.stderr
+    print("\n===== PROFILE SUMMARY =====", file=file)
+    if _phase_times:
+        print("Phases:", file=file)
+        for phase, seconds in sorted(_phase_times.items(), key=lambda x: x[1], reverse=True):
+            print(f"  {phase:<28} {seconds * 1000:>10.1f} ms", file=file)
+    if _counters:
+        print("Counters:", file=file)
+        for name, value in sorted(_counters.items()):
+            print(f"  {name:<28} {value:>10}", file=file)
+    if _queries:
+        print("Queries (by total time):", file=file)
+        for sql, stats in sorted(_queries.items(), key=lambda x: x[1]['total_ms'], reverse=True)[:15]:
+            mean = stats['total_ms'] / stats['count']
+            print(f"  {stats['count']:>6}x  mean {mean:7.3f} ms  max {stats['max_ms']:7.3f} ms  {sql[:70]}", file=file)
+
+
+def _report():
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(_cprofile_path)
+        print(f"cProfile stats written to {_cprofile_path}", file=sys.stderr)
+    print_summary()
+    if _json_path:
+        with open(_json_path, 'w') as f:
+            json.dump(snapshot(), f, indent=2)
+        print(f"Profile JSON written to {_json_path}", file=sys.stderr)
+
+
+if os.environ.get("NFL_PROFILE", "") not in ("", "0"):
+    enable()
@@ -0,0 +1,190 @@
+import argparse
+import json
+import math
+from datetime import datetime
+
+import db_commands
+from nflpick import best_proxy_slate, mask_picks, spread_probabilities
+
+# Spread moves (in points, either direction) applied to each game and to the whole week.
+# Positive moves make the favorite more of a favorite.
+SHIFTS = (0.5, 1.0, 3.0)
+
+
+def build_scenarios(games, shifts=SHIFTS):
+    """
+    Perturbed spread sets: each game moved by +/- every shift on its own, then every game
+    moved together. Returns a list of (label, game index or None, delta, fav_probs).
+    """
+    spreads = [game['spread'] for game in games]
+    deltas = sorted({sign * shift for shift in shifts for sign in (-1, 1)})
+    scenarios = []
+    for i, game in enumerate(games):
+        for delta in deltas:
+            shifted = list(spreads)
+            shifted[i] += delta
+            scenarios.append((f"{game['favorite']} {delta:+g}", i, delta,
+                              [spread_probabilities(s)[0] for s in shifted]))
+    for delta in deltas:
+        scenarios.append((f"All games {delta:+g}", None, delta,
+                          [spread_probabilities(s + delta)[0] for s in spreads]))
+    return scenarios
+
+
+def slate_metrics(fav_probs, mask, underdog_bonus):
+    """(overall_prob, expected_correct, proxy fitness) of one slate bitmask."""
+    log_prob = 0.0
+    expected = 0.0
+    for i, p in enumerate(fav_probs):
+        side = 1 - p if (mask >> i) & 1 else p
+        log_prob += math.log(side)
+        expected += side
+    prob = math.exp(log_prob)
+    return prob, expected, prob * (1 + underdog_bonus * mask.bit_count())
+
+
+def analyze_sensitivity(games, slates, shifts=SHIFTS, underdog_bonus=0.45):
+    """
+    Re-scores 'slates' (dicts with 'label' and 'mask') and the exact proxy optimum under
+    every scenario from build_scenarios.
+
+    Each scenario only changes some games, so a slate's new score is its base score plus
+    per-game deltas: log(new side prob) - log(old side prob) for the overall probability and
+    new - old for the expected correct count. Those deltas are computed once per scenario
+    and shared by every slate.
+    """
+    base_probs = [spread_probabilities(game['spread'])[0] for game in games]
+    best_mask, best_fitness, best_prob = best_proxy_slate(base_probs, underdog_bonus)
+    candidates = [{'label': 'Optimizer best', 'mask': best_mask}] + list(slates)
+
+    base = []
+    for slate in candidates:
+        prob, expected, fitness = slate_metrics(base_probs, slate['mask'], underdog_bonus)
+        base.append({'label': slate['label'], 'mask': slate['mask'], 'picks': mask_picks(games, slate['mask']),
+                     'overall_prob': prob, 'log_prob': math.log(prob),
+                     'expected_correct': expected, 'fitness': fitness})
+
+    results = []
+    for label, game_index, delta, fav_probs in build_scenarios(games, shifts):
+        changed = [i for i in ([game_index] if game_index is not None else range(len(games)))
+                   if fav_probs[i] != base_probs[i]]
+        # (bit value -> delta) for the games this scenario moves.
+        log_deltas = [(i, math.log(fav_probs[i]) - math.log(base_probs[i]),
+                       math.log(1 - fav_probs[i]) - math.log(1 - base_probs[i])) for i in changed]
+        exp_deltas = [(i, fav_probs[i] - base_probs[i]) for i in changed]
+
+        scenario_best, scenario_fitness, _ = best_proxy_slate(fav_probs, underdog_bonus)
+        flips = scenario_best ^ best_mask
+        side_flips = [games[i]['favorite'] for i in changed if (fav_probs[i] >= 0.5) != (base_probs[i] >= 0.5)]
+
+        slate_results = []
+        for slate in base:
+            mask = slate['mask']
+            log_prob = slate['log_prob'] + sum(d_dog if (mask >> i) & 1 else d_fav for i, d_fav, d_dog in log_deltas)
+            expected = slate['expected_correct'] + sum(-d if (mask >> i) & 1 else d for i, d in exp_deltas)
+            prob = math.exp(log_prob)
+            fitness = prob * (1 + underdog_bonus * mask.bit_count())
+            slate_results.append({
+                'label': slate['label'],
+                'overall_prob': prob,
+                'prob_change_pct': (prob / slate['overall_prob'] - 1) * 100,
+                'expected_correct_change': expected - slate['expected_correct'],
+                'share_of_best': fitness / scenario_fitness,
+            })
+
+        results.append({
+            'scenario': label,
+            'game': game_index,
+            'delta': delta,
+            'favored_side_flips': side_flips,
+            'best_pick_flips': [team for i, team in enumerate(mask_picks(games, scenario_best)) if (flips >> i) & 1],
+            'slates': slate_results,
+        })
+
+    for slate in base:
+        del slate['log_prob']
+        changes = [s['prob_change_pct'] for r in results for s in r['slates'] if s['label'] == slate['label']]
+        slate['worst_change_pct'] = min(changes, default=0.0)
+        slate['best_change_pct'] = max(changes, default=0.0)
+    return {'slates': base, 'scenarios': results}
+
+
+def saved_slate_masks(cur, week, year, games, limit=None):
+    """Saved slates for the week as (label, mask), matching picks to games by team."""
+    slates = []
+    for saved in db_commands.fetch_generated_slates(cur, week, year, limit):
+        if saved.get('pick_mask') is not None and saved['game_count'] == len(games):
+            mask = saved['pick_mask']
+        else:
+            picked = {pick['team_pick'] for pick in saved['picks']}
+            mask = sum(1 << i for i, game in enumerate(games) if game['underdog'] in picked)
+        slates.append({'label': f"{saved['method']} #{saved['id']}", 'mask': mask})
+    return slates
+
+
+def run_sensitivity(cur, week, year, shifts=SHIFTS, underdog_bonus=0.45, limit=None):
+    """Sensitivity report for a week's games and saved slates, or None if the week has no games."""
+    games = db_commands.week_games(cur, week, year)
+    if not games:
+        return None
+    report = analyze_sensitivity(games, saved_slate_masks(cur, week, year, games, limit), shifts, underdog_bonus)
+    report.update({'week': week, 'year': year, 'games': len(games), 'shifts': list(shifts)})
+    return report
+
+
+def print_sensitivity(report):
+    """Prints each slate's range of outcomes, then the scenarios that change the optimizer's picks."""
+    print(f"\n===== SENSITIVITY: WEEK {report['week']}, {report['year']} ({report['games']} games) =====")
+    print("{:<22} {:<10} {:<12} {:<12} {:<12}".format("Slate", "Underdogs", "Success", "Worst move", "Best move"))
+    print("-" * 70)
+    for slate in report['slates']:
+        print("{:<22} {:<10} {:<12} {:<12} {:<12}".format(
+            slate['label'], slate['mask'].bit_count(), f"{slate['overall_prob'] * 100:.4f}%",
+            f"{slate['worst_change_pct']:+.1f}%", f"{slate['best_change_pct']:+.1f}%"))
+
+    print("\nScenarios that change the optimizer's best slate:")
+    any_flips = False
+    for result in report['scenarios']:
+        if not result['best_pick_flips'] and not result['favored_side_flips']:
+            continue
+        any_flips = True
+        parts = []
+        if result['best_pick_flips']:
+            parts.append("best slate now takes " + ", ".join(result['best_pick_flips']))
+        if result['favored_side_flips']:
+            parts.append("favorite flips in " + ", ".join(result['favored_side_flips']))
+        saved = [s for s in result['slates'] if s['label'] != 'Optimizer best']
+        if saved:
+            parts.append("saved slates at " + ", ".join(f"{s['share_of_best'] * 100:.0f}%" for s in saved) + " of best")
+        print(f"  {result['scenario']:<24} " + "; ".join(parts))
+    if not any_flips:
+        print("  None: every pick holds across the tested moves.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score a week's slates under spread movement.")
+    parser.add_argument("--db", default="picks.db", help="database to read (default: picks.db)")
+    parser.add_argument("--week", type=int, required=True)
+    parser.add_argument("--year", type=int, default=datetime.now().year)
+    parser.add_argument("--shifts", default=",".join(f"{s:g}" for s in SHIFTS),
+                        help="comma-separated spread moves in points (default: 0.5,1,3)")
+    parser.add_argument("--underdog-bonus", type=float, default=0.45)
+    parser.add_argument("--limit", type=int, default=None, help="only the top N saved slates")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    shifts = tuple(float(s) for s in args.shifts.split(',') if s.strip())
+    conn, cur = db_commands.connect_db(args.db)
+    report = run_sensitivity(cur, args.week, args.year, shifts, args.underdog_bonus, args.limit)
+    conn.close()
+
+    if report is None:
+        print(f"No games entered for Week {args.week}, {args.year}.")
+    elif args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_sensitivity(report)
+
+
+if __name__ == "__main__":
+    main()
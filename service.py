@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import json
+import queue
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+import db_commands
+from nflpick import calculate_adjusted_spread, lookup_team, new_seed
+from optimizers import ENGINES, default_engine, run_optimizer
+
+MAX_BODY_BYTES = 1 << 20
+
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+               500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    """Raised by handlers to return a JSON error with the given status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of SQLite connections in WAL mode, shared by the worker threads that
+    run database calls. WAL lets readers proceed while a writer commits.
+    """
+
+    def __init__(self, db_name, size=4):
+        # connect_db creates and migrates the schema once; pooled connections skip that work.
+        conn, _ = db_commands.connect_db(db_name)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.close()
+
+        self._pool = queue.Queue()
+        for _ in range(size):
+            conn = sqlite3.connect(db_name, check_same_thread=False, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._pool.put(conn)
+
+    @contextmanager
+    def cursor(self):
+        """Borrows a connection and yields (conn, cur); rolls back on error."""
+        conn = self._pool.get()
+        try:
+            yield conn, conn.cursor()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get().close()
+
+
+def _require_int(data, key, default=None):
+    value = data.get(key, default)
+    if value is None:
+        raise HTTPError(400, f"'{key}' is required")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"'{key}' must be an integer")
+
+
+def _require_bool(data, key):
+    value = data.get(key, False)
+    if not isinstance(value, bool):
+        raise HTTPError(400, f"'{key}' must be true or false")
+    return value
+
+
+class PickemService:
+    """JSON API over the picks database: games, slate generation, saved slates and stats."""
+
+    def __init__(self, db_name="picks.db", db_connections=4, workers=None):
+        self.db_name = db_name
+        self.db = ConnectionPool(db_name, size=db_connections)
+        self.processes = ProcessPoolExecutor(max_workers=workers)
+        self.routes = {
+            ('GET', '/health'): self.health,
+            ('POST', '/games'): self.add_game,
+            ('GET', '/games'): self.list_games,
+            ('POST', '/slates'): self.generate_slates,
+            ('GET', '/slates'): self.get_slates,
+            ('GET', '/frontier'): self.get_frontier,
+            ('GET', '/stats'): self.stats,
+        }
+
+    async def _db(self, fn, *args):
+        """Runs a blocking database function on a worker thread with a pooled connection."""
+        def call():
+            with self.db.cursor() as (conn, cur):
+                return fn(conn, cur, *args)
+        return await asyncio.get_running_loop().run_in_executor(None, call)
+
+    async def health(self, query, body):
+        return 200, {'status': 'ok'}
+
+    async def add_game(self, query, body):
+        week = _require_int(body, 'week')
+        year = _require_int(body, 'year', datetime.now().year)
+        favorite = lookup_team(str(body.get('favorite', '')))
+        underdog = lookup_team(str(body.get('underdog', '')))
+        if not favorite or not underdog or favorite == underdog:
+            raise HTTPError(400, "'favorite' and 'underdog' must be two different valid teams")
+        try:
+            spread = float(body['spread'])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPError(400, "'spread' must be a number")
+        if spread < 0:
+            raise HTTPError(400, "'spread' should be positive (favorite is expected to win by this many points)")
+
+        home_team = body.get('home', 'favorite')
+        rest_advantage = body.get('rest', 'neither')
+        if home_team not in ('favorite', 'underdog') or rest_advantage not in ('favorite', 'underdog', 'neither'):
+            raise HTTPError(400, "'home' must be favorite/underdog and 'rest' favorite/underdog/neither")
+        adjusted_spread, fired = calculate_adjusted_spread(
+            favorite, underdog, spread, home_team=home_team, prime_time=_require_bool(body, 'prime_time'),
+            rest_advantage=rest_advantage, fav_streak=_require_bool(body, 'fav_streak'),
+            dog_streak=_require_bool(body, 'dog_streak'))
+
+        def insert(conn, cur):
+            # One write transaction for the check and the insert, so two requests for the same
+            # team can't both pass the check; a conflict rolls back through the pool's cursor().
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute("SELECT favorite, underdog FROM picks WHERE week = ? AND year = ?", (week, year))
+            teams_picked = {team for row in cur.fetchall() for team in (row['favorite'], row['underdog'])}
+            if favorite in teams_picked or underdog in teams_picked:
+                raise HTTPError(409, "One of these teams has already been picked this week.")
+            game_id = db_commands.add_game(cur, week, year, favorite, underdog, spread, adjusted_spread,
+                                           adjustments=fired)
+            conn.commit()
+            return game_id
+
+        game_id = await self._db(insert)
+        return 201, {'id': game_id, 'week': week, 'year': year, 'favorite': favorite, 'underdog': underdog,
+                     'spread': spread, 'adjusted_spread': adjusted_spread,
+                     'adjustments': [adjustment_type for adjustment_type, _, _ in fired]}
+
+    async def list_games(self, query, body):
+        week = _require_int(query, 'week')
+        year = _require_int(query, 'year', datetime.now().year)
+
+        def select(conn, cur):
+            cur.execute("SELECT * FROM picks WHERE week = ? AND year = ? ORDER BY id", (week, year))
+            return [dict(row) for row in cur.fetchall()]
+
+        return 200, {'games': await self._db(select)}
+
+    async def generate_slates(self, query, body):
+        week = _require_int(body, 'week')
+        year = _require_int(body, 'year', datetime.now().year)
+        num_slates = _require_int(body, 'num_slates', 5)
+        pool_size = _require_int(body, 'pool_size', 0)
+        entries = _require_int(body, 'entries', 1)
+        if entries > 1 and pool_size <= 1:
+            raise HTTPError(400, "'entries' needs a 'pool_size' greater than 1")
+        engine = body.get('engine')
+        if engine is not None and engine not in ENGINES:
+            raise HTTPError(400, f"'engine' must be one of: {', '.join(ENGINES)}")
+
+        games = await self._db(lambda conn, cur: db_commands.week_games(cur, week, year))
+        if not games:
+            raise HTTPError(404, f"No games entered for Week {week}, {year}.")
+
+        seed = _require_int(body, 'seed') if 'seed' in body else new_seed()
+        engine = engine or default_engine(len(games))
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        method, slates = await loop.run_in_executor(self.processes, run_optimizer, games, engine, pool_size,
+                                                    num_slates, entries, seed)
+        duration_ms = (time.perf_counter() - start) * 1000
+        params = {'engine': engine, 'pool_size': pool_size, 'num_slates': num_slates, 'entries': entries, 'at': None}
+
+        def save(conn, cur):
+            manifest_id = db_commands.save_run_manifest(cur, week, year, 'generate', method, seed, params, games, duration_ms)
+            db_commands.clear_generated_slates(cur, week, year)
+            db_commands.save_generated_slates(cur, week, year, method, games, slates, manifest_id=manifest_id)
+            conn.commit()
+            return manifest_id, db_commands.fetch_generated_slates(cur, week, year)
+
+        manifest_id, saved = await self._db(save)
+        return 201, {'week': week, 'year': year, 'method': method, 'manifest_id': manifest_id, 'seed': seed,
+                     'slates': saved}
+
+    async def get_slates(self, query, body):
+        week = _require_int(query, 'week')
+        year = _require_int(query, 'year', datetime.now().year)
+        limit = _require_int(query, 'limit', 0) or None
+        slates = await self._db(lambda conn, cur: db_commands.fetch_generated_slates(cur, week, year, limit))
+        return 200, {'week': week, 'year': year, 'slates': slates}
+
+    async def get_frontier(self, query, body):
+        week = _require_int(query, 'week')
+        year = _require_int(query, 'year', datetime.now().year)
+        underdogs = _require_int(query, 'underdogs') if 'underdogs' in query else None
+
+        def load(conn, cur):
+            result = db_commands.load_frontier(cur, week, year, underdogs)
+            conn.commit()
+            return result
+
+        result = await self._db(load)
+        if not result:
+            raise HTTPError(404, f"No frontier slate for Week {week}, {year}"
+                                 + (f" with {underdogs} underdogs." if underdogs is not None else "."))
+        if underdogs is None:
+            return 200, {'week': week, 'year': year, 'frontier': result}
+        return 200, {'week': week, 'year': year, 'slate': result}
+
+    async def stats(self, query, body):
+        def load():
+            # Its own connection: attach_archives ATTACHes the season files and adds temp
+            # tables, which would otherwise pile up on the pooled connections.
+            conn = sqlite3.connect(self.db_name, timeout=30)
+            conn.row_factory = sqlite3.Row
+            try:
+                cur = conn.cursor()
+                source = db_commands.attach_archives(cur, db_commands.archive_dir(self.db_name))
+                return db_commands.performance_stats(cur, source)
+            finally:
+                conn.close()
+
+        return 200, {'stats': await asyncio.get_running_loop().run_in_executor(None, load)}
+
+    async def handle_connection(self, reader, writer):
+        """Serves one HTTP/1.1 request per connection and closes it."""
+        try:
+            status, payload = await self._dispatch(reader)
+        except HTTPError as e:
+            status, payload = e.status, {'error': e.message}
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            status, payload = 500, {'error': str(e)}
+
+        data = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n".encode() + data)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _dispatch(self, reader):
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        parts = request_line.split()
+        if len(parts) != 3:
+            raise HTTPError(400, "Malformed request line")
+        method, target, _ = parts
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0) or 0)
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        body = {}
+        if length:
+            try:
+                body = json.loads(await reader.readexactly(length))
+            except json.JSONDecodeError:
+                raise HTTPError(400, "Body must be JSON")
+            if not isinstance(body, dict):
+                raise HTTPError(400, "Body must be a JSON object")
+
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                raise HTTPError(405, f"{method} not allowed on {url.path}")
+            raise HTTPError(404, f"No route for {url.path}")
+        return await handler(query, body)
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Serving NFL pick'em API on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.processes.shutdown()
+        self.db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local JSON HTTP service for the NFL pick'em tools.")
+    parser.add_argument("--db", default="picks.db", help="database to serve (default: picks.db)")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db-connections", type=int, default=4, help="pooled SQLite connections")
+    parser.add_argument("--workers", type=int, default=None, help="optimizer process pool size")
+    args = parser.parse_args()
+
+    service = PickemService(args.db, db_connections=args.db_connections, workers=args.workers)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+import argparse
+import json
+import math
+import mmap
+import os
+import sys
+from array import array
+
+import db_commands
+
+SNAPSHOT_DIR = ".picks_snapshot"
+META_FILE = "meta.json"
+FORMAT_VERSION = 1
+
+# Fixed-width column files, one per field, row i of every file is the same pick.
+# Integer columns use -1 for NULL, float columns NaN. Team columns index META's 'teams' list,
+# which only ever grows, so existing codes stay valid across refreshes.
+COLUMNS = {
+    'id': 'q',
+    'week': 'h',
+    'year': 'h',
+    'season': 'h',
+    'favorite': 'h',
+    'underdog': 'h',
+    'spread': 'd',
+    'adjusted_spread': 'd',
+    'pick': 'b',       # 1 favorite, 0 underdog, 2 any other team, -1 no pick
+    'outcome': 'b',    # 1 favorite won, 0 underdog won, 2 tie, -1 unsettled
+    'correct': 'b',    # 1, 0, or -1 when not graded
+}
+
+FAVORITE, UNDERDOG, OTHER, NONE = 1, 0, 2, -1
+
+
+def _season(date):
+    """Same season rule as performance_stats: Jan/Feb games belong to the previous season."""
+    if not date:
+        return NONE
+    season = int(date[:4])
+    return season if date[5:7] >= '09' else season - 1
+
+
+def _encode(row, team_codes, teams):
+    def team(name):
+        if name is None:
+            return NONE
+        if name not in team_codes:
+            team_codes[name] = len(teams)
+            teams.append(name)
+        return team_codes[name]
+
+    def side(value):
+        if value is None:
+            return NONE
+        if value == row['favorite']:
+            return FAVORITE
+        if value == row['underdog']:
+            return UNDERDOG
+        return OTHER
+
+    def number(value):
+        return NONE if value is None else value
+
+    def real(value):
+        return math.nan if value is None else value
+
+    return {
+        'id': row['id'],
+        'week': number(row['week']),
+        'year': number(row['year']),
+        'season': _season(row['date']),
+        'favorite': team(row['favorite']),
+        'underdog': team(row['underdog']),
+        'spread': real(row['spread']),
+        'adjusted_spread': real(row['adjusted_spread']),
+        'pick': side(row['pick']),
+        'outcome': side(row['winner']),
+        'correct': number(row['correct']),
+    }
+
+
+def _column_path(directory, name):
+    return os.path.join(directory, f"{name}.bin")
+
+
+def _read_meta(directory):
+    try:
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('format') != FORMAT_VERSION or meta.get('byteorder') != sys.byteorder:
+        return None
+    return meta
+
+
+def _write_meta(directory, meta):
+    path = os.path.join(directory, META_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(path + ".tmp", path)
+
+
+def _change_log(cur):
+    cur.execute("SELECT seq, last_delete FROM change_log WHERE name = 'picks'")
+    row = cur.fetchone()
+    return (row['seq'], row['last_delete']) if row else (0, 0)
+
+
+def build(cur, directory=SNAPSHOT_DIR):
+    """
+    Writes every pick as a fresh column set. The watermark is read before the scan, so a
+    change racing the export is picked up again by the next refresh rather than lost.
+    """
+    seq, _ = _change_log(cur)
+    os.makedirs(directory, exist_ok=True)
+    teams, team_codes = [], {}
+    columns = {name: array(code) for name, code in COLUMNS.items()}
+    cur.execute(f"SELECT {db_commands.PICK_COLUMNS} FROM picks ORDER BY id")
+    for row in cur.fetchall():
+        for name, value in _encode(row, team_codes, teams).items():
+            columns[name].append(value)
+
+    for name, values in columns.items():
+        path = _column_path(directory, name)
+        with open(path + ".tmp", "wb") as f:
+            values.tofile(f)
+        os.replace(path + ".tmp", path)
+    meta = {'format': FORMAT_VERSION, 'byteorder': sys.byteorder, 'watermark': seq,
+            'rows': len(columns['id']), 'teams': teams}
+    _write_meta(directory, meta)
+    return {'mode': 'full', 'rows': meta['rows'], 'appended': meta['rows'], 'updated': 0, 'watermark': seq}
+
+
+def refresh(cur, directory=SNAPSHOT_DIR):
+    """
+    Brings the snapshot up to date with 'picks'. Rows stamped after the watermark are
+    overwritten in place if already present and appended otherwise; a delete since the last
+    export (or a missing or foreign-format snapshot) falls back to a full build.
+    Returns what was done: mode ('full', 'incremental' or 'current'), rows, appended, updated.
+    """
+    meta = _read_meta(directory)
+    seq, last_delete = _change_log(cur)
+    if meta is None or last_delete > meta['watermark']:
+        return build(cur, directory)
+    if seq == meta['watermark']:
+        return {'mode': 'current', 'rows': meta['rows'], 'appended': 0, 'updated': 0, 'watermark': seq}
+
+    cur.execute(f"SELECT {db_commands.PICK_COLUMNS} FROM picks WHERE change_seq > ? ORDER BY id", (meta['watermark'],))
+    changed = cur.fetchall()
+    with open(_column_path(directory, 'id'), "rb") as f:
+        ids = array(COLUMNS['id'])
+        ids.frombytes(f.read())
+    position = {pick_id: i for i, pick_id in enumerate(ids)}
+    teams = meta['teams']
+    team_codes = {name: i for i, name in enumerate(teams)}
+
+    updates, appends = [], []
+    for row in changed:
+        encoded = _encode(row, team_codes, teams)
+        if row['id'] in position:
+            updates.append((position[row['id']], encoded))
+        else:
+            appends.append(encoded)
+    # Ids only grow, but a row written in the past with a smaller id than the snapshot's last
+    # one would break the id order the readers rely on; rebuild rather than reorder.
+    if appends and ids and appends[0]['id'] < ids[-1]:
+        return build(cur, directory)
+
+    for name, code in COLUMNS.items():
+        width = array(code).itemsize
+        with open(_column_path(directory, name), "r+b") as f:
+            for index, encoded in updates:
+                f.seek(index * width)
+                f.write(array(code, [encoded[name]]).tobytes())
+            if appends:
+                # Past the rows meta vouches for, not the file end: an append interrupted
+                # before meta was written is simply overwritten.
+                f.seek(meta['rows'] * width)
+                f.truncate()
+                f.write(array(code, [encoded[name] for encoded in appends]).tobytes())
+
+    meta.update(watermark=seq, rows=meta['rows'] + len(appends), teams=teams)
+    _write_meta(directory, meta)
+    return {'mode': 'incremental', 'rows': meta['rows'], 'appended': len(appends),
+            'updated': len(updates), 'watermark': seq}
+
+
+class Snapshot:
+    """
+    Read-only, memory-mapped view of a snapshot directory. snapshot['spread'] is a
+    memoryview cast to the column's type over the mapped file, so nothing is copied or
+    parsed; it also works directly as a buffer (e.g. numpy.frombuffer(snapshot['spread'])).
+    Views cover the rows present when opened; call close() (or use as a context manager)
+    before dropping the snapshot.
+    """
+
+    def __init__(self, directory=SNAPSHOT_DIR):
+        meta = _read_meta(directory)
+        if meta is None:
+            raise FileNotFoundError(f"No snapshot in {directory}; run 'python3 snapshot.py refresh' first.")
+        self.directory = directory
+        self.rows = meta['rows']
+        self.watermark = meta['watermark']
+        self.teams = meta['teams']
+        self._maps = []
+        self._views = {}
+        for name, code in COLUMNS.items():
+            size = self.rows * array(code).itemsize
+            if size == 0:
+                self._views[name] = memoryview(array(code))
+                continue
+            with open(_column_path(directory, name), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+            self._maps.append(mapped)
+            self._views[name] = memoryview(mapped).cast(code)
+
+    def __getitem__(self, name):
+        return self._views[name]
+
+    def __len__(self):
+        return self.rows
+
+    def team(self, code):
+        return self.teams[code] if code >= 0 else None
+
+    def close(self):
+        for view in self._views.values():
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        self._views, self._maps = {}, []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_snapshot(cur, directory=SNAPSHOT_DIR):
+    """Refreshes the snapshot from 'picks' and opens it."""
+    refresh(cur, directory)
+    return Snapshot(directory)
+
+
+def performance_stats(snap):
+    """performance_stats from the columns instead of five SQL scans; same result shape."""
+    correct, spread = snap['correct'], snap['spread']
+    season, week, pick = snap['season'], snap['week'], snap['pick']
+    spread_ranges = [(0, 3.5), (3.5, 6.5), (6.5, 9.5), (9.5, 100)]
+    overall = [0, 0]
+    by_range = [[0, 0] for _ in spread_ranges]
+    by_season, by_week, by_type = {}, {}, {}
+    for i in range(len(snap)):
+        c = correct[i]
+        if c < 0:
+            continue
+        overall[0] += c
+        overall[1] += 1
+        for r, (low, high) in enumerate(spread_ranges):
+            if low <= spread[i] < high:
+                by_range[r][0] += c
+                by_range[r][1] += 1
+                break
+        if season[i] >= 0:
+            counts = by_season.setdefault(season[i], [0, 0])
+            counts[0] += c
+            counts[1] += 1
+        counts = by_week.setdefault(week[i] if week[i] >= 0 else None, [0, 0])
+        counts[0] += c
+        counts[1] += 1
+        if pick[i] != NONE:
+            pick_type = 'Favorite' if pick[i] == FAVORITE else 'Underdog' if pick[i] == UNDERDOG else 'Unknown'
+            counts = by_type.setdefault(pick_type, [0, 0])
+            counts[0] += c
+            counts[1] += 1
+    if overall[1] == 0:
+        return None
+    return {
+        'overall': db_commands._record(*overall),
+        'spread_ranges': [dict(db_commands._record(*counts), low=low, high=high)
+                          for (low, high), counts in zip(spread_ranges, by_range) if counts[1]],
+        'seasons': [dict(db_commands._record(*by_season[s]), season=s) for s in sorted(by_season, reverse=True)],
+        'weeks': [dict(db_commands._record(*by_week[w]), week=w)
+                  for w in sorted(by_week, key=lambda w: (w is not None, w or 0))],
+        'pick_types': [dict(db_commands._record(*by_type[t]), pick_type=t) for t in sorted(by_type)],
+    }
+
+
+
+def settled_weeks(snap):
+    """
+    backtest.load_settled_weeks from the columns: every fully settled week, oldest first,
+    games in entry order with the adjusted spread. Same result shape; a winner that is neither
+    team reads back as 'TIE'.
+    """
+    week, year, season = snap['week'], snap['year'], snap['season']
+    favorite, underdog = snap['favorite'], snap['underdog']
+    spread, outcome = snap['adjusted_spread'], snap['outcome']
+    weeks = {}
+    for i in range(len(snap)):
+        if week[i] < 0 or year[i] < 0:
+            continue
+        key = (year[i], week[i])
+        if key not in weeks:
+            weeks[key] = {'year': year[i], 'week': week[i],
+                          'season': season[i] if season[i] >= 0 else year[i], 'games': []}
+        fav, dog, result = snap.team(favorite[i]), snap.team(underdog[i]), outcome[i]
+        weeks[key]['games'].append({
+            'favorite': fav,
+            'underdog': dog,
+            'spread': None if math.isnan(spread[i]) else spread[i],
+            'winner': fav if result == FAVORITE else dog if result == UNDERDOG else 'TIE' if result == OTHER else None,
+        })
+    return [weeks[key] for key in sorted(weeks) if all(g['winner'] is not None for g in weeks[key]['games'])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar, memory-mapped snapshot of the pick history.")
+    parser.add_argument("--db", default="picks.db", help="database to snapshot (default: picks.db)")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR, help=f"snapshot directory (default: {SNAPSHOT_DIR})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("refresh", help="bring the snapshot up to date (incrementally when possible)")
+    p.add_argument("--rebuild", action="store_true", help="rewrite every column from scratch")
+    p = sub.add_parser("stats", help="performance stats computed from the snapshot")
+    p.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    conn, cur = db_commands.connect_db(args.db)
+    if args.command == "refresh":
+        result = build(cur, args.dir) if args.rebuild else refresh(cur, args.dir)
+        conn.close()
+        print(f"Snapshot {result['mode']}: {result['rows']} rows "
+              f"({result['appended']} appended, {result['updated']} updated), watermark {result['watermark']}")
+        return
+
+    with open_snapshot(cur, args.dir) as snap:
+        conn.close()
+        stats = performance_stats(snap)
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    elif stats is None:
+        print("No completed picks found")
+    else:
+        overall = stats['overall']
+        print(f"Overall record: {overall['wins']}-{overall['losses']} ({overall['pct']:.1f}%)")
+        for r in stats['spread_ranges']:
+            print(f"Spread {r['low']}-{r['high']}: {r['wins']}-{r['losses']} ({r['pct']:.1f}%)")
+        for r in stats['seasons']:
+            print(f"{r['season']} Season: {r['wins']}-{r['losses']} ({r['pct']:.1f}%)")
+        for r in stats['weeks']:
+            print(f"Week {r['week']}: {r['wins']}-{r['losses']} ({r['pct']:.1f}%)")
+        for r in stats['pick_types']:
+            print(f"{r['pick_type']}: {r['wins']}-{r['losses']} ({r['pct']:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import backtest
+import db_commands
+import snapshot
+from nflpick import poisson_binomial
+
+RESULTS_FILE = "sweep_results.jsonl"
+
+DEFAULT_GRID = {
+    'underdog_bonus': [0.0, 0.15, 0.3, 0.45, 0.6, 0.9],
+    'mutation_rate': [0.03, 0.07, 0.12],
+    'population_size': [250, 500],
+}
+
+
+def parse_list(text, cast=float):
+    """Parses a comma-separated command-line list, e.g. '0.1,0.2,0.3'."""
+    return [cast(item) for item in text.split(',') if item.strip()]
+
+
+def trial_key(config):
+    """Stable identifier for a GA configuration, used to skip finished trials on resume."""
+    return json.dumps(config, sort_keys=True)
+
+
+def dataset_key(weeks, favorite_rate):
+    """
+    Fingerprint of what trials are scored against: the settled weeks (games and winners)
+    and the opponent model. Trials from another database or favorite rate don't match it.
+    """
+    games = [game for week in weeks for game in week['games']]
+    return db_commands.input_hash(games, {
+        'weeks': [[week['year'], week['week'], len(week['games'])] for week in weeks],
+        'winners': [game['winner'] for game in games],
+        'favorite_rate': favorite_rate,
+    })
+
+
+def load_results(path, dataset=None):
+    """Reads every finished trial for 'dataset' (see dataset_key) from the results file, keyed by trial_key."""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                trial = json.loads(line)
+            except json.JSONDecodeError:
+                # A sweep killed mid-write leaves a partial last line; that trial is simply re-run.
+                continue
+            if trial.get('dataset') == dataset:
+                results[trial_key(trial['config'])] = trial
+    return results
+
+
+def append_result(path, trial):
+    """Persists one finished trial immediately so an interrupted sweep can resume."""
+    with open(path, 'a') as f:
+        f.write(json.dumps(trial) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def score_trial(config, weeks, week_slates, opponent_dists, pool_sizes, dataset=None):
+    """
+    Scores one configuration over all weeks. The objective per pool size is the mean
+    first-place share of the GA's top slate against simulated favorite-leaning opponents.
+    """
+    pool_scores = {str(n): 0.0 for n in pool_sizes}
+    hits = 0
+    games = 0
+    for week, slates, opp_dist in zip(weeks, week_slates, opponent_dists):
+        correct = backtest.score_slate(slates[0]['picks'], week['games']) if slates else 0
+        hits += correct
+        games += len(week['games'])
+        for n in pool_sizes:
+            pool_scores[str(n)] += backtest.pool_win_share(correct, opp_dist, n)
+
+    return {
+        'config': config,
+        'dataset': dataset,
+        'hit_rate': hits / games if games else 0.0,
+        'pool_scores': {n: total / len(weeks) for n, total in pool_scores.items()}
+    }
+
+
+def is_done(results, config, pool_sizes):
+    """True when 'config' has a finished trial scored for every pool size."""
+    trial = results.get(trial_key(config))
+    return trial is not None and all(str(n) in trial['pool_scores'] for n in pool_sizes)
+
+
+def run_trials(configs, weeks, opponent_dists, pool_sizes, results, results_path,
+               workers=None, cache_dir=backtest.CACHE_DIR, dataset=None):
+    """
+    Runs every configuration not already in 'results', or not yet scored for all of
+    'pool_sizes' (those are rescored, from the week cache when it has them). All
+    (trial, week) optimizer runs share one process pool; a trial is scored and persisted
+    as soon as its last week finishes.
+    """
+    pending = [c for c in configs if not is_done(results, c, pool_sizes)]
+    if not pending:
+        return
+
+    slates_by_trial = {}
+    remaining = {}
+    jobs = []
+    for config in pending:
+        key = trial_key(config)
+        slates_by_trial[key] = [None] * len(weeks)
+        for i, week in enumerate(weeks):
+            cache_key = backtest.week_cache_key(week['games'], config)
+            cached = backtest.read_cache(cache_dir, cache_key) if cache_dir else None
+            if cached is not None:
+                slates_by_trial[key][i] = cached
+            else:
+                jobs.append((key, i, config, cache_key))
+        remaining[key] = sum(1 for s in slates_by_trial[key] if s is None)
+
+    def finish(key, config):
+        trial = score_trial(config, weeks, slates_by_trial[key], opponent_dists, pool_sizes, dataset)
+        if key in results:
+            trial['pool_scores'] = dict(results[key]['pool_scores'], **trial['pool_scores'])
+        results[key] = trial
+        append_result(results_path, trial)
+        print(f"Trial done: {key} -> hit rate {trial['hit_rate'] * 100:.1f}%")
+
+    for config in pending:
+        if remaining[trial_key(config)] == 0:
+            finish(trial_key(config), config)
+
+    if not jobs:
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(backtest.optimize_week, weeks[i]['games'], config): (key, i, config, cache_key)
+                   for key, i, config, cache_key in jobs}
+        for future in as_completed(futures):
+            key, i, config, cache_key = futures[future]
+            slates = future.result()
+            if cache_dir:
+                backtest.write_cache(cache_dir, cache_key, slates)
+            slates_by_trial[key][i] = slates
+            remaining[key] -= 1
+            if remaining[key] == 0:
+                finish(key, config)
+
+
+def best_by_pool(results, pool_sizes):
+    """Returns {pool_size: best trial} using each trial's mean first-place share."""
+    best = {}
+    for n in pool_sizes:
+        scored = [t for t in results.values() if str(n) in t['pool_scores']]
+        if scored:
+            best[n] = max(scored, key=lambda t: t['pool_scores'][str(n)])
+    return best
+
+
+def refine_configs(best_trials, step_sizes):
+    """
+    Adaptive step: proposes the neighbours of each pool size's current best configuration,
+    moving underdog_bonus and mutation_rate by the given step sizes.
+    """
+    proposals = []
+    for trial in best_trials.values():
+        config = trial['config']
+        for bonus_delta, mutation_delta in itertools.product((-1, 0, 1), repeat=2):
+            if bonus_delta == 0 and mutation_delta == 0:
+                continue
+            candidate = dict(config)
+            candidate['underdog_bonus'] = round(max(0.0, config['underdog_bonus'] + bonus_delta * step_sizes['underdog_bonus']), 4)
+            candidate['mutation_rate'] = round(min(0.5, max(0.001, config['mutation_rate'] + mutation_delta * step_sizes['mutation_rate'])), 4)
+            if candidate not in proposals:
+                proposals.append(candidate)
+    return proposals
+
+
+def grid_step(values, fallback):
+    """Smallest gap between grid values, used as the first adaptive step size."""
+    values = sorted(set(values))
+    gaps = [b - a for a, b in zip(values, values[1:])]
+    return min(gaps) if gaps else fallback
+
+
+def run_sweep(cur, grid, pool_sizes, base_config=None, refine_rounds=2, favorite_rate=0.8,
+              results_path=RESULTS_FILE, workers=None, cache_dir=backtest.CACHE_DIR, source='picks', weeks=None):
+    """
+    Grid search over GA settings followed by 'refine_rounds' of local refinement around the
+    best configuration per pool size. 'weeks' are preloaded settled weeks (e.g.
+    snapshot.settled_weeks), else read from 'source'. Returns {pool_size: best trial}.
+    """
+    if weeks is None:
+        weeks = backtest.load_settled_weeks(cur, source)
+    if not weeks:
+        return {}
+
+    base_config = dict(backtest.DEFAULT_CONFIG, **(base_config or {}))
+    opponent_dists = [poisson_binomial(backtest.opponent_hit_probs(wk['games'], favorite_rate)) for wk in weeks]
+    dataset = dataset_key(weeks, favorite_rate)
+    results = load_results(results_path, dataset)
+
+    names = sorted(grid)
+    configs = [dict(base_config, **dict(zip(names, values)))
+               for values in itertools.product(*(grid[name] for name in names))]
+    print(f"Grid: {len(configs)} trials x {len(weeks)} weeks ({sum(1 for c in configs if is_done(results, c, pool_sizes))} already done)")
+    run_trials(configs, weeks, opponent_dists, pool_sizes, results, results_path, workers, cache_dir, dataset)
+
+    step_sizes = {
+        'underdog_bonus': grid_step(grid.get('underdog_bonus', []), 0.1) / 2,
+        'mutation_rate': grid_step(grid.get('mutation_rate', []), 0.02) / 2,
+    }
+    for round_num in range(1, refine_rounds + 1):
+        proposals = refine_configs(best_by_pool(results, pool_sizes), step_sizes)
+        print(f"Refinement round {round_num}: {len(proposals)} candidate(s)")
+        run_trials(proposals, weeks, opponent_dists, pool_sizes, results, results_path, workers, cache_dir, dataset)
+        step_sizes = {name: step / 2 for name, step in step_sizes.items()}
+
+    return best_by_pool(results, pool_sizes)
+
+
+def print_best(best):
+    """Prints the winning configuration for each pool size."""
+    if not best:
+        print("No settled weeks found to sweep.")
+        return
+    print("\n===== BEST CONFIGURATION BY POOL SIZE =====")
+    print("{:<6} {:<10} {:<10} {:<10} {:<12} {:<10}".format(
+        "Pool", "Bonus", "Mutation", "Pop Size", "Win Share", "Hit Rate"))
+    print("-" * 62)
+    for n, trial in sorted(best.items()):
+        config = trial['config']
+        print("{:<6} {:<10} {:<10} {:<10} {:<12} {:<10}".format(
+            n, config['underdog_bonus'], config['mutation_rate'], config['population_size'],
+            f"{trial['pool_scores'][str(n)] * 100:.2f}%", f"{trial['hit_rate'] * 100:.1f}%"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep GA settings against historical weeks in picks.db.")
+    parser.add_argument("--db", default="picks.db", help="database with settled weeks (default: picks.db)")
+    parser.add_argument("--underdog-bonus", default=",".join(map(str, DEFAULT_GRID['underdog_bonus'])))
+    parser.add_argument("--mutation-rate", default=",".join(map(str, DEFAULT_GRID['mutation_rate'])))
+    parser.add_argument("--population-size", default=",".join(map(str, DEFAULT_GRID['population_size'])))
+    parser.add_argument("--generations", type=int, default=backtest.DEFAULT_CONFIG['generations'])
+    parser.add_argument("--pool-sizes", default="5,15,30", help="pool sizes to score against")
+    parser.add_argument("--favorite-rate", type=float, default=0.8,
+                        help="how often simulated opponents take the favorite")
+    parser.add_argument("--seed", type=int, default=backtest.DEFAULT_CONFIG['seed'],
+                        help="base seed for every trial's per-week streams")
+    parser.add_argument("--refine-rounds", type=int, default=2, help="adaptive rounds after the grid")
+    parser.add_argument("--results", default=RESULTS_FILE, help="trial log used to resume (default: sweep_results.jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--cache-dir", default=backtest.CACHE_DIR, help="per-week optimizer cache directory")
+    parser.add_argument("--snapshot", default=None, metavar="DIR",
+                        help="read settled weeks from this columnar snapshot (live seasons only; see snapshot.py)")
+    args = parser.parse_args()
+
+    grid = {
+        'underdog_bonus': parse_list(args.underdog_bonus),
+        'mutation_rate': parse_list(args.mutation_rate),
+        'population_size': parse_list(args.population_size, int),
+    }
+    pool_sizes = parse_list(args.pool_sizes, int)
+
+    conn, cur = db_commands.connect_db(args.db)
+    source, weeks = 'picks', None
+    if args.snapshot:
+        with snapshot.open_snapshot(cur, args.snapshot) as snap:
+            weeks = snapshot.settled_weeks(snap)
+    else:
+        source = db_commands.attach_archives(cur, db_commands.archive_dir(args.db))
+    best = run_sweep(cur, grid, pool_sizes, base_config={'generations': args.generations, 'seed': args.seed},
+                     refine_rounds=args.refine_rounds, favorite_rate=args.favorite_rate,
+                     results_path=args.results, workers=args.workers, cache_dir=args.cache_dir,
+                     source=source, weeks=weeks)
+    conn.close()
+    print_best(best)
+
+
+if __name__ == "__main__":
+    main()
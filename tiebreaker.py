@@ -0,0 +1,128 @@
+import csv
+import os
+
+from nflpick import TIEBREAKER_TOTALS, make_rng, score_weights
+
+HISTORY_FILE = "historical_totals.csv"
+
+# O/U lines are grouped into buckets this many points wide; each bucket gets its own table.
+BUCKET_WIDTH = 3.0
+
+# How many observations the score_weights prior is worth. Buckets with little history
+# lean on the prior; well-populated buckets are driven by the data.
+PRIOR_STRENGTH = 10.0
+
+
+def load_history_file(path=HISTORY_FILE):
+    """
+    Reads (over_under, total) pairs from a local CSV with 'over_under' and 'total' columns.
+    Returns an empty list if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return []
+    history = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                history.append((float(row['over_under']), int(float(row['total']))))
+            except (KeyError, TypeError, ValueError):
+                continue
+    return history
+
+
+def load_history_db(cur):
+    """Reads (over_under, actual total) pairs recorded in 'weekly_scores'."""
+    cur.execute("SELECT over_under, actual FROM weekly_scores WHERE over_under IS NOT NULL AND actual IS NOT NULL")
+    return [(row['over_under'], row['actual']) for row in cur.fetchall()]
+
+
+def build_alias_table(probs):
+    """
+    Vose's alias method: O(n) setup, then O(1) sampling from a discrete distribution.
+    Returns (prob, alias) lists.
+    """
+    n = len(probs)
+    prob = [0.0] * n
+    alias = [0] * n
+    scaled = [p * n for p in probs]
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = scaled[l] + scaled[s] - 1.0
+        (small if scaled[l] < 1.0 else large).append(l)
+    for i in large + small:
+        prob[i] = 1.0
+    return prob, alias
+
+
+class TiebreakerModel:
+    """
+    Empirical total-points distribution per O/U bucket, blended with the score_weights prior.
+    Each bucket's distribution and alias table are built once and reused for every draw.
+    """
+
+    def __init__(self, history=None):
+        self.history = {}
+        for over_under, total in history or []:
+            self.history.setdefault(self.bucket(over_under), []).append(total)
+        self._tables = {}
+
+    @classmethod
+    def from_sources(cls, cur=None, path=HISTORY_FILE):
+        """Builds a model from the local history file plus settled entries in 'weekly_scores'."""
+        history = load_history_file(path)
+        if cur is not None:
+            history.extend(load_history_db(cur))
+        return cls(history)
+
+    @staticmethod
+    def bucket(over_under):
+        return int(float(over_under) // BUCKET_WIDTH)
+
+    def table(self, over_under):
+        """Returns (totals, probs, alias_prob, alias) for the bucket containing 'over_under'."""
+        key = self.bucket(over_under)
+        if key not in self._tables:
+            center = (key + 0.5) * BUCKET_WIDTH
+            mass = {}
+            for total, weight in zip(TIEBREAKER_TOTALS, score_weights(center)):
+                mass[total] = mass.get(total, 0.0) + weight * PRIOR_STRENGTH
+            for total in self.history.get(key, []):
+                mass[total] = mass.get(total, 0.0) + 1.0
+            totals = sorted(mass)
+            norm = sum(mass.values())
+            probs = [mass[t] / norm for t in totals]
+            self._tables[key] = (totals, probs) + build_alias_table(probs)
+        return self._tables[key]
+
+    def expected_distance(self, over_under, guess):
+        """Expected |actual total - guess| under the bucket's distribution."""
+        totals, probs, _, _ = self.table(over_under)
+        return sum(p * abs(t - guess) for t, p in zip(totals, probs))
+
+    def sample(self, over_under, rng=None):
+        """
+        Draws a tiebreaker total in O(1). Returns (score, probability of exactly that total,
+        expected tiebreak distance from the actual total). 'rng' is a random.Random or seed.
+        """
+        return self.sample_many([over_under], rng)[0]
+
+    def sample_many(self, over_unders, rng=None):
+        """Batch API: one draw per O/U (e.g. one per pool). Tables are shared across the batch."""
+        rng = make_rng(rng)
+        distances = {}
+        results = []
+        for over_under in over_unders:
+            totals, probs, alias_prob, alias = self.table(over_under)
+            i = rng.randrange(len(totals))
+            if rng.random() >= alias_prob[i]:
+                i = alias[i]
+            key = (self.bucket(over_under), totals[i])
+            if key not in distances:
+                distances[key] = self.expected_distance(over_under, totals[i])
+            results.append((totals[i], probs[i], distances[key]))
+        return results
@@ -0,0 +1,292 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+import adjustments
+import backtest
+import db_commands
+from nfl_main import WeekState
+from nflpick import (TEAMS, ProxyFitness, calculate_adjusted_spread, describe_slates, game_probabilities,
+                     make_rng, spread_probabilities)
+
+# Synthetic database presets: seasons of 18 weeks, pools, and saved slates per week
+# (split between the default slates and each pool's).
+SIZES = {
+    'small': {'seasons': 2, 'pools': 2, 'slates_per_week': 200},
+    'medium': {'seasons': 5, 'pools': 5, 'slates_per_week': 1000},
+    'large': {'seasons': 10, 'pools': 10, 'slates_per_week': 4000},
+}
+LAST_SEASON = 2025
+WEEKS = 18
+GAMES_PER_WEEK = 16
+LINES = (1, 1.5, 2.5, 3, 3, 3.5, 4, 5.5, 6, 7, 7, 8.5, 9.5, 10, 13.5)
+
+# Distinct slates described per week; saved slates cycle through them, since only the
+# row count and shape matter to the database.
+TEMPLATE_SLATES = 64
+
+
+def generate_database(path, seasons=2, pools=2, slates_per_week=200, games_per_week=GAMES_PER_WEEK, seed=0):
+    """
+    Writes a synthetic picks database through the same db_commands calls the app uses, so it
+    has connect_db's schema, indexes and triggers. The newest season is half settled.
+    Returns the row counts of the main tables.
+    """
+    rng = make_rng(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        conn, cur = db_commands.connect_db(path)
+    teams = sorted(TEAMS.values())
+    groups = [None] + [
+        db_commands.add_pool(cur, f"pool {i + 1}", rng.choice((10, 25, 50, 100)),
+                             underdog_bonus=rng.choice((0.3, 0.45, 0.6)), entries=rng.choice((1, 1, 2, 5)))
+        for i in range(pools)]
+    per_group = max(1, slates_per_week // len(groups))
+
+    for season in range(LAST_SEASON - seasons + 1, LAST_SEASON + 1):
+        for week in range(1, WEEKS + 1):
+            kickoff = date(season, 9, 7) + timedelta(weeks=week - 1)
+            year = kickoff.year
+            settled = season < LAST_SEASON or week <= WEEKS // 2
+            matchups = rng.sample(teams, 2 * games_per_week)
+            for favorite, underdog in zip(matchups[::2], matchups[1::2]):
+                spread = rng.choice(LINES)
+                adjusted_spread, fired = calculate_adjusted_spread(
+                    favorite, underdog, spread, home_team=rng.choice(('favorite', 'underdog')),
+                    prime_time=rng.random() < 0.15, rest_advantage=rng.choice(('favorite', 'underdog', 'neither', 'neither')),
+                    fav_streak=rng.random() < 0.2, dog_streak=rng.random() < 0.2)
+                fav_prob = spread_probabilities(adjusted_spread)[0]
+                pick = favorite if rng.random() < fav_prob else underdog
+                pick_id = db_commands.add_game(cur, week, year, favorite, underdog, spread, adjusted_spread,
+                                               pick, fired)
+                cur.execute("UPDATE picks SET date = ? WHERE id = ?", (kickoff.isoformat(), pick_id))
+                if settled:
+                    db_commands.settle_game(cur, pick_id, favorite if rng.random() < fav_prob else underdog)
+
+            total = rng.randint(30, 60)
+            cur.execute("INSERT INTO weekly_scores (week, year, score, over_under, actual) VALUES (?, ?, ?, ?, ?)",
+                        (week, year, total, total + rng.choice((-3.5, -0.5, 2.5)),
+                         rng.randint(20, 70) if settled else None))
+            cur.execute("INSERT INTO non_winners (week, year, team) VALUES (?, ?, ?)", (week, year, rng.choice(teams)))
+
+            games = db_commands.week_games(cur, week, year)
+            game_probs = game_probabilities(games)
+            proxy = ProxyFitness(game_probs)
+            templates = describe_slates(games, game_probs, [rng.getrandbits(len(games)) for _ in range(2 * TEMPLATE_SLATES)],
+                                        proxy, num_slates=TEMPLATE_SLATES, proxy=proxy)
+            for pool_id in groups:
+                method = 'BEAM' if pool_id is None else 'BEAM-POOL'
+                params = {'engine': 'beam', 'num_slates': per_group, 'pool_id': pool_id}
+                manifest_id = db_commands.save_run_manifest(cur, week, year, 'generate', method, rng.getrandbits(63),
+                                                            params, games, rng.uniform(1, 50))
+                db_commands.save_generated_slates(cur, week, year, method, games,
+                                                  [templates[i % len(templates)] for i in range(per_group)],
+                                                  pool_id=pool_id, manifest_id=manifest_id)
+            db_commands.save_frontier(cur, week, year, games)
+            db_commands.save_generated_slates(cur, week, year, 'CONFIDENCE', games, templates[:1], compact=False)
+        conn.commit()
+
+    counts = {table: cur.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ('picks', 'adjustment_tracking', 'generated_slates', 'slate_picks', 'run_manifests')}
+    conn.close()
+    return counts
+
+
+def workload_context(cur):
+    """What the query mix draws its arguments from: weeks, pools and games in the database."""
+    return {
+        'weeks': [(row['year'], row['week']) for row in cur.execute(
+            "SELECT DISTINCT year, week FROM picks WHERE year IS NOT NULL AND week IS NOT NULL").fetchall()],
+        'pools': [row['id'] for row in cur.execute("SELECT id FROM pools").fetchall()],
+        'games': [(row['id'], row['favorite'], row['underdog']) for row in cur.execute(
+            "SELECT id, favorite, underdog FROM picks").fetchall()],
+    }
+
+
+def _week(rng, ctx):
+    return rng.choice(ctx['weeks'])
+
+
+def q_week_state(cur, rng, ctx):
+    year, week = _week(rng, ctx)
+    WeekState.load(cur, week, year)
+
+
+def q_week_games(cur, rng, ctx):
+    year, week = _week(rng, ctx)
+    db_commands.week_games(cur, week, year)
+
+
+def q_view_slates(cur, rng, ctx):
+    year, week = _week(rng, ctx)
+    db_commands.fetch_generated_slates(cur, week, year, limit=5)
+
+
+def q_view_pool_slates(cur, rng, ctx):
+    year, week = _week(rng, ctx)
+    db_commands.fetch_generated_slates(cur, week, year, limit=5, pool_id=rng.choice(ctx['pools']))
+
+
+def q_frontier_slate(cur, rng, ctx):
+    year, week = _week(rng, ctx)
+    db_commands.fetch_frontier_slate(cur, week, year, rng.randint(0, 6))
+
+
+def q_performance_stats(cur, rng, ctx):
+    db_commands.performance_stats(cur)
+
+
+def q_settled_weeks(cur, rng, ctx):
+    backtest.load_settled_weeks(cur)
+
+
+def q_tracked_games(cur, rng, ctx):
+    adjustments.load_tracked_games(cur)
+
+
+def q_clear_slates(cur, rng, ctx):
+    year, week = _week(rng, ctx)
+    db_commands.clear_generated_slates(cur, week, year)
+
+
+def q_settle(cur, rng, ctx):
+    pick_id, favorite, underdog = rng.choice(ctx['games'])
+    db_commands.settle_game(cur, pick_id, rng.choice((favorite, underdog)))
+
+
+# The production query mix: name -> (run once with random arguments, writes). Writes are
+# rolled back after each timed run so every run sees the same database.
+QUERIES = {
+    'week_state': (q_week_state, False),
+    'week_games': (q_week_games, False),
+    'view_slates': (q_view_slates, False),
+    'view_pool_slates': (q_view_pool_slates, False),
+    'frontier_slate': (q_frontier_slate, False),
+    'performance_stats': (q_performance_stats, False),
+    'settled_weeks': (q_settled_weeks, False),
+    'tracked_games': (q_tracked_games, False),
+    'clear_slates': (q_clear_slates, True),
+    'settle': (q_settle, True),
+}
+WARMUP_RUNS = 3
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an ascending list."""
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+def run_workload(path, iterations=200, seed=0, queries=None):
+    """
+    Times each query in the mix 'iterations' times against the database at 'path'.
+    Returns {'bytes', 'rows', 'queries': {name: {'runs', 'p50_ms', 'p99_ms', 'mean_ms'}}}.
+    """
+    rng = make_rng(seed)
+    conn, cur = db_commands.connect_db(path)
+    ctx = workload_context(cur)
+    if not ctx['weeks']:
+        conn.close()
+        raise ValueError(f"{path} has no games to query.")
+    result = {'bytes': os.path.getsize(path),
+              'rows': {table: cur.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                       for table in ('picks', 'generated_slates', 'slate_picks')},
+              'queries': {}}
+    for name in queries or QUERIES:
+        run, writes = QUERIES[name]
+        if name == 'view_pool_slates' and not ctx['pools']:
+            continue
+        times = []
+        for i in range(WARMUP_RUNS + iterations):
+            start = time.perf_counter()
+            run(cur, rng, ctx)
+            elapsed = time.perf_counter() - start
+            if writes:
+                conn.rollback()
+            if i >= WARMUP_RUNS:
+                times.append(elapsed * 1000)
+        times.sort()
+        result['queries'][name] = {'runs': len(times), 'p50_ms': percentile(times, 0.5),
+                                   'p99_ms': percentile(times, 0.99), 'mean_ms': sum(times) / len(times)}
+    conn.close()
+    return result
+
+
+def print_workload(label, result):
+    rows = result['rows']
+    print(f"\n===== {label}: {rows['picks']} picks, {rows['generated_slates']} slates, "
+          f"{result['bytes'] / 1024 / 1024:.1f} MB =====")
+    print("{:<20} {:>10} {:>10} {:>10}".format("Query", "p50 ms", "p99 ms", "mean ms"))
+    print("-" * 53)
+    for name, q in result['queries'].items():
+        print("{:<20} {:>10.3f} {:>10.3f} {:>10.3f}".format(name, q['p50_ms'], q['p99_ms'], q['mean_ms']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic picks databases and a query-mix latency benchmark.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("generate", help="write a synthetic database")
+    p.add_argument("--out", required=True, help="database file to create")
+    p.add_argument("--size", choices=SIZES, default="small", help="preset (default: small)")
+    p.add_argument("--seasons", type=int, default=None, help="override the preset's seasons")
+    p.add_argument("--pools", type=int, default=None, help="override the preset's pools")
+    p.add_argument("--slates-per-week", type=int, default=None, help="override the preset's slates per week")
+    p.add_argument("--seed", type=int, default=0)
+
+    p = sub.add_parser("bench", help="replay the query mix and report p50/p99 per query and data size")
+    p.add_argument("--sizes", default="small,medium", help=f"comma-separated presets from {', '.join(SIZES)}")
+    p.add_argument("--db", action="append", default=None, help="benchmark this database instead (repeatable)")
+    p.add_argument("--dir", default=None, help="keep generated databases here and reuse them (default: temporary)")
+    p.add_argument("--iterations", type=int, default=200, help="timed runs per query (default: 200)")
+    p.add_argument("--queries", default=None, help=f"comma-separated subset of {', '.join(QUERIES)}")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        spec = dict(SIZES[args.size])
+        for key in spec:
+            if getattr(args, key) is not None:
+                spec[key] = getattr(args, key)
+        if os.path.exists(args.out):
+            parser.error(f"{args.out} already exists")
+        start = time.perf_counter()
+        counts = generate_database(args.out, seed=args.seed, **spec)
+        print(json.dumps({'db': args.out, 'spec': spec, 'rows': counts,
+                          'seconds': round(time.perf_counter() - start, 1)}, indent=2))
+        return
+
+    queries = args.queries.split(",") if args.queries else None
+    for name in queries or ():
+        if name not in QUERIES:
+            parser.error(f"unknown query {name!r}")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            targets = [(path, path) for path in args.db]
+        else:
+            directory = args.dir or tmp
+            os.makedirs(directory, exist_ok=True)
+            targets = []
+            for size in args.sizes.split(","):
+                if size not in SIZES:
+                    parser.error(f"unknown size {size!r}")
+                path = os.path.join(directory, f"synthetic_{size}_{args.seed}.db")
+                if not os.path.exists(path):
+                    generate_database(path, seed=args.seed, **SIZES[size])
+                targets.append((size, path))
+        for label, path in targets:
+            results[label] = run_workload(path, args.iterations, args.seed, queries)
+            if not args.json:
+                print_workload(label, results[label])
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()